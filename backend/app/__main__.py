@@ -0,0 +1,19 @@
+"""Command line entry point: ``python -m app worker --processes N``."""
+
+import argparse
+
+from app import worker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+    work = commands.add_parser("worker", help="execute queued runs (SWARM_RUN_MODE=queue)")
+    work.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    args = parser.parse_args()
+    if args.command == "worker":
+        worker.main(args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,9 @@ from pathlib import Path
 
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 PROJECT_DIR = BACKEND_DIR.parent
-INSTANCE_DIR = BACKEND_DIR / "instance"
-INSTANCE_DIR.mkdir(exist_ok=True)
+# Runtime state: the default database, secret key, output blobs, result cache and event spill.
+INSTANCE_DIR = Path(os.environ.get("SWARM_INSTANCE_DIR", BACKEND_DIR / "instance")).resolve()
+INSTANCE_DIR.mkdir(parents=True, exist_ok=True)
 
 # Directory that file nodes (read_file / write_file) are sandboxed to.
 FILES_DIR = Path(os.environ.get("SWARM_FILES_DIR", PROJECT_DIR / "data")).resolve()
@@ -20,6 +21,28 @@ NODES_DIR.mkdir(parents=True, exist_ok=True)
 
 DATABASE_URL = os.environ.get("SWARM_DATABASE_URL", f"sqlite:///{INSTANCE_DIR / 'swarm.db'}")
 
+# SQLite storage profile, applied to every connection (ignored for other databases).
+# WAL lets API reads proceed while a run is being persisted; NORMAL sync in WAL mode
+# only risks the last commits on power loss, never corruption.
+SQLITE_JOURNAL_MODE = os.environ.get("SWARM_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SWARM_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_MB = int(os.environ.get("SWARM_SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.environ.get("SWARM_SQLITE_MMAP_MB", "256"))
+# How long a connection waits for another writer's lock before "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SWARM_SQLITE_BUSY_TIMEOUT_MS", "10000"))
+DB_POOL_SIZE = int(os.environ.get("SWARM_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("SWARM_DB_MAX_OVERFLOW", "20"))
+
+# Execution history retention defaults (0 = no limit); users and workflows can set
+# their own through /api/retention. Failed runs age out after the failure limit,
+# which defaults to the general one.
+RETENTION_MAX_AGE_DAYS = int(os.environ.get("SWARM_RETENTION_MAX_AGE_DAYS", "0"))
+RETENTION_MAX_COUNT = int(os.environ.get("SWARM_RETENTION_MAX_COUNT", "0"))
+_failure_age = os.environ.get("SWARM_RETENTION_FAILURE_MAX_AGE_DAYS")
+RETENTION_FAILURE_MAX_AGE_DAYS = int(_failure_age) if _failure_age else None
+# How often the background compaction prunes expired executions.
+RETENTION_INTERVAL_SECONDS = float(os.environ.get("SWARM_RETENTION_INTERVAL_SECONDS", "3600"))
+
 # Where the app is reachable for OAuth redirects (register this /api/oauth/google/callback
 # as an authorized redirect URI in the Google Cloud Console).
 PUBLIC_URL = os.environ.get("SWARM_PUBLIC_URL", "http://localhost:8000").rstrip("/")
@@ -32,6 +55,57 @@ SESSION_MAX_AGE = 60 * 60 * 24 * 30  # 30 days
 # Per-node execution timeout (seconds); a node may override via NODE_TIMEOUT.
 DEFAULT_NODE_TIMEOUT = float(os.environ.get("SWARM_NODE_TIMEOUT", "120"))
 
+# Concurrency caps (0 = unlimited). Node modules can also cap their own type
+# with NODE_CONCURRENCY (e.g. llm = 4) to stay under upstream rate limits.
+MAX_CONCURRENT_NODES = int(os.environ.get("SWARM_MAX_CONCURRENT_NODES", "64"))
+MAX_NODES_PER_RUN = int(os.environ.get("SWARM_MAX_NODES_PER_RUN", "16"))
+MAX_CONCURRENT_RUNS = int(os.environ.get("SWARM_MAX_CONCURRENT_RUNS", "8"))
+# Items a "for_each" node processes at once unless the node sets its own limit.
+FOR_EACH_CONCURRENCY = int(os.environ.get("SWARM_FOR_EACH_CONCURRENCY", "8"))
+
+# "inline" executes runs inside the API process. "queue" only enqueues them in the
+# database for worker processes (`python -m app worker --processes N`).
+RUN_MODE = os.environ.get("SWARM_RUN_MODE", "inline")
+# Concurrent runs per worker process, and how long a claimed run's lease lasts
+# without a heartbeat before another worker may take it over.
+WORKER_RUNS = int(os.environ.get("SWARM_WORKER_RUNS", "8"))
+WORKER_LEASE_SECONDS = float(os.environ.get("SWARM_WORKER_LEASE_SECONDS", "30"))
+
+# Fire saved workflows that start with a schedule_trigger node. Only one API process
+# should run the scheduler; set SWARM_SCHEDULER=0 on the others.
+SCHEDULER_ENABLED = os.environ.get("SWARM_SCHEDULER", "1") != "0"
+
+# Inbound webhooks (POST /hooks/<token>): payloads waiting to start a run before
+# callers get 429, hook runs in flight at once (0 = unlimited), and the largest body.
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("SWARM_WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_MAX_RUNS = int(os.environ.get("SWARM_WEBHOOK_MAX_RUNS", "32"))
+WEBHOOK_MAX_BYTES = int(os.environ.get("SWARM_WEBHOOK_MAX_BYTES", str(1024 * 1024)))
+# On shutdown, how long accepted webhook payloads may take to start their runs.
+WEBHOOK_DRAIN_SECONDS = float(os.environ.get("SWARM_WEBHOOK_DRAIN_SECONDS", "10"))
+
+# Run events kept in memory per run (older ones spill to instance/events), and the
+# events queued per live subscriber before a slow one falls back to paging.
+EVENT_BUFFER = int(os.environ.get("SWARM_EVENT_BUFFER", "1000"))
+SUBSCRIBER_QUEUE = int(os.environ.get("SWARM_SUBSCRIBER_QUEUE", "500"))
+# Batched WebSocket streams (?batch=1) gather events for this long into one frame.
+WS_BATCH_WINDOW_MS = float(os.environ.get("SWARM_WS_BATCH_WINDOW_MS", "50"))
+
+# Shared outbound HTTP connection pools (app/http.py). HTTP/2 needs the `h2` package.
+HTTP2 = os.environ.get("SWARM_HTTP2") == "1"
+HTTP_MAX_CONNECTIONS = int(os.environ.get("SWARM_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("SWARM_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("SWARM_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Node result cache (nodes opt in with NODE_CACHEABLE, runs with use_cache):
+# default TTL for NODE_CACHEABLE = True, and the memory / disk size caps.
+RESULT_CACHE_TTL = float(os.environ.get("SWARM_RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_MEMORY_MB = int(os.environ.get("SWARM_RESULT_CACHE_MEMORY_MB", "64"))
+RESULT_CACHE_DISK_MB = int(os.environ.get("SWARM_RESULT_CACHE_DISK_MB", "512"))
+
+# Execution history: node outputs larger than this are stored zlib-compressed under
+# instance/outputs, one file per distinct content; smaller ones stay in the DB row.
+OUTPUT_INLINE_BYTES = int(os.environ.get("SWARM_OUTPUT_INLINE_BYTES", "2048"))
+
 # Env vars templatable via {{ env.NAME }} must match one of these suffixes/prefixes,
 # so a workflow can't exfiltrate arbitrary machine environment.
 ENV_ALLOWED_SUFFIXES = ("_API_KEY", "_TOKEN", "_SECRET")
@@ -0,0 +1,119 @@
+"""Compressed, content-addressed storage for node outputs in execution history.
+
+Outputs up to ``config.OUTPUT_INLINE_BYTES`` of JSON stay in their
+``execution_nodes`` row. Larger ones are zlib-compressed into
+``instance/outputs/<hash[:2]>/<hash>.z``, keyed by the SHA-256 of the JSON, and
+the row points at an ``output_blobs`` row that counts its references: the same
+Sheets read or HTTP body produced by a thousand runs is stored once.
+
+``encode`` does the CPU work and belongs in a thread; ``add``, ``release`` and
+``collect`` take a Session and run as ``write_queue`` operations. ``collect``
+only deletes rows. Their files are removed by ``remove_files`` once that
+transaction has committed, so a process that references the same content in
+the meantime never loses a file it is relying on.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app import config
+from app.models import OutputBlob
+
+COMPRESSION_LEVEL = 6
+
+
+class StoredOutput(NamedTuple):
+    text: str  # the JSON when inline, else "null"
+    digest: str | None  # blob hash when not inline
+    size: int  # JSON bytes
+    blob: bytes | None  # compressed JSON when not inline
+
+
+class OutputStore:
+    def __init__(self, directory: Path, inline_bytes: int | None = None):
+        self.directory = directory
+        self.inline_bytes = config.OUTPUT_INLINE_BYTES if inline_bytes is None else inline_bytes
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.z"
+
+    def encode(self, data: Any) -> StoredOutput:
+        text = json.dumps(data, ensure_ascii=False, default=str)
+        raw = text.encode()
+        if len(raw) <= self.inline_bytes:
+            return StoredOutput(text, None, len(raw), None)
+        digest = hashlib.sha256(raw).hexdigest()
+        return StoredOutput("null", digest, len(raw), zlib.compress(raw, COMPRESSION_LEVEL))
+
+    def add(self, db: Session, stored: StoredOutput) -> None:
+        """Reference a blob from a row being written in `db`, storing its file if new."""
+        if stored.digest is None:
+            return
+        bumped = db.execute(
+            update(OutputBlob)
+            .where(OutputBlob.hash == stored.digest)
+            .values(refs=OutputBlob.refs + 1)
+        ).rowcount
+        path = self._path(stored.digest)
+        # Without a row, an existing file may be one a collect is about to remove.
+        if not bumped or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(stored.blob)
+            os.replace(tmp, path)
+        if not bumped:
+            db.add(
+                OutputBlob(
+                    hash=stored.digest, size=stored.size, stored_size=len(stored.blob), refs=1
+                )
+            )
+            db.flush()
+
+    def load(self, text: str, digest: str | None) -> str:
+        """The output JSON of a row, given its `output` and `output_hash` columns."""
+        if digest is None:
+            return text
+        return zlib.decompress(self._path(digest).read_bytes()).decode()
+
+    def release(self, db: Session, digests: list[str]) -> None:
+        """Drop one reference per digest (rows referencing them are being deleted)."""
+        for digest, count in Counter(digests).items():
+            db.execute(
+                update(OutputBlob)
+                .where(OutputBlob.hash == digest)
+                .values(refs=OutputBlob.refs - count)
+            )
+
+    def collect(self, db: Session) -> list[str]:
+        """Delete the rows of blobs nobody references any more; returns their hashes.
+
+        Pass the hashes to `remove_files` after this transaction commits.
+        """
+        unused = list(db.scalars(select(OutputBlob.hash).where(OutputBlob.refs <= 0)))
+        if unused:
+            db.execute(delete(OutputBlob).where(OutputBlob.hash.in_(unused), OutputBlob.refs <= 0))
+        return unused
+
+    def remove_files(self, db: Session, digests: list[str]) -> int:
+        """Unlink collected blob files, except those referenced again since; returns how many."""
+        removed = 0
+        for digest in digests:
+            if db.scalar(select(OutputBlob.refs).where(OutputBlob.hash == digest)):
+                continue  # added back by another run after the collect committed
+            with contextlib.suppress(FileNotFoundError):
+                self._path(digest).unlink()
+                removed += 1
+        return removed
+
+
+output_store = OutputStore(config.INSTANCE_DIR / "outputs")
@@ -0,0 +1,215 @@
+"""Content-addressed node result cache.
+
+Node modules opt in with ``NODE_CACHEABLE``: a TTL in seconds (``True`` means
+``config.RESULT_CACHE_TTL``), or a callable taking the rendered config and
+returning the TTL for that call (0 = do not cache it; ``http_request`` only
+caches GET/HEAD this way). Runs opt in too (``use_cache``), so scheduled and
+production runs always see fresh data.
+
+An entry is keyed by a hash of (namespace, node type, rendered config, inputs);
+the namespace is the user id, so users never see each other's results. Entries
+live in a bounded in-memory LRU backed by a bounded on-disk LRU under
+``instance/cache``, which survives restarts and is shared by worker processes.
+Results can hold user data (LLM answers, sheet rows), so disk entries are
+encrypted with the app secret, like stored credentials.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from app import config
+from app.security import decrypt_text, encrypt_text
+
+
+class CachedResult(NamedTuple):
+    data: Any
+    handles: set[str] | None
+
+
+class _Entry(NamedTuple):
+    expires: float
+    text: str  # {"data": ..., "handles": ...} JSON; decoded fresh for every hit
+
+
+def cache_key(namespace: str, node_type: str, node_config: Any, inputs: list) -> str | None:
+    """Hash of everything a node's result depends on, or None if not JSON-able."""
+    try:
+        canonical = json.dumps(
+            [namespace, node_type, node_config, inputs], sort_keys=True, ensure_ascii=False
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        directory: Path | None = None,
+        memory_bytes: int | None = None,
+        disk_bytes: int | None = None,
+    ):
+        self.directory = directory
+        self.memory_bytes = (
+            config.RESULT_CACHE_MEMORY_MB * 2**20 if memory_bytes is None else memory_bytes
+        )
+        self.disk_bytes = config.RESULT_CACHE_DISK_MB * 2**20 if disk_bytes is None else disk_bytes
+        self._memory: OrderedDict[str, _Entry] = OrderedDict()
+        self._memory_size = 0
+        self._disk: OrderedDict[str, int] | None = None  # key -> file size, LRU order
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    # ---------- memory tier ----------
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old.text)
+            if len(entry.text) > self.memory_bytes:
+                return
+            self._memory[key] = entry
+            self._memory_size += len(entry.text)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted.text)
+
+    def _recall(self, key: str) -> _Entry | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.time():
+                del self._memory[key]
+                self._memory_size -= len(entry.text)
+                return None
+            self._memory.move_to_end(key)
+            return entry
+
+    # ---------- disk tier (called in a thread) ----------
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _disk_index(self) -> OrderedDict[str, int]:
+        if self._disk is None:
+            files = []
+            if self.directory.exists():
+                for path in self.directory.glob("*/*.json"):
+                    with contextlib.suppress(OSError):
+                        stat = path.stat()
+                        files.append((stat.st_mtime, path.stem, stat.st_size))
+            files.sort()
+            self._disk = OrderedDict((key, size) for _, key, size in files)
+            self._disk_size = sum(self._disk.values())
+        return self._disk
+
+    def _drop_file(self, key: str) -> None:
+        size = self._disk_index().pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+        with contextlib.suppress(OSError):
+            self._path(key).unlink()
+
+    def _read_disk(self, key: str) -> _Entry | None:
+        path = self._path(key)
+        try:
+            expires_line, token = path.read_text(encoding="utf-8").split("\n", 1)
+            expires = float(expires_line)
+        except (OSError, ValueError):
+            return None
+        try:
+            text = decrypt_text(token) if expires > time.time() else ""
+        except ValueError:
+            expires = 0  # written under another secret key: useless, drop it
+        with self._lock:
+            if expires <= time.time():
+                self._drop_file(key)
+                return None
+            index = self._disk_index()
+            if key in index:
+                index.move_to_end(key)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return _Entry(expires, text)
+
+    def _write_disk(self, key: str, entry: _Entry) -> None:
+        body = f"{entry.expires}\n{encrypt_text(entry.text)}"
+        size = len(body.encode())
+        if size > self.disk_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            index = self._disk_index()
+            self._disk_size += size - index.pop(key, 0)
+            index[key] = size
+            while self._disk_size > self.disk_bytes and index:
+                self._drop_file(next(iter(index)))
+
+    # ---------- API ----------
+
+    async def get(self, key: str, node_type: str) -> CachedResult | None:
+        entry = self._recall(key)
+        if entry is None and self.directory is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self._remember(key, entry)
+        counts = self.misses if entry is None else self.hits
+        counts[node_type] = counts.get(node_type, 0) + 1
+        if entry is None:
+            return None
+        stored = json.loads(entry.text)
+        handles = stored["handles"]
+        return CachedResult(stored["data"], set(handles) if handles is not None else None)
+
+    async def put(self, key: str, data: Any, handles: set[str] | None, ttl: float) -> None:
+        try:
+            text = json.dumps(
+                {"data": data, "handles": sorted(handles) if handles is not None else None},
+                ensure_ascii=False,
+            )
+        except (TypeError, ValueError):
+            return  # not plain JSON: a cached copy would not round-trip
+        entry = _Entry(time.time() + ttl, text)
+        self._remember(key, entry)
+        if self.directory is not None:
+            await asyncio.to_thread(self._write_disk, key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            if self.directory is not None:
+                for key in list(self._disk_index()):
+                    self._drop_file(key)
+
+    def stats(self) -> dict[str, Any]:
+        types = sorted(set(self.hits) | set(self.misses))
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_bytes": self._disk_size,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "node_types": {
+                t: {"hits": self.hits.get(t, 0), "misses": self.misses.get(t, 0)} for t in types
+            },
+        }
+
+
+result_cache = ResultCache(config.INSTANCE_DIR / "cache")
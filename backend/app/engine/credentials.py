@@ -1,15 +1,50 @@
-"""Resolve a node's credential reference to fresh secrets at run time."""
+"""Resolve a node's credential reference to fresh secrets at run time.
 
+Decrypted secrets are cached per process until shortly before the access token
+expires, and concurrent lookups of the same credential are single-flight: ten
+parallel Google nodes facing an expiring token trigger one refresh, not ten.
+
+The API process drops cached secrets when a credential is edited or deleted,
+but worker processes never see that call. So a cache hit re-reads the
+credential's ``updated_at`` (a primary-key lookup, no decryption) once every
+``REVALIDATE_SECONDS``. A credential that was deleted, re-authorized or
+refreshed elsewhere is loaded again instead of being served from a stale
+cache; the hits in between cost no database access at all.
+"""
+
+import asyncio
 import time
+from datetime import datetime
+from functools import partial
 from typing import Any
 
+from sqlalchemy.orm import Session
+
 from app import google
-from app.db import SessionLocal
+from app.db import SessionLocal, write_queue
 from app.engine.types import NodeExecutionError
 from app.models import Credential
 from app.security import decrypt_json, encrypt_json
 
 REFRESH_MARGIN_SECONDS = 60
+# Resolved secrets are cached per process at most this long, even if the token lives longer.
+CACHE_MAX_SECONDS = 300
+# How often a cache hit checks updated_at for edits made by another process.
+REVALIDATE_SECONDS = 5
+
+# (user id, credential id) -> [valid until, the row's updated_at, resolved secrets, checked at]
+_cache: dict[tuple[int, int], list] = {}
+# Resolutions in progress, so concurrent nodes share a single DB read / token refresh.
+_inflight: dict[tuple[int, int], asyncio.Future] = {}
+# Bumped on invalidation so a resolution already in flight does not re-cache stale data.
+_generations: dict[int, int] = {}
+
+
+def invalidate_credential(credential_id: int) -> None:
+    """Forget cached secrets for a credential (call after updating or deleting it)."""
+    _generations[credential_id] = _generations.get(credential_id, 0) + 1
+    for key in [k for k in _cache if k[1] == credential_id]:
+        del _cache[key]
 
 
 async def resolve_credential(user_id: int, credential_id: Any) -> dict:
@@ -18,39 +53,104 @@ async def resolve_credential(user_id: int, credential_id: Any) -> dict:
     except (TypeError, ValueError):
         raise NodeExecutionError("Select a credential in the node settings") from None
 
+    key = (user_id, cid)
+    cached = _cache.get(key)
+    now = time.time()
+    if cached is not None and cached[0] > now:
+        if now - cached[3] < REVALIDATE_SECONDS:
+            return dict(cached[2])
+        if await asyncio.to_thread(_version, user_id, cid) == cached[1]:
+            cached[3] = now
+            return dict(cached[2])
+        invalidate_credential(cid)  # changed or deleted by another process
+
+    pending = _inflight.get(key)
+    if pending is None or pending.done() or pending.get_loop() is not asyncio.get_running_loop():
+        pending = _inflight[key] = asyncio.ensure_future(_load(user_id, cid))
+        pending.add_done_callback(partial(_finished, key))
+    # Shielded: one waiter being cancelled must not abort the refresh for the others.
+    return dict(await asyncio.shield(pending))
+
+
+def _finished(key: tuple[int, int], future: asyncio.Future) -> None:
+    if _inflight.get(key) is future:
+        del _inflight[key]
+
+
+def _version(user_id: int, cid: int) -> datetime | None:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(Credential.updated_at)
+            .filter(Credential.id == cid, Credential.user_id == user_id)
+            .scalar()
+        )
+    finally:
+        db.close()
+
+
+async def _load(user_id: int, cid: int) -> dict:
+    generation = _generations.get(cid, 0)
+    resolved, valid_until, version = await _resolve_uncached(user_id, cid)
+    if _generations.get(cid, 0) == generation:
+        expires = min(valid_until, time.time() + CACHE_MAX_SECONDS)
+        _cache[(user_id, cid)] = [expires, version, resolved, time.time()]
+    return resolved
+
+
+def _read(user_id: int, cid: int) -> tuple[Credential, dict]:
     db = SessionLocal()
     try:
         cred = db.get(Credential, cid)
         if cred is None or cred.user_id != user_id:
             raise NodeExecutionError("Credential not found - select one in the node settings")
-        data = decrypt_json(cred.data)
-
-        if cred.type == "google_oauth2":
-            if not data.get("refresh_token"):
-                raise NodeExecutionError(
-                    f"Credential '{cred.name}' is not connected to Google yet - "
-                    "open Credentials and finish the connection"
-                )
-            if float(data.get("expires_at", 0)) < time.time() + REFRESH_MARGIN_SECONDS:
-                try:
-                    refreshed = await google.refresh_access_token(
-                        data["client_id"], data["client_secret"], data["refresh_token"]
-                    )
-                except google.GoogleOAuthError as e:
-                    raise NodeExecutionError(str(e)) from None
-                data["access_token"] = refreshed["access_token"]
-                data["expires_at"] = google.token_expiry(refreshed.get("expires_in"))
-                if refreshed.get("refresh_token"):
-                    data["refresh_token"] = refreshed["refresh_token"]
-                cred.data = encrypt_json(data)
-                db.commit()
-            return {
-                "type": cred.type,
-                "name": cred.name,
-                "account_email": cred.account_email,
-                "access_token": data["access_token"],
-            }
-
-        return {"type": cred.type, "name": cred.name, **data}
+        return cred, decrypt_json(cred.data)
     finally:
         db.close()
+
+
+def _store_tokens(db: Session, *, cid: int, data: dict) -> datetime:
+    cred = db.get(Credential, cid)
+    if cred is None:
+        raise NodeExecutionError("Credential not found - select one in the node settings")
+    cred.data = encrypt_json(data)
+    db.flush()
+    db.refresh(cred, ["updated_at"])  # as stored, so it compares equal to _version()
+    return cred.updated_at
+
+
+async def _resolve_uncached(user_id: int, cid: int) -> tuple[dict, float, datetime]:
+    # The row is read in a thread and written back through the write queue, so
+    # neither blocks the event loop; only the token refresh itself is awaited here.
+    cred, data = await asyncio.to_thread(_read, user_id, cid)
+    version = cred.updated_at
+
+    if cred.type == "google_oauth2":
+        if not data.get("refresh_token"):
+            raise NodeExecutionError(
+                f"Credential '{cred.name}' is not connected to Google yet - "
+                "open Credentials and finish the connection"
+            )
+        if float(data.get("expires_at", 0)) < time.time() + REFRESH_MARGIN_SECONDS:
+            try:
+                refreshed = await google.refresh_access_token(
+                    data["client_id"], data["client_secret"], data["refresh_token"]
+                )
+            except google.GoogleOAuthError as e:
+                raise NodeExecutionError(str(e)) from None
+            data["access_token"] = refreshed["access_token"]
+            data["expires_at"] = google.token_expiry(refreshed.get("expires_in"))
+            if refreshed.get("refresh_token"):
+                data["refresh_token"] = refreshed["refresh_token"]
+            version = await write_queue.run(partial(_store_tokens, cid=cid, data=data))
+        resolved = {
+            "type": cred.type,
+            "name": cred.name,
+            "account_email": cred.account_email,
+            "access_token": data["access_token"],
+        }
+        expires = float(data["expires_at"]) - REFRESH_MARGIN_SECONDS
+        return resolved, expires, version
+
+    resolved = {"type": cred.type, "name": cred.name, **data}
+    return resolved, time.time() + CACHE_MAX_SECONDS, version
@@ -0,0 +1,136 @@
+"""Cron expressions and fixed intervals for the scheduler.
+
+``Cron`` understands the classic five fields (minute, hour, day of month,
+month, day of week) with ``*``, lists, ranges, ``/`` steps, month and weekday
+names and the ``@hourly``-style macros. Like Vixie cron, when both day fields
+are restricted a day matching either one fires. Times are computed in the
+expression's timezone and returned in UTC.
+
+``Interval`` ticks every N seconds on a grid anchored at the Unix epoch, so its
+ticks are the same across restarts without storing an anchor.
+"""
+
+import math
+from datetime import UTC, date, datetime, timedelta, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+MONTH_NAMES = {
+    name: i + 1
+    for i, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+    )
+}
+DAY_NAMES = {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+# (label, lowest, highest, names)
+FIELDS = (
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day of month", 1, 31, {}),
+    ("month", 1, 12, MONTH_NAMES),
+    ("day of week", 0, 7, DAY_NAMES),  # 7 is Sunday too
+)
+SEARCH_YEARS = 5  # an expression with no match this far ahead (e.g. Feb 30) never fires
+
+
+def timezone(name: str | None) -> tzinfo:
+    if not name or name.upper() == "UTC":
+        return UTC
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'") from None
+
+
+def _parse_field(text: str, label: str, low: int, high: int, names: dict) -> frozenset[int]:
+    def number(token: str) -> int:
+        token = token.lower()
+        if token in names:
+            return names[token]
+        if not token.isdigit():
+            raise ValueError(f"Invalid {label} '{token}'")
+        value = int(token)
+        if not low <= value <= high:
+            raise ValueError(f"{label.capitalize()} {value} is outside {low}-{high}")
+        return value
+
+    values: set[int] = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ValueError(f"Invalid step '{step_text}' in {label}")
+            step = int(step_text)
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            first, _, last = base.partition("-")
+            start, end = number(first), number(last)
+            if start > end:
+                raise ValueError(f"Backwards range '{base}' in {label}")
+        else:
+            start = number(base)
+            end = high if step_text else start
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class Cron:
+    def __init__(self, expression: str, tz: tzinfo = UTC):
+        self.expression = expression.strip()
+        self.tz = tz
+        fields = MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: '{expression}'")
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, FIELDS, strict=True)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day: date) -> bool:
+        in_month = day.day in self.days
+        in_week = day.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after: datetime) -> datetime:
+        """The first firing time strictly after `after` (timezone-aware), in UTC."""
+        local = after.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        t = local + timedelta(minutes=1)
+        while t.year <= local.year + SEARCH_YEARS:
+            if t.month not in self.months:
+                t = datetime(t.year + t.month // 12, t.month % 12 + 1, 1)
+            elif not self._day_matches(t.date()):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                fire = t.replace(tzinfo=self.tz).astimezone(UTC)
+                if fire > after:
+                    return fire
+                t += timedelta(minutes=1)  # a repeated wall-clock hour (DST ending)
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+
+class Interval:
+    def __init__(self, seconds: float):
+        if not seconds or seconds < 1:
+            raise ValueError("Interval must be at least 1 second")
+        self.seconds = float(seconds)
+
+    def next_after(self, after: datetime) -> datetime:
+        steps = math.floor(after.timestamp() / self.seconds) + 1
+        return datetime.fromtimestamp(steps * self.seconds, UTC)
@@ -0,0 +1,212 @@
+"""Bounded run event buffers.
+
+``EventLog`` keeps a run's newest events in memory and spills older ones to a
+JSON-lines file under ``instance/events``, so a node logging in a tight loop
+costs disk, not memory. Any range of events can still be read back by seq.
+
+Closing a log (when its run is pruned) deletes the spill file: readers still
+attached then only see the events held in memory, the older ones have expired.
+
+``Subscription`` is one consumer's view of a log. Its queue is bounded: while a
+slow consumer lags, a node_state event replaces the one still pending for the
+same node, and once the queue is full anyway the subscription drops it and
+catches up by paging from the log instead. Replaying a run to a new subscriber
+pages from the log the same way.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO
+
+from app import config
+
+SPILL_DIR = config.INSTANCE_DIR / "events"
+PAGE = 256  # events per read while replaying or catching up
+INDEX_EVERY = 256  # spilled events per file offset remembered for seeking
+
+
+class EventLog:
+    def __init__(self, name: str, capacity: int | None = None, directory: Path | None = None):
+        self.capacity = max(1, config.EVENT_BUFFER if capacity is None else capacity)
+        # The pid keeps an API process and a worker relaying the same run apart.
+        self.path = (directory or SPILL_DIR) / f"{name}.{os.getpid()}.jsonl"
+        self._memory: deque[dict] = deque()
+        self._first = 0  # seq of _memory[0]
+        self._count = 0
+        self._file: IO[bytes] | None = None
+        self._offsets: list[int] = []  # file offset of seq 0, INDEX_EVERY, 2 * INDEX_EVERY...
+        self._spilled_bytes = 0
+        self._closed = False
+
+    def append(self, event: dict) -> None:
+        """Store `event`, numbering it with the next seq."""
+        event["seq"] = self._count
+        if len(self._memory) >= self.capacity:
+            self._spill(self._memory.popleft())
+            self._first += 1
+        self._memory.append(event)
+        self._count += 1
+
+    def _spill(self, event: dict) -> None:
+        if self._closed:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "wb")  # noqa: SIM115  (open for the run's lifetime)
+        if event["seq"] % INDEX_EVERY == 0:
+            self._offsets.append(self._spilled_bytes)
+        line = (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode()
+        self._file.write(line)
+        self._spilled_bytes += len(line)
+
+    def read(self, since: int = -1, limit: int | None = None) -> list[dict]:
+        """Events with seq > `since`, oldest first, at most `limit` of them."""
+        start = max(since + 1, 0)
+        if self._closed:
+            start = max(start, self._first)  # the spilled events went with the file
+        end = self._count if limit is None else min(self._count, start + limit)
+        events = []
+        if start < min(end, self._first):
+            events.extend(self._read_spilled(start, min(end, self._first)))
+        low = max(start, self._first)
+        if low < end:
+            events.extend(itertools.islice(self._memory, low - self._first, end - self._first))
+        return events
+
+    def _read_spilled(self, start: int, end: int) -> list[dict]:
+        self._file.flush()
+        block = start // INDEX_EVERY
+        seq = block * INDEX_EVERY
+        events = []
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[block])
+            for line in f:
+                if seq >= end:
+                    break
+                if seq >= start:
+                    events.append(json.loads(line))
+                seq += 1
+        return events
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        since = -1
+        while since + 1 < self._count:
+            page = self.read(since, PAGE)
+            yield from page
+            since = page[-1]["seq"]
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("event index out of range")
+        if self._closed and index < self._first:
+            raise IndexError(f"event {index} has expired")
+        return self.read(index - 1, 1)[0]
+
+    def close(self) -> None:
+        """Delete the spill file; the log keeps only what is in memory."""
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            with contextlib.suppress(OSError):
+                self.path.unlink()
+
+
+class Subscription:
+    def __init__(self, log: EventLog, since: int = -1, limit: int | None = None):
+        self.log = log
+        self.limit = max(1, config.SUBSCRIBER_QUEUE if limit is None else limit)
+        self.cursor = since  # seq of the last event handed out
+        self.coalesced = 0
+        self._pending: OrderedDict[int, dict] = OrderedDict()
+        self._node_state: dict[str, int] = {}  # node id -> seq of its pending node_state
+        self._catching_up = True  # start by paging whatever the log already holds
+        self._ready = asyncio.Event()
+        self._ready.set()
+
+    def push(self, event: dict) -> None:
+        """Called by Run.emit for every new event."""
+        self._ready.set()
+        if self._catching_up:
+            return  # the log has it; get() reads it from there
+        node_id = event.get("node_id") if event.get("type") == "node_state" else None
+        if node_id is not None:
+            superseded = self._node_state.pop(node_id, None)
+            if superseded is not None:
+                del self._pending[superseded]
+                self.coalesced += 1
+        if len(self._pending) >= self.limit:
+            self._pending.clear()
+            self._node_state.clear()
+            self._catching_up = True
+            return
+        self._pending[event["seq"]] = event
+        if node_id is not None:
+            self._node_state[node_id] = event["seq"]
+
+    def _take_pending(self, limit: int) -> list[dict]:
+        events = []
+        while self._pending and len(events) < limit:
+            _, event = self._pending.popitem(last=False)
+            if event.get("type") == "node_state":
+                self._node_state.pop(event.get("node_id"), None)
+            events.append(event)
+        return events
+
+    def take(self, limit: int = PAGE) -> list[dict]:
+        """Up to `limit` events that are ready now, oldest first (may be empty)."""
+        if self._catching_up:
+            events = self.log.read(self.cursor, limit)
+            if not events or events[-1]["seq"] == len(self.log) - 1:
+                self._catching_up = False  # caught up: live events queue again
+        else:
+            events = self._take_pending(limit)
+        if events:
+            self.cursor = events[-1]["seq"]
+        return events
+
+    async def get_batch(self, limit: int = PAGE, window: float = 0.0) -> list[dict]:
+        """Wait for at least one event, then return up to `limit` of them.
+
+        With a `window` (seconds), events arriving that long after the first one
+        join the batch, unless the run has already finished.
+        """
+        while True:
+            events = self.take(limit)
+            if events:
+                break
+            self._ready.clear()
+            await self._ready.wait()
+        if window > 0 and len(events) < limit and events[-1].get("type") != "run_finished":
+            await asyncio.sleep(window)
+            events += self.take(limit - len(events))
+        return events
+
+    async def get(self) -> dict:
+        return (await self.get_batch(1))[0]
+
+
+def purge_stale_spills(directory: Path = SPILL_DIR) -> None:
+    """Remove spill files left behind by processes that no longer exist."""
+    if not directory.exists():
+        return
+    for path in directory.glob("*.jsonl"):
+        try:
+            pid = int(path.stem.rsplit(".", 1)[1])
+            os.kill(pid, 0)
+        except (IndexError, ValueError, ProcessLookupError):
+            with contextlib.suppress(OSError):
+                path.unlink()
+        except PermissionError:
+            pass  # someone else's live process
@@ -4,19 +4,35 @@ The old engine ran every node in topological order regardless of conditions.
 This one routes data along edges: each edge carries the source handle it left
 from (e.g. an If node's "true"/"false"), edges on untaken handles are marked
 dead, and a node whose incoming edges are all dead is skipped — recursively.
-Independent branches execute concurrently.
+Independent branches execute concurrently, within the slots handed out by the
+concurrency governor (global, per-run and per-node-type caps).
+
+Each successful node can be checkpointed (output plus fired handles). Given
+those checkpoints back, the executor replays them in place of running the
+nodes: edge states are rebuilt exactly, and execution continues from the
+frontier of unfinished nodes.
+
+A node with a ``for_each`` setting runs once per element of a list (its input
+by default) instead of once per run. Items go through a bounded pool, each in
+its own concurrency slot, and the node's output is the list of their results
+in item order; node_state events report how many items are done.
 """
 
 import asyncio
 import json
 import time
 from collections import deque
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable, Mapping
+from contextlib import AsyncExitStack
 from typing import Any
 
+from app import config
+from app.engine.cache import ResultCache, cache_key
 from app.engine.fields import missing_required
+from app.engine.limits import ConcurrencyGovernor, get_governor, make_semaphore
+from app.engine.plan import PlanEdge, get_plan
 from app.engine.registry import NodeRegistry
-from app.engine.templating import render_config
+from app.engine.templating import Scope
 from app.engine.types import (
     NodeContext,
     NodeExecutionError,
@@ -26,25 +42,54 @@ from app.engine.types import (
 )
 
 EmitFn = Callable[[dict], None]
+# (node_id, output, fired handles or None for all, elapsed_ms)
+CheckpointFn = Callable[[str, Any, set[str] | None, int], Awaitable[None]]
 
 OUTPUT_PREVIEW_LIMIT = 40_000
+# Newest log entries kept in a run result; every entry is also a "log" event.
+RESULT_LOG_LIMIT = 1000
+# Minimum seconds between item progress events of a for_each node.
+ITEM_PROGRESS_INTERVAL = 0.25
 
+_encoder = json.JSONEncoder(ensure_ascii=False, default=str)
 
-def preview(data: Any) -> Any:
-    """Shrink huge node outputs for events/persistence (full data still flows between nodes)."""
+
+def bounded_json(data: Any, limit: int) -> tuple[str, bool]:
+    """JSON-encode data, giving up as soon as the text passes `limit` chars.
+
+    Returns (text, truncated); a truncated text is cut at `limit` and is not
+    valid JSON. Multi-MB outputs cost only as much as their first `limit` chars.
+    """
     try:
-        text = json.dumps(data, ensure_ascii=False, default=str)
+        size = 0
+        chunks: list[str] = []
+        for chunk in _encoder.iterencode(data):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return "".join(chunks)[:limit], True
+        return "".join(chunks), False
     except (TypeError, ValueError):
         text = str(data)
-    if len(text) <= OUTPUT_PREVIEW_LIMIT:
+        return text[:limit], len(text) > limit
+
+
+def preview(data: Any) -> Any:
+    """Shrink huge node outputs for events/persistence (full data still flows between nodes).
+
+    The executor takes one preview per node when it finishes; the node_state
+    event, the run result and persistence all reuse it.
+    """
+    text, truncated = bounded_json(data, OUTPUT_PREVIEW_LIMIT)
+    if not truncated:
         return data
-    return {"__truncated__": True, "preview": text[:OUTPUT_PREVIEW_LIMIT]}
+    return {"__truncated__": True, "preview": text}
 
 
 class _EdgeState:
     __slots__ = ("data", "edge", "status")
 
-    def __init__(self, edge: dict):
+    def __init__(self, edge: PlanEdge):
         self.edge = edge
         self.status = "pending"  # pending | active | dead
         self.data: Any = None
@@ -87,123 +132,56 @@ def slice_to_node(definition: dict, target: str, include_target: bool = True) ->
     }
 
 
-def _detect_cycle(nodes: dict, adj: dict[str, list[str]]) -> None:
-    WHITE, GRAY, BLACK = 0, 1, 2
-    color = {nid: WHITE for nid in nodes}
-    for start in nodes:
-        if color[start] != WHITE:
-            continue
-        stack: list[tuple[str, int]] = [(start, 0)]
-        color[start] = GRAY
-        while stack:
-            nid, idx = stack[-1]
-            neighbors = adj.get(nid, [])
-            if idx < len(neighbors):
-                stack[-1] = (nid, idx + 1)
-                nxt = neighbors[idx]
-                if color[nxt] == GRAY:
-                    raise WorkflowError(f"Workflow contains a cycle involving node '{nxt}'")
-                if color[nxt] == WHITE:
-                    color[nxt] = GRAY
-                    stack.append((nxt, 0))
-            else:
-                color[nid] = BLACK
-                stack.pop()
-
-
 async def execute_workflow(
     definition: dict,
     registry: NodeRegistry,
     run_input: Any = None,
     emit: EmitFn | None = None,
     credential_resolver: Callable | None = None,
+    governor: ConcurrencyGovernor | None = None,
+    max_parallel: int | None = None,
+    checkpoint: CheckpointFn | None = None,
+    restored: Mapping[str, tuple[Any, set[str] | None]] | None = None,
+    cache: ResultCache | None = None,
+    cache_namespace: str = "",
 ) -> dict:
+    """Execute a workflow.
+
+    `restored` maps node ids to checkpointed (output, handles). With `cache`,
+    nodes that declare NODE_CACHEABLE reuse results for identical config+inputs.
+    """
     emit = emit or (lambda event: None)
     started = time.time()
+    governor = governor or get_governor()
+    run_slots = make_semaphore(config.MAX_NODES_PER_RUN if max_parallel is None else max_parallel)
 
-    nodes: dict[str, dict] = {}
-    for n in definition.get("nodes", []):
-        if not n.get("id") or not n.get("type"):
-            raise WorkflowError("Every node needs an 'id' and a 'type'")
-        nodes[n["id"]] = n
-    if not nodes:
-        raise WorkflowError("Workflow has no nodes")
-
-    unknown = sorted({n["type"] for n in nodes.values() if registry.get(n["type"]) is None})
-    if unknown:
-        raise WorkflowError(f"Unknown node types: {', '.join(unknown)}")
-
-    edges = [
-        e
-        for e in definition.get("edges", [])
-        if e.get("source") in nodes and e.get("target") in nodes
-    ]
-
-    triggers = [nid for nid, n in nodes.items() if not registry.get(n["type"]).inputs]
-    if not triggers:
-        raise WorkflowError("Workflow needs a trigger node (e.g. Manual Trigger)")
-    if len(triggers) > 1:
-        raise WorkflowError(
-            f"Only one trigger node is allowed per workflow (found {len(triggers)}: "
-            f"{', '.join(sorted(triggers))})"
-        )
-
-    # Validate handles against the node specs and drop duplicate edges.
-    seen_edges: set[tuple] = set()
-    cleaned_edges = []
-    for e in edges:
-        src_spec = registry.get(nodes[e["source"]]["type"])
-        tgt_spec = registry.get(nodes[e["target"]]["type"])
-        if not tgt_spec.inputs:
-            raise WorkflowError(f"'{e['target']}' is a trigger and cannot receive connections")
-        sh = e.get("sourceHandle") or (src_spec.outputs[0] if src_spec.outputs else "out")
-        th = e.get("targetHandle") or tgt_spec.inputs[0]
-        if src_spec.outputs and sh not in src_spec.outputs:
-            raise WorkflowError(
-                f"Edge from '{e['source']}' uses unknown output handle '{sh}' "
-                f"(available: {', '.join(src_spec.outputs)})"
-            )
-        if th not in tgt_spec.inputs:
-            raise WorkflowError(
-                f"Edge into '{e['target']}' uses unknown input handle '{th}' "
-                f"(available: {', '.join(tgt_spec.inputs)})"
-            )
-        key = (e["source"], sh, e["target"], th)
-        if key in seen_edges:
-            continue
-        seen_edges.add(key)
-        cleaned_edges.append(e)
-    edges = cleaned_edges
-
-    adj: dict[str, list[str]] = {nid: [] for nid in nodes}
-    for e in edges:
-        adj[e["source"]].append(e["target"])
-    _detect_cycle(nodes, adj)
-
-    # Only nodes reachable from a trigger execute; the rest are reported skipped.
-    reachable: set[str] = set()
-    queue = deque(triggers)
-    while queue:
-        nid = queue.popleft()
-        if nid in reachable:
-            continue
-        reachable.add(nid)
-        queue.extend(adj[nid])
+    plan = get_plan(definition, registry)
+    nodes = plan.nodes
+    reachable = plan.reachable
 
     statuses: dict[str, str] = {nid: "pending" for nid in nodes}
+    # Full outputs are only kept while some unfinished node's templates reference
+    # them; events and the result use the preview taken when the node finished.
     outputs: dict[str, Any] = {}
+    previews: dict[str, Any] = {}
+    consumers: dict[str, int] = {}
+    for refs in plan.refs.values():
+        for ref in refs:
+            consumers[ref] = consumers.get(ref, 0) + 1
     node_errors: dict[str, str] = {}
-    logs: list[dict] = []
-
-    in_edges: dict[str, list[_EdgeState]] = {nid: [] for nid in reachable}
-    out_edges: dict[str, list[_EdgeState]] = {nid: [] for nid in reachable}
-    for e in edges:
-        if e["source"] in reachable and e["target"] in reachable:
-            es = _EdgeState(e)
-            in_edges[e["target"]].append(es)
-            out_edges[e["source"]].append(es)
-
-    emit({"type": "run_state", "status": "running", "total_nodes": len(reachable)})
+    logs: deque[dict] = deque(maxlen=RESULT_LOG_LIMIT)
+    cache_status: dict[str, str] = {}  # node id -> "hit" | "miss"
+    cache_counts = {"hit": 0, "miss": 0}
+
+    edge_states = [_EdgeState(edge) for edge in plan.edges]
+    in_edges = {nid: [edge_states[i] for i in idx] for nid, idx in plan.in_edges.items()}
+    out_edges = {nid: [edge_states[i] for i in idx] for nid, idx in plan.out_edges.items()}
+
+    restored = restored or {}
+    state = {"type": "run_state", "status": "running", "total_nodes": len(reachable)}
+    if restored:
+        state["resumed_nodes"] = len(restored)
+    emit(state)
     for nid in nodes:
         if nid not in reachable:
             statuses[nid] = "skipped"
@@ -220,9 +198,12 @@ async def execute_workflow(
     running: dict[asyncio.Task, str] = {}
     start_times: dict[str, float] = {}
 
-    def default_handle(source_id: str) -> str:
-        spec = registry.get(nodes[source_id]["type"])
-        return spec.outputs[0] if spec.outputs else "out"
+    def settle(nid: str) -> None:
+        """nid reached a final state: release upstream outputs nobody else needs."""
+        for ref in plan.refs[nid]:
+            consumers[ref] -= 1
+            if consumers[ref] == 0:
+                outputs.pop(ref, None)
 
     def check_ready(tid: str) -> None:
         if statuses[tid] != "pending":
@@ -243,20 +224,20 @@ async def execute_workflow(
                     "reason": "No active branch reached this node",
                 }
             )
+            settle(tid)
             resolve_out(tid, set(), None)
 
     def resolve_out(nid: str, active_handles: set[str] | None, data: Any) -> None:
         for es in out_edges[nid]:
             if es.status != "pending":
                 continue
-            handle = es.edge.get("sourceHandle") or default_handle(nid)
-            if active_handles is None or handle in active_handles:
+            if active_handles is None or es.edge.source_handle in active_handles:
                 es.status = "active"
                 es.data = data
             else:
                 es.status = "dead"
         for es in out_edges[nid]:
-            check_ready(es.edge["target"])
+            check_ready(es.edge.target)
 
     def fail(nid: str, message: str) -> None:
         statuses[nid] = "error"
@@ -271,6 +252,7 @@ async def execute_workflow(
                 "elapsed_ms": elapsed_ms,
             }
         )
+        settle(nid)
         resolve_out(nid, set(), None)
 
     def make_log(nid: str):
@@ -282,48 +264,173 @@ async def execute_workflow(
         return log
 
     async def run_node(nid: str):
-        node = nodes[nid]
-        spec = registry.get(node["type"])
+        spec = plan.specs[nid]
+        if nid in plan.fan_out:
+            # No slot for the node itself: every item takes its own.
+            statuses[nid] = "running"
+            start_times[nid] = time.time()
+            data, handles = await execute_items(nid)
+        else:
+            async with governor.node_slot(spec.type, spec.concurrency, run_slots) as wait_ms:
+                statuses[nid] = "running"
+                start_times[nid] = time.time()
+                event = {"type": "node_state", "node_id": nid, "status": "running"}
+                if wait_ms >= 1:
+                    event["queued_ms"] = int(wait_ms)
+                emit(event)
+                data, handles = await execute_node(nid)
+        if checkpoint is not None:
+            elapsed_ms = int((time.time() - start_times[nid]) * 1000)
+            try:
+                await checkpoint(nid, data, handles, elapsed_ms)
+            except Exception as e:
+                # A lost checkpoint only costs a re-run on resume; never fail the node.
+                make_log(nid)("warn", f"Checkpoint failed: {type(e).__name__}: {e}")
+        return data, handles
+
+    def node_inputs(nid: str) -> list[Any]:
         active_inputs = [es.data for es in in_edges[nid] if es.status == "active"]
         if not in_edges[nid] and run_input is not None:
             active_inputs = [run_input]
 
-        missing = missing_required(spec, node.get("config", {}))
+        missing = missing_required(plan.specs[nid], nodes[nid].get("config", {}))
         if missing:
             plural = "s" if len(missing) > 1 else ""
             raise NodeExecutionError(f"Missing required field{plural}: {', '.join(missing)}")
+        return active_inputs
+
+    async def execute_node(nid: str):
+        active_inputs = node_inputs(nid)
+        scope = Scope(outputs, input=active_inputs[0] if active_inputs else None)
+        return await invoke(nid, plan.templates[nid].render(scope), active_inputs)
+
+    async def execute_items(nid: str):
+        spec = plan.specs[nid]
+        fan_out = plan.fan_out[nid]
+        active_inputs = node_inputs(nid)
+        scope = Scope(outputs, input=active_inputs[0] if active_inputs else None)
+        items = fan_out.items.render(scope)
+        if not isinstance(items, list):
+            raise NodeExecutionError(f"For each item: expected a list, got {type(items).__name__}")
+
+        total = len(items)
+        pool = make_semaphore(fan_out.concurrency)
+        progress = {"done": 0, "emitted": 0.0}
+
+        def report() -> None:
+            progress["emitted"] = time.time()
+            emit(
+                {
+                    "type": "node_state",
+                    "node_id": nid,
+                    "status": "running",
+                    "items": {"done": progress["done"], "total": total},
+                }
+            )
 
-        scope: dict[str, Any] = dict(outputs)
-        scope["input"] = active_inputs[0] if active_inputs else None
-
-        config = render_config(node.get("config", {}), scope)
-        ctx = NodeContext(node_id=nid, config=config, inputs=active_inputs, log=make_log(nid))
+        async def run_item(index: int, item: Any):
+            async with AsyncExitStack() as stack:
+                if pool is not None:
+                    await stack.enter_async_context(pool)
+                await stack.enter_async_context(
+                    governor.node_slot(spec.type, spec.concurrency, run_slots)
+                )
+                try:
+                    node_config = plan.templates[nid].render(Scope(outputs, input=item))
+                    data, handles = await invoke(nid, node_config, [item])
+                except TimeoutError:
+                    raise NodeExecutionError(
+                        f"Item {index}: timed out after {spec.timeout:.0f}s"
+                    ) from None
+                except (TemplateError, NodeExecutionError) as e:
+                    raise NodeExecutionError(f"Item {index}: {e}") from e
+                except Exception as e:
+                    raise NodeExecutionError(f"Item {index}: {type(e).__name__}: {e}") from e
+            progress["done"] += 1
+            if (
+                progress["done"] == total
+                or time.time() - progress["emitted"] >= ITEM_PROGRESS_INTERVAL
+            ):
+                report()
+            return data, handles
+
+        report()
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(items)]
+        try:
+            # Fail fast: the first failing item fails the node and cancels the rest.
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Fire the union of the items' handles; an empty list goes out on all of them.
+        fired: set[str] | None = set() if results else None
+        for _, handles in results:
+            fired = None if fired is None or handles is None else fired | handles
+        return [data for data, _ in results], fired
+
+    async def invoke(nid: str, node_config: dict, active_inputs: list[Any]):
+        spec = plan.specs[nid]
+        key = None
+        ttl = spec.cache_ttl(node_config) if cache is not None and spec.cache_ttl else 0
+        if ttl > 0:
+            key = cache_key(cache_namespace, spec.type, node_config, active_inputs)
+        if key is not None:
+            cached = await cache.get(key, spec.type)
+            cache_status[nid] = "miss" if cached is None else "hit"
+            cache_counts[cache_status[nid]] += 1
+            if cached is not None:
+                return cached.data, cached.handles
+
+        ctx = NodeContext(node_id=nid, config=node_config, inputs=active_inputs, log=make_log(nid))
         if credential_resolver is not None:
             ctx.get_credential = credential_resolver
         result = await asyncio.wait_for(spec.run(ctx), timeout=spec.timeout)
 
+        data, handles = result, None
         if isinstance(result, NodeOutput):
-            return result.data, ({result.handle} if result.handle is not None else None)
-        return result, None
+            data = result.data
+            handles = {result.handle} if result.handle is not None else None
+        if key is not None:
+            await cache.put(key, data, handles, ttl)
+        return data, handles
+
+    def succeed(nid: str, data: Any, handles: set[str] | None, **extra: Any) -> None:
+        if consumers.get(nid):
+            outputs[nid] = data
+        previews[nid] = preview(data)
+        statuses[nid] = "success"
+        emit(
+            {
+                "type": "node_state",
+                "node_id": nid,
+                "status": "success",
+                "output": previews[nid],
+                **extra,
+            }
+        )
+        settle(nid)
+        resolve_out(nid, handles, data)
 
-    for t in triggers:
-        statuses[t] = "queued"
-        ready.append(t)
+    statuses[plan.trigger] = "queued"
+    ready.append(plan.trigger)
 
     try:
         while ready or running:
             while ready:
                 nid = ready.popleft()
-                statuses[nid] = "running"
-                start_times[nid] = time.time()
-                emit({"type": "node_state", "node_id": nid, "status": "running"})
+                if nid in restored:
+                    data, handles = restored[nid]
+                    succeed(nid, data, handles, resumed=True)
+                    continue
                 task = asyncio.create_task(run_node(nid))
                 running[task] = nid
 
             done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
             for task in done:
                 nid = running.pop(task)
-                spec = registry.get(nodes[nid]["type"])
+                spec = plan.specs[nid]
                 try:
                     data, handles = task.result()
                 except TimeoutError:
@@ -338,29 +445,28 @@ async def execute_workflow(
                     fail(nid, f"{type(e).__name__}: {e}")
                     continue
 
-                outputs[nid] = data
-                statuses[nid] = "success"
-                emit(
-                    {
-                        "type": "node_state",
-                        "node_id": nid,
-                        "status": "success",
-                        "output": preview(data),
-                        "elapsed_ms": int((time.time() - start_times[nid]) * 1000),
+                extra: dict[str, Any] = {"elapsed_ms": int((time.time() - start_times[nid]) * 1000)}
+                if nid in cache_status:
+                    extra["cache"] = {
+                        "status": cache_status[nid],
+                        "hits": cache_counts["hit"],
+                        "misses": cache_counts["miss"],
                     }
-                )
-                resolve_out(nid, handles, data)
+                succeed(nid, data, handles, **extra)
     except asyncio.CancelledError:
         for task in running:
             task.cancel()
         raise
 
     status = "error" if node_errors else "success"
-    return {
+    result = {
         "status": status,
         "node_statuses": statuses,
-        "outputs": {nid: preview(data) for nid, data in outputs.items()},
+        "outputs": previews,
         "errors": node_errors,
-        "logs": logs,
+        "logs": list(logs),
         "elapsed_ms": int((time.time() - started) * 1000),
     }
+    if cache_status:
+        result["cache"] = {"hits": cache_counts["hit"], "misses": cache_counts["miss"]}
+    return result
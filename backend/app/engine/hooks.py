@@ -0,0 +1,262 @@
+"""Inbound webhooks for saved workflows that start with a webhook_trigger.
+
+``POST /hooks/<token>`` only looks the token up here and puts the payload on a
+bounded ingestion queue, so it answers 202 without touching the database. When
+the queue is full it answers 429 instead of letting requests pile up.
+
+One dispatcher task (``Hooks.run``, started by ``main.lifespan``) drains the queue
+into ``RunManager.start``. At most ``WEBHOOK_MAX_RUNS`` hook runs are in flight.
+Past that the dispatcher waits, the queue fills and callers get 429, so a burst
+is absorbed by the queue and then pushed back to the sender. A trigger with
+``batch_size`` above 1 gathers payloads for up to ``batch_window_ms`` and starts
+one run with ``{"items": [...], "count": n}``.
+
+Each process keeps its own queue, so any number of API processes can take hooks.
+The queue is in memory, so 202 means accepted, not stored: on shutdown
+``Hooks.shutdown`` starts runs for what is queued for up to
+``WEBHOOK_DRAIN_SECONDS`` and logs how many payloads it had to drop after that.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app import config
+from app.db import SessionLocal
+from app.engine.plan import get_plan, plan_cache
+from app.engine.registry import get_registry
+from app.engine.runs import Run, manager
+from app.engine.types import WorkflowError
+from app.models import Workflow
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_TYPE = "webhook_trigger"
+MIN_TOKEN_LENGTH = 16
+
+
+class Hook:
+    def __init__(self, workflow_id: int, user_id: int, name: str, definition: dict, cfg: dict):
+        self.workflow_id = workflow_id
+        self.user_id = user_id
+        self.name = name
+        self.definition = definition
+        self.token = str(cfg.get("token") or "").strip()
+        self.batch_size = max(int(cfg.get("batch_size") or 1), 1)
+        self.window = max(float(cfg.get("batch_window_ms") or 0), 0.0) / 1000
+        self.pending: list[Any] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+
+def trigger_config(definition: dict) -> dict | None:
+    for node in definition.get("nodes", []):
+        if node.get("type") == TRIGGER_TYPE:
+            return node.get("config") or {}
+    return None
+
+
+StartFn = Callable[..., Awaitable[Run]]
+
+
+class Hooks:
+    def __init__(
+        self,
+        start: StartFn | None = None,
+        queue_size: int | None = None,
+        max_runs: int | None = None,
+    ):
+        self._start = start or manager.start
+        self.queue_size = config.WEBHOOK_QUEUE_SIZE if queue_size is None else queue_size
+        self.max_runs = config.WEBHOOK_MAX_RUNS if max_runs is None else max_runs
+        self._hooks: dict[str, Hook] = {}
+        self._tokens: dict[int, str] = {}  # workflow id -> its token
+        self._lock = threading.Lock()  # sync() is called from request threads
+        self._queue: asyncio.Queue[tuple[Hook, Any]] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._closing = False
+        self._unstarted = 0  # accepted payloads whose run has not been started yet
+        self._started: asyncio.Event | None = None  # shutdown() waits on it
+        self.accepted = 0
+        self.rejected = 0
+        self.runs = 0
+
+    def sync(self, workflow_id: int, user_id: int, name: str, definition: dict) -> None:
+        """(Re)register a saved workflow's hook; drops it when it has no enabled webhook_trigger."""
+        self.remove(workflow_id)
+        cfg = trigger_config(definition)
+        if cfg is None or cfg.get("enabled", True) is False:
+            return
+        try:
+            hook = Hook(workflow_id, user_id, name, definition, cfg)
+            if len(hook.token) < MIN_TOKEN_LENGTH:
+                raise ValueError(f"the token must be at least {MIN_TOKEN_LENGTH} characters")
+            get_plan(definition, get_registry())  # compile once now, not on the first request
+        except (TypeError, ValueError, WorkflowError) as e:
+            logger.warning("Webhook of workflow %s is not active: %s", workflow_id, e)
+            return
+        with self._lock:
+            owner = self._hooks.get(hook.token)
+            if owner is not None:
+                logger.warning(
+                    "Webhook of workflow %s is not active: workflow %s already uses its token",
+                    workflow_id,
+                    owner.workflow_id,
+                )
+                return
+            self._hooks[hook.token] = hook
+            self._tokens[workflow_id] = hook.token
+        plan_cache.pin(definition)  # each request then skips hashing the definition
+
+    def remove(self, workflow_id: int) -> None:
+        with self._lock:
+            token = self._tokens.pop(workflow_id, None)
+            hook = self._hooks.pop(token, None) if token is not None else None
+        if hook is not None:
+            plan_cache.unpin(hook.definition)
+
+    def get(self, token: str) -> Hook | None:
+        return self._hooks.get(token)
+
+    def offer(self, hook: Hook, payload: Any) -> bool:
+        """Queue a payload for `hook`; False when the ingestion queue is full."""
+        if self._queue is None or self._closing:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((hook, payload))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        self._unstarted += 1
+        return True
+
+    def load(self) -> None:
+        """Register every saved workflow with a webhook_trigger (at startup)."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Workflow).filter(Workflow.data.contains(TRIGGER_TYPE)).all()
+        finally:
+            db.close()
+        for w in rows:
+            try:
+                definition = json.loads(w.data)
+            except json.JSONDecodeError:
+                continue
+            self.sync(w.id, w.user_id, w.name, definition)
+
+    async def run(self) -> None:
+        """The dispatcher (started by main.lifespan)."""
+        await asyncio.to_thread(self.load)
+        logger.info("Accepting webhooks for %d workflow(s)", len(self._hooks))
+        await self.serve()
+
+    async def serve(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._closing = False
+        self._unstarted = 0
+        self._slots = asyncio.Semaphore(self.max_runs) if self.max_runs > 0 else None
+        try:
+            while True:
+                hook, payload = await self._queue.get()
+                try:
+                    if hook.batch_size <= 1:
+                        await self._launch(hook, payload)
+                        continue
+                    hook.pending.append(payload)
+                    if len(hook.pending) >= hook.batch_size:
+                        await self._flush(hook)
+                    elif len(hook.pending) == 1:
+                        hook.timer = asyncio.get_running_loop().call_later(
+                            hook.window, self._window_closed, hook
+                        )
+                finally:
+                    self._queue.task_done()
+        finally:
+            self._queue = None
+
+    async def shutdown(self, timeout: float | None = None) -> None:
+        """Stop accepting payloads and start runs for the ones already accepted.
+
+        Called before the dispatcher is cancelled. Gives up after `timeout`
+        seconds (``WEBHOOK_DRAIN_SECONDS``) and logs how many payloads were dropped.
+        """
+        self._closing = True
+        queue = self._queue
+        if queue is None:
+            return
+        timeout = config.WEBHOOK_DRAIN_SECONDS if timeout is None else timeout
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(timeout):
+                await queue.join()
+                for hook in list(self._hooks.values()):
+                    await self._flush(hook)  # batches still waiting for their window
+                while self._unstarted:
+                    self._started = asyncio.Event()
+                    await self._started.wait()
+        if self._unstarted:
+            logger.warning("Dropped %d accepted webhook payload(s) at shutdown", self._unstarted)
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _window_closed(self, hook: Hook) -> None:
+        hook.timer = None
+        self._spawn(self._flush(hook))
+
+    async def _flush(self, hook: Hook) -> None:
+        if hook.timer is not None:
+            hook.timer.cancel()
+            hook.timer = None
+        items, hook.pending = hook.pending, []
+        if items:
+            await self._launch(hook, {"items": items, "count": len(items)}, len(items))
+
+    async def _launch(self, hook: Hook, run_input: Any, payloads: int = 1) -> None:
+        # Waiting here (not in the request) is what turns a backlog into 429s.
+        if self._slots is not None:
+            await self._slots.acquire()
+        self._spawn(self._execute(hook, run_input, payloads))
+
+    async def _execute(self, hook: Hook, run_input: Any, payloads: int) -> None:
+        try:
+            try:
+                run = await self._start(
+                    definition=hook.definition,
+                    registry=get_registry(),
+                    user_id=hook.user_id,
+                    workflow_id=hook.workflow_id,
+                    workflow_name=hook.name,
+                    run_input=run_input,
+                )
+            finally:
+                self._unstarted -= payloads
+                if self._started is not None:
+                    self._started.set()
+            self.runs += 1
+            if self._slots is not None:
+                await run.wait()
+        except Exception:
+            logger.exception("Could not start webhook run of workflow %s", hook.workflow_id)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hooks": len(self._hooks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "runs": self.runs,
+        }
+
+
+hooks = Hooks()
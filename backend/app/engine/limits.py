@@ -0,0 +1,128 @@
+"""Concurrency governor: caps how much work runs at once.
+
+Three kinds of slots, each optional (a limit of 0 means unlimited):
+
+- global: node executions across every run in the process
+  (``config.MAX_CONCURRENT_NODES``)
+- per run: node executions inside one run (``config.MAX_NODES_PER_RUN``)
+- per node type: declared by a node module as ``NODE_CONCURRENCY``
+  (e.g. ``llm`` allows 4 at a time), shared by all runs
+
+plus a cap on concurrently executing runs (``config.MAX_CONCURRENT_RUNS``).
+Slots are taken in a fixed order (run, type, global) so waiters never deadlock.
+Time spent waiting for a slot is recorded and reported by ``stats()``.
+"""
+
+import asyncio
+import time
+import weakref
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
+
+from app import config
+
+
+def make_semaphore(limit: int) -> asyncio.Semaphore | None:
+    return asyncio.Semaphore(limit) if limit > 0 else None
+
+
+class _WaitStats:
+    __slots__ = ("count", "max_ms", "total_ms", "waited")
+
+    def __init__(self):
+        self.count = 0
+        self.waited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, wait_ms: float) -> None:
+        self.count += 1
+        if wait_ms >= 1:
+            self.waited += 1
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+
+    def to_api(self) -> dict[str, Any]:
+        return {
+            "acquired": self.count,
+            "waited": self.waited,
+            "total_wait_ms": int(self.total_ms),
+            "max_wait_ms": int(self.max_ms),
+            "avg_wait_ms": round(self.total_ms / self.count, 1) if self.count else 0,
+        }
+
+
+class ConcurrencyGovernor:
+    def __init__(self, max_nodes: int | None = None, max_runs: int | None = None):
+        self._nodes = make_semaphore(
+            config.MAX_CONCURRENT_NODES if max_nodes is None else max_nodes
+        )
+        self._runs = make_semaphore(config.MAX_CONCURRENT_RUNS if max_runs is None else max_runs)
+        self._types: dict[tuple[str, int], asyncio.Semaphore] = {}
+        self.node_waits = _WaitStats()
+        self.run_waits = _WaitStats()
+        self.type_waits: dict[str, _WaitStats] = {}
+
+    def _type_semaphore(self, node_type: str, limit: int) -> asyncio.Semaphore | None:
+        if limit <= 0:
+            return None
+        # Keyed with the limit too, so reloading a node with a new cap takes effect.
+        key = (node_type, limit)
+        sem = self._types.get(key)
+        if sem is None:
+            sem = self._types[key] = asyncio.Semaphore(limit)
+        return sem
+
+    def run_is_queued(self) -> bool:
+        return self._runs is not None and self._runs.locked()
+
+    @asynccontextmanager
+    async def run_slot(self) -> AsyncIterator[float]:
+        """Hold one of the concurrent-run slots; yields the wait in ms."""
+        started = time.perf_counter()
+        async with AsyncExitStack() as stack:
+            if self._runs is not None:
+                await stack.enter_async_context(self._runs)
+            wait_ms = (time.perf_counter() - started) * 1000
+            self.run_waits.record(wait_ms)
+            yield wait_ms
+
+    @asynccontextmanager
+    async def node_slot(
+        self,
+        node_type: str,
+        type_limit: int = 0,
+        run_semaphore: asyncio.Semaphore | None = None,
+    ) -> AsyncIterator[float]:
+        """Hold the run, node-type and global slots for one node; yields the wait in ms."""
+        started = time.perf_counter()
+        async with AsyncExitStack() as stack:
+            for sem in (run_semaphore, self._type_semaphore(node_type, type_limit), self._nodes):
+                if sem is not None:
+                    await stack.enter_async_context(sem)
+            wait_ms = (time.perf_counter() - started) * 1000
+            self.node_waits.record(wait_ms)
+            self.type_waits.setdefault(node_type, _WaitStats()).record(wait_ms)
+            yield wait_ms
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "nodes": self.node_waits.to_api(),
+            "runs": self.run_waits.to_api(),
+            "node_types": {t: s.to_api() for t, s in sorted(self.type_waits.items())},
+        }
+
+
+# asyncio primitives belong to one event loop; keep one governor per loop.
+_governors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ConcurrencyGovernor]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_governor() -> ConcurrencyGovernor:
+    loop = asyncio.get_running_loop()
+    governor = _governors.get(loop)
+    if governor is None:
+        governor = _governors[loop] = ConcurrencyGovernor()
+    return governor
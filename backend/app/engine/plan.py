@@ -0,0 +1,288 @@
+"""Compiled execution plans.
+
+Validating a definition (node types, edge handles, the single trigger, cycles,
+reachability) only depends on the definition and the loaded node specs, so it
+is done once per distinct definition and the result is cached. The executor
+then only walks the plan.
+
+Plans are keyed by a content hash of the definition plus the registry version,
+so editing a workflow or reloading node files naturally produces a new plan.
+A plan owns a private copy of the definition and must be treated as read-only.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, NamedTuple
+
+from app import config
+from app.engine.registry import NodeRegistry, NodeSpec
+from app.engine.templating import BUILTIN_NAMES, compile_config
+from app.engine.types import WorkflowError
+
+PLAN_CACHE_SIZE = 256
+
+
+class PlanEdge(NamedTuple):
+    source: str
+    source_handle: str
+    target: str
+    target_handle: str
+
+
+class FanOut(NamedTuple):
+    """A node's ``for_each`` setting: run it once per element of ``items``."""
+
+    items: Any  # compiled template rendering the list (default: the node's input)
+    concurrency: int  # items in flight at once, 0 = unlimited
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    key: str
+    nodes: MappingProxyType  # node id -> node definition, in definition order
+    specs: MappingProxyType  # node id -> NodeSpec
+    templates: MappingProxyType  # node id -> compiled config (reachable nodes only)
+    refs: MappingProxyType  # node id -> ids of the nodes its templates reference
+    fan_out: MappingProxyType  # node id -> FanOut, for nodes with a for_each setting
+    edges: tuple[PlanEdge, ...]  # validated, deduplicated, between reachable nodes
+    in_edges: MappingProxyType  # node id -> indexes into edges
+    out_edges: MappingProxyType  # node id -> indexes into edges
+    trigger: str
+    reachable: frozenset[str]
+    order: tuple[str, ...]  # reachable nodes in topological order
+
+
+def definition_key(definition: dict) -> str:
+    """Content hash of a workflow definition (key order does not matter)."""
+    canonical = json.dumps(definition, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _detect_cycle(nodes: dict, adj: dict[str, list[str]]) -> None:
+    WHITE, GRAY, BLACK = 0, 1, 2
+    color = {nid: WHITE for nid in nodes}
+    for start in nodes:
+        if color[start] != WHITE:
+            continue
+        stack: list[tuple[str, int]] = [(start, 0)]
+        color[start] = GRAY
+        while stack:
+            nid, idx = stack[-1]
+            neighbors = adj.get(nid, [])
+            if idx < len(neighbors):
+                stack[-1] = (nid, idx + 1)
+                nxt = neighbors[idx]
+                if color[nxt] == GRAY:
+                    raise WorkflowError(f"Workflow contains a cycle involving node '{nxt}'")
+                if color[nxt] == WHITE:
+                    color[nxt] = GRAY
+                    stack.append((nxt, 0))
+            else:
+                color[nid] = BLACK
+                stack.pop()
+
+
+def _fan_out(nid: str, setting: Any) -> FanOut:
+    """Validate a node's ``for_each``: ``true`` or ``{"items": "{{ ... }}", "concurrency": n}``."""
+    if setting is True:
+        setting = {}
+    if not isinstance(setting, dict):
+        raise WorkflowError(f"'for_each' of node '{nid}' must be true or an object")
+    items = setting.get("items") or "{{ input }}"
+    try:
+        concurrency = int(setting.get("concurrency", config.FOR_EACH_CONCURRENCY))
+    except (TypeError, ValueError):
+        concurrency = -1
+    if concurrency < 0:
+        raise WorkflowError(f"'for_each.concurrency' of node '{nid}' must be a whole number >= 0")
+    return FanOut(compile_config(items), concurrency)
+
+
+def compile_plan(definition: dict, registry: NodeRegistry, key: str = "") -> ExecutionPlan:
+    """Validate a definition and resolve it into an immutable plan (uncached)."""
+    # Private copy: callers may keep mutating their definition dict.
+    definition = json.loads(json.dumps(definition, default=str))
+
+    nodes: dict[str, dict] = {}
+    for n in definition.get("nodes", []):
+        if not n.get("id") or not n.get("type"):
+            raise WorkflowError("Every node needs an 'id' and a 'type'")
+        nodes[n["id"]] = n
+    if not nodes:
+        raise WorkflowError("Workflow has no nodes")
+
+    unknown = sorted({n["type"] for n in nodes.values() if registry.get(n["type"]) is None})
+    if unknown:
+        raise WorkflowError(f"Unknown node types: {', '.join(unknown)}")
+    specs: dict[str, NodeSpec] = {nid: registry.get(n["type"]) for nid, n in nodes.items()}
+
+    triggers = [nid for nid, spec in specs.items() if not spec.inputs]
+    if not triggers:
+        raise WorkflowError("Workflow needs a trigger node (e.g. Manual Trigger)")
+    if len(triggers) > 1:
+        raise WorkflowError(
+            f"Only one trigger node is allowed per workflow (found {len(triggers)}: "
+            f"{', '.join(sorted(triggers))})"
+        )
+
+    # Validate handles against the node specs and drop duplicate edges.
+    edges: list[PlanEdge] = []
+    seen_edges: set[PlanEdge] = set()
+    for e in definition.get("edges", []):
+        if e.get("source") not in nodes or e.get("target") not in nodes:
+            continue
+        src_spec = specs[e["source"]]
+        tgt_spec = specs[e["target"]]
+        if not tgt_spec.inputs:
+            raise WorkflowError(f"'{e['target']}' is a trigger and cannot receive connections")
+        sh = e.get("sourceHandle") or (src_spec.outputs[0] if src_spec.outputs else "out")
+        th = e.get("targetHandle") or tgt_spec.inputs[0]
+        if src_spec.outputs and sh not in src_spec.outputs:
+            raise WorkflowError(
+                f"Edge from '{e['source']}' uses unknown output handle '{sh}' "
+                f"(available: {', '.join(src_spec.outputs)})"
+            )
+        if th not in tgt_spec.inputs:
+            raise WorkflowError(
+                f"Edge into '{e['target']}' uses unknown input handle '{th}' "
+                f"(available: {', '.join(tgt_spec.inputs)})"
+            )
+        edge = PlanEdge(e["source"], sh, e["target"], th)
+        if edge in seen_edges:
+            continue
+        seen_edges.add(edge)
+        edges.append(edge)
+
+    adj: dict[str, list[str]] = {nid: [] for nid in nodes}
+    for edge in edges:
+        adj[edge.source].append(edge.target)
+    _detect_cycle(nodes, adj)
+
+    # Only nodes reachable from the trigger execute; the rest are reported skipped.
+    trigger = triggers[0]
+    reachable: set[str] = set()
+    queue = deque([trigger])
+    while queue:
+        nid = queue.popleft()
+        if nid in reachable:
+            continue
+        reachable.add(nid)
+        queue.extend(adj[nid])
+
+    edges = [e for e in edges if e.source in reachable and e.target in reachable]
+    in_edges: dict[str, list[int]] = {nid: [] for nid in nodes if nid in reachable}
+    out_edges: dict[str, list[int]] = {nid: [] for nid in nodes if nid in reachable}
+    for idx, edge in enumerate(edges):
+        in_edges[edge.target].append(idx)
+        out_edges[edge.source].append(idx)
+
+    indegree = {nid: len(idx) for nid, idx in in_edges.items()}
+    order: list[str] = []
+    ready = deque([trigger])
+    while ready:
+        nid = ready.popleft()
+        order.append(nid)
+        for idx in out_edges[nid]:
+            target = edges[idx].target
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                ready.append(target)
+
+    templates = {nid: compile_config(nodes[nid].get("config", {})) for nid in order}
+    fan_out = {
+        nid: _fan_out(nid, nodes[nid]["for_each"]) for nid in order if nodes[nid].get("for_each")
+    }
+    refs = {}
+    for nid, t in templates.items():
+        names = t.refs | fan_out[nid].items.refs if nid in fan_out else t.refs
+        refs[nid] = frozenset(r for r in names if r in reachable and r not in BUILTIN_NAMES)
+
+    return ExecutionPlan(
+        key=key,
+        nodes=MappingProxyType(nodes),
+        specs=MappingProxyType(specs),
+        templates=MappingProxyType(templates),
+        refs=MappingProxyType(refs),
+        fan_out=MappingProxyType(fan_out),
+        edges=tuple(edges),
+        in_edges=MappingProxyType({nid: tuple(idx) for nid, idx in in_edges.items()}),
+        out_edges=MappingProxyType({nid: tuple(idx) for nid, idx in out_edges.items()}),
+        trigger=trigger,
+        reachable=frozenset(reachable),
+        order=tuple(order),
+    )
+
+
+class PlanCache:
+    """LRU of compiled plans keyed by (registry version, definition hash).
+
+    Hashing means serializing the whole definition on every lookup. Long-lived
+    definitions that are never mutated (saved workflows held by a cache) can be
+    pinned so lookups with that same object skip it.
+    """
+
+    def __init__(self, max_size: int = PLAN_CACHE_SIZE):
+        self.max_size = max_size
+        self._plans: OrderedDict[tuple[int, str], ExecutionPlan] = OrderedDict()
+        # id(definition) -> (definition, hash); holding the object keeps its id unique
+        self._pinned: dict[int, tuple[dict, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def pin(self, definition: dict) -> None:
+        digest = definition_key(definition)
+        with self._lock:
+            self._pinned[id(definition)] = (definition, digest)
+
+    def unpin(self, definition: dict) -> None:
+        with self._lock:
+            pinned = self._pinned.get(id(definition))
+            if pinned is not None and pinned[0] is definition:
+                del self._pinned[id(definition)]
+
+    def _digest(self, definition: dict) -> str:
+        pinned = self._pinned.get(id(definition))
+        if pinned is not None and pinned[0] is definition:
+            return pinned[1]
+        return definition_key(definition)
+
+    def get(self, definition: dict, registry: NodeRegistry) -> ExecutionPlan:
+        digest = self._digest(definition)
+        key = (registry.version, digest)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        plan = compile_plan(definition, registry, key=digest)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._plans),
+            "pinned": len(self._pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+plan_cache = PlanCache()
+
+
+def get_plan(definition: dict, registry: NodeRegistry) -> ExecutionPlan:
+    return plan_cache.get(definition, registry)
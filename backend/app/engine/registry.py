@@ -17,6 +17,7 @@ import asyncio
 import importlib
 import importlib.util
 import inspect
+import itertools
 import logging
 import pkgutil
 import sys
@@ -55,6 +56,9 @@ class NodeSpec:
     timeout: float
     source: str  # "builtin" | "custom"
     run: Callable = field(repr=False, default=None)
+    concurrency: int = 0  # max simultaneous executions of this type, 0 = unlimited
+    # rendered config -> result cache TTL in seconds (0 = don't cache); None = never
+    cache_ttl: Callable[[dict], float] | None = field(repr=False, default=None)
 
     def to_api(self) -> dict[str, Any]:
         return {
@@ -78,6 +82,22 @@ def _wrap_sync_run(sync_run: Callable) -> Callable:
     return async_run
 
 
+def _cache_policy(value: Any) -> Callable[[dict], float] | None:
+    """Normalize NODE_CACHEABLE (TTL seconds, True, or config -> TTL) to a callable."""
+    if callable(value):
+        return value
+    if value is True:
+        ttl = config.RESULT_CACHE_TTL
+    else:
+        try:
+            ttl = float(value or 0)
+        except (TypeError, ValueError):
+            ttl = 0
+    if ttl <= 0:
+        return None
+    return lambda node_config: ttl
+
+
 def _spec_from_module(module: ModuleType, source: str) -> NodeSpec | None:
     node_type = getattr(module, "NODE_TYPE", None)
     run = getattr(module, "run", None)
@@ -92,6 +112,11 @@ def _spec_from_module(module: ModuleType, source: str) -> NodeSpec | None:
     except (TypeError, ValueError):
         timeout = config.DEFAULT_NODE_TIMEOUT
 
+    try:
+        concurrency = max(int(getattr(module, "NODE_CONCURRENCY", 0) or 0), 0)
+    except (TypeError, ValueError):
+        concurrency = 0
+
     return NodeSpec(
         type=str(node_type),
         name=str(getattr(module, "NODE_NAME", node_type)),
@@ -105,6 +130,8 @@ def _spec_from_module(module: ModuleType, source: str) -> NodeSpec | None:
         timeout=timeout,
         source=source,
         run=run,
+        concurrency=concurrency,
+        cache_ttl=_cache_policy(getattr(module, "NODE_CACHEABLE", None)),
     )
 
 
@@ -120,14 +147,20 @@ def _load_user_module(path: Path) -> ModuleType:
     return module
 
 
+# Process-wide, so two registries never share a version (plan caches key on it).
+_versions = itertools.count(1)
+
+
 class NodeRegistry:
     def __init__(self):
         self._specs: dict[str, NodeSpec] = {}
         self.load_errors: list[dict[str, str]] = []
+        self.version = 0
 
     def load(self) -> None:
         self._specs.clear()
         self.load_errors.clear()
+        self.version = next(_versions)
         self._load_builtins()
         self._load_user_nodes()
         logger.info(
@@ -0,0 +1,178 @@
+"""Execution history retention and background compaction.
+
+A policy has ``max_age_days``, ``max_count`` and ``failure_max_age_days``
+(0 = no limit). A workflow's policy overrides its owner's default policy field
+by field, which overrides the ``SWARM_RETENTION_*`` settings. ``max_count``
+counts every finished run and applies to each workflow's history separately;
+ad-hoc runs without a workflow share one. Failed runs (error / interrupted) age out after
+``failure_max_age_days`` instead of ``max_age_days``, so they can be kept
+longer for debugging.
+
+``compact`` deletes expired executions in batches, each batch one write-queue
+operation that also drops their nodes, logs, jobs and output blob references,
+then hands freed pages back with an incremental VACUUM.
+"""
+
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from typing import NamedTuple
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal, engine, write_queue
+from app.engine.blobs import output_store
+from app.models import Execution, ExecutionLog, ExecutionNode, RetentionPolicy, RunEvent, RunJob
+
+logger = logging.getLogger(__name__)
+
+BATCH = 500  # executions deleted per transaction
+VACUUM_PAGES = 10_000  # pages returned to the filesystem per compaction
+FAILED = ("error", "interrupted")
+
+
+class Policy(NamedTuple):
+    max_age_days: int
+    max_count: int
+    failure_max_age_days: int | None  # None = same as max_age_days
+
+
+def default_policy() -> Policy:
+    return Policy(
+        config.RETENTION_MAX_AGE_DAYS,
+        config.RETENTION_MAX_COUNT,
+        config.RETENTION_FAILURE_MAX_AGE_DAYS,
+    )
+
+
+def merge(base: Policy, row: RetentionPolicy | None) -> Policy:
+    """`base` with the fields `row` sets."""
+    if row is None:
+        return base
+    return Policy(
+        base.max_age_days if row.max_age_days is None else row.max_age_days,
+        base.max_count if row.max_count is None else row.max_count,
+        base.failure_max_age_days if row.failure_max_age_days is None else row.failure_max_age_days,
+    )
+
+
+def _keeps_everything(policy: Policy) -> bool:
+    return not (policy.max_age_days or policy.max_count or policy.failure_max_age_days)
+
+
+def find_expired(limit: int = BATCH) -> list[str]:
+    """Ids of up to `limit` finished executions their effective policy no longer keeps."""
+    now = datetime.now(UTC)
+    db = SessionLocal()
+    try:
+        rows = db.query(RetentionPolicy).all()
+        defaults = default_policy()
+        if _keeps_everything(defaults) and not rows:
+            return []
+        user_rows = {r.user_id: r for r in rows if r.workflow_id is None}
+        workflow_rows = {(r.user_id, r.workflow_id): r for r in rows if r.workflow_id is not None}
+
+        scopes = db.execute(select(Execution.user_id, Execution.workflow_id).distinct()).all()
+        expired: dict[str, None] = {}
+        for user_id, workflow_id in scopes:
+            policy = merge(
+                merge(defaults, user_rows.get(user_id)),
+                workflow_rows.get((user_id, workflow_id)),
+            )
+            if _keeps_everything(policy):
+                continue
+            scope = select(Execution.id).where(
+                Execution.user_id == user_id,
+                Execution.workflow_id == workflow_id
+                if workflow_id is not None
+                else Execution.workflow_id.is_(None),
+                Execution.status != "running",
+            )
+            queries = []
+            if policy.max_count:
+                queries.append(scope.order_by(Execution.started_at.desc()).offset(policy.max_count))
+            if policy.max_age_days:
+                cutoff = now - timedelta(days=policy.max_age_days)
+                queries.append(
+                    scope.where(Execution.started_at < cutoff, Execution.status.not_in(FAILED))
+                )
+            failure_age = policy.failure_max_age_days
+            if failure_age is None:
+                failure_age = policy.max_age_days
+            if failure_age:
+                cutoff = now - timedelta(days=failure_age)
+                queries.append(
+                    scope.where(Execution.started_at < cutoff, Execution.status.in_(FAILED))
+                )
+            for query in queries:
+                for execution_id in db.scalars(query.limit(limit - len(expired))):
+                    expired[execution_id] = None
+                if len(expired) >= limit:
+                    return list(expired)
+        return list(expired)
+    finally:
+        db.close()
+
+
+def delete_executions(db: Session, ids: list[str]) -> tuple[int, list[str]]:
+    """Delete executions with everything stored for them.
+
+    Returns how many went, and the blobs whose files `remove_blob_files` should
+    delete once this transaction has committed.
+    """
+    digests = db.scalars(
+        select(ExecutionNode.output_hash).where(
+            ExecutionNode.execution_id.in_(ids), ExecutionNode.output_hash.is_not(None)
+        )
+    ).all()
+    for model in (ExecutionNode, ExecutionLog, RunEvent):
+        db.execute(delete(model).where(model.execution_id.in_(ids)))
+    db.execute(delete(RunJob).where(RunJob.id.in_(ids)))
+    removed = db.execute(delete(Execution).where(Execution.id.in_(ids))).rowcount
+    output_store.release(db, list(digests))
+    return removed, output_store.collect(db)
+
+
+def remove_blob_files(digests: list[str]) -> int:
+    db = SessionLocal()
+    try:
+        return output_store.remove_files(db, digests)
+    finally:
+        db.close()
+
+
+def _incremental_vacuum(db: Session) -> None:
+    if engine.dialect.name == "sqlite":
+        db.execute(text(f"PRAGMA incremental_vacuum({VACUUM_PAGES})"))
+
+
+async def compact(batch: int = BATCH) -> int:
+    """Prune every expired execution; returns how many were deleted."""
+    removed = 0
+    while True:
+        ids = await asyncio.to_thread(find_expired, batch)
+        if not ids:
+            break
+        deleted, unused = await write_queue.run(partial(delete_executions, ids=ids))
+        if unused:
+            await asyncio.to_thread(remove_blob_files, unused)
+        removed += deleted
+        if not deleted or len(ids) < batch:
+            break
+    if removed:
+        await write_queue.run(_incremental_vacuum)
+        logger.info("Retention removed %d execution(s)", removed)
+    return removed
+
+
+async def compaction_loop() -> None:
+    """Run `compact` now and then every RETENTION_INTERVAL_SECONDS (started by main.lifespan)."""
+    while True:
+        try:
+            await compact()
+        except Exception:
+            logger.exception("Execution history compaction failed")
+        await asyncio.sleep(config.RETENTION_INTERVAL_SECONDS)
@@ -1,20 +1,52 @@
-"""In-memory run manager: starts workflow executions as background asyncio tasks,
-buffers events for WebSocket replay/streaming, and persists results to the DB."""
+"""In-memory run manager: starts workflow executions, buffers events for WebSocket
+replay/streaming, and persists results to the DB.
+
+Every run gets a ``run_jobs`` row holding its definition. In the default
+"inline" mode the run executes as a background asyncio task in this process.
+With ``SWARM_RUN_MODE=queue`` the job is only enqueued; worker processes
+(``app.worker``) claim and execute it, writing events to ``run_events``, and
+this process relays those events to its subscribers.
+
+Execution rows, jobs, checkpoints and outcomes are written through
+``app.db.write_queue``, so SQLite commits never run on the event loop and
+concurrent runs share group commits.
+"""
 
 import asyncio
 import json
 import uuid
+from collections import deque
+from collections.abc import Callable, Iterable
 from datetime import UTC, datetime
+from functools import partial
 from typing import Any
 
-from app.db import SessionLocal
-from app.engine.executor import execute_workflow
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal, write_queue
+from app.engine.blobs import StoredOutput, output_store
+from app.engine.cache import result_cache
+from app.engine.events import EventLog, Subscription
+from app.engine.executor import RESULT_LOG_LIMIT, execute_workflow
+from app.engine.limits import get_governor
 from app.engine.registry import NodeRegistry
 from app.engine.types import WorkflowError
-from app.models import Execution
+from app.models import Execution, ExecutionLog, ExecutionNode, RunEvent, RunJob
 
 MAX_KEPT_RUNS = 50
-SUMMARY_CHAR_LIMIT = 500_000
+RELAY_INTERVAL = 0.1  # seconds between polls for worker-written events
+
+
+def _summary_json(result: dict) -> str:
+    """Run-level part of a result for the executions table.
+
+    Node outputs and logs live in execution_nodes / execution_logs, so reading an
+    execution never parses more than statuses and error messages.
+    """
+    slim = {k: v for k, v in result.items() if k not in ("outputs", "logs")}
+    return json.dumps(slim, ensure_ascii=False, default=str)
 
 
 class Run:
@@ -24,27 +56,50 @@ class Run:
         self.workflow_id = workflow_id
         self.workflow_name = workflow_name
         self.status = "running"
-        self.events: list[dict] = []
-        self.subscribers: set[asyncio.Queue] = set()
+        self.events = EventLog(run_id)
+        self.subscribers: set[Subscription] = set()
         self.result: dict | None = None
         self.task: asyncio.Task | None = None
         self.started_at = datetime.now(UTC)
         self.finished_at: datetime | None = None
+        # Executed by a worker process; events arrive through the relay.
+        self.remote = False
+        # Reuse cached results of NODE_CACHEABLE nodes (opt-in per run).
+        self.use_cache = False
+        # Extra consumer of every event (a worker uses it to ship events to the DB).
+        self.sink: Callable[[dict], None] | None = None
 
     def emit(self, event: dict) -> None:
         event.setdefault("ts", datetime.now(UTC).isoformat())
-        event["seq"] = len(self.events)
         self.events.append(event)
-        for q in list(self.subscribers):
-            q.put_nowait(event)
+        for sub in list(self.subscribers):
+            sub.push(event)
+        if self.sink is not None:
+            self.sink(event)
+
+    def subscribe(self, since: int = -1) -> Subscription:
+        """Events after seq `since` (everything by default), then live ones."""
+        sub = Subscription(self.events, since)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self.subscribers.discard(sub)
 
-    def subscribe(self) -> asyncio.Queue:
-        q: asyncio.Queue = asyncio.Queue()
-        self.subscribers.add(q)
-        return q
+    async def wait(self) -> None:
+        """Return once the run has finished."""
+        if self.finished_at is not None:
+            return
+        sub = self.subscribe(len(self.events) - 1)
+        try:
+            while (await sub.get()).get("type") != "run_finished":
+                pass
+        finally:
+            self.unsubscribe(sub)
 
-    def unsubscribe(self, q: asyncio.Queue) -> None:
-        self.subscribers.discard(q)
+    def close(self) -> None:
+        """Release the event log's spill file once the run is forgotten."""
+        self.events.close()
 
     def snapshot(self) -> dict:
         return {
@@ -58,11 +113,190 @@ class Run:
         }
 
 
+def _add_checkpoint(
+    db: Session,
+    run_id: str,
+    node_id: str,
+    stored: StoredOutput,
+    handles: set[str] | None,
+    elapsed_ms: int,
+) -> None:
+    output_store.add(db, stored)
+    db.add(
+        ExecutionNode(
+            execution_id=run_id,
+            node_id=node_id,
+            output=stored.text,
+            output_hash=stored.digest,
+            handles=json.dumps(sorted(handles) if handles is not None else None),
+            elapsed_ms=elapsed_ms,
+        )
+    )
+
+
+def load_checkpoints(run_id: str) -> dict[str, tuple[Any, set[str] | None]]:
+    """Checkpointed nodes of an execution, as the executor's `restored` mapping."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ExecutionNode)
+            .filter(ExecutionNode.execution_id == run_id, ExecutionNode.status == "success")
+            .all()
+        )
+    finally:
+        db.close()
+    restored = {}
+    for row in rows:
+        handles = json.loads(row.handles)
+        restored[row.node_id] = (
+            json.loads(output_store.load(row.output, row.output_hash)),
+            set(handles) if handles is not None else None,
+        )
+    return restored
+
+
+async def execute_run(
+    run: Run, definition: dict, registry: NodeRegistry, run_input: Any, resume: bool = False
+) -> None:
+    """Execute a run to completion, recording status, result and events on `run`.
+
+    Every successful node is checkpointed; with resume=True, nodes checkpointed by
+    an earlier attempt are replayed instead of executed again.
+    Never raises (cancellation ends the run as "cancelled"); the caller persists.
+    """
+    from app.engine.credentials import resolve_credential
+
+    async def checkpoint(node_id: str, data: Any, handles: set[str] | None, elapsed_ms: int):
+        stored = await asyncio.to_thread(output_store.encode, data)
+        await write_queue.run(
+            lambda db: _add_checkpoint(db, run.id, node_id, stored, handles, elapsed_ms)
+        )
+
+    governor = get_governor()
+    try:
+        restored = await asyncio.to_thread(load_checkpoints, run.id) if resume else None
+        if governor.run_is_queued():
+            run.emit({"type": "run_state", "status": "queued"})
+        async with governor.run_slot():
+            result = await execute_workflow(
+                definition,
+                registry,
+                run_input=run_input,
+                emit=run.emit,
+                credential_resolver=partial(resolve_credential, run.user_id),
+                governor=governor,
+                checkpoint=checkpoint,
+                restored=restored,
+                cache=result_cache if run.use_cache else None,
+                cache_namespace=str(run.user_id),
+            )
+        run.status = result["status"]
+        run.result = result
+    except WorkflowError as e:
+        run.status = "error"
+        run.result = {"status": "error", "error": str(e)}
+        run.emit({"type": "run_error", "message": str(e)})
+    except asyncio.CancelledError:
+        run.status = "cancelled"
+        run.result = {"status": "cancelled"}
+    except Exception as e:
+        run.status = "error"
+        run.result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        run.emit({"type": "run_error", "message": run.result["error"]})
+    finally:
+        run.finished_at = datetime.now(UTC)
+        run.emit({"type": "run_finished", "status": run.status})
+
+
+def store_result(db: Session, run: Run) -> None:
+    """Write a finished run's outcome, node states and logs, and close its job (no commit).
+
+    Successful nodes were already stored as checkpoints while the run executed.
+    """
+    result = run.result or {}
+    row = db.get(Execution, run.id)
+    if row is not None:
+        row.status = run.status
+        row.finished_at = run.finished_at
+        row.summary = _summary_json(result)
+    db.execute(
+        delete(ExecutionNode).where(
+            ExecutionNode.execution_id == run.id, ExecutionNode.status != "success"
+        )
+    )
+    errors = result.get("errors", {})
+    db.add_all(
+        ExecutionNode(execution_id=run.id, node_id=nid, status=status, error=errors.get(nid, ""))
+        for nid, status in result.get("node_statuses", {}).items()
+        if status != "success"
+    )
+    # From the event log rather than the result, which only keeps the newest entries.
+    db.add_all(
+        ExecutionLog(
+            execution_id=run.id,
+            node_id=event.get("node_id") or "",
+            level=event.get("level") or "info",
+            message=event.get("message") or "",
+        )
+        for event in run.events
+        if event.get("type") == "log"
+    )
+    db.execute(update(RunJob).where(RunJob.id == run.id).values(status="done"))
+
+
+async def persist_run(run: Run) -> None:
+    await write_queue.run(partial(store_result, run=run))
+
+
+def _load_events(cursors: dict[str, int]) -> list[tuple[int, str, str]]:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(RunEvent.id, RunEvent.execution_id, RunEvent.data)
+            .filter(
+                RunEvent.execution_id.in_(list(cursors)),
+                RunEvent.id > min(cursors.values()),
+            )
+            .order_by(RunEvent.id)
+            .all()
+        )
+    finally:
+        db.close()
+    return [tuple(r) for r in rows if r.id > cursors[r.execution_id]]
+
+
+def _take_finished(db: Session, run_id: str) -> Execution | None:
+    """Fetch the outcome a worker stored, and drop the run's relayed event rows."""
+    row = db.get(Execution, run_id)
+    db.execute(delete(RunEvent).where(RunEvent.execution_id == run_id))
+    return row
+
+
+def _outputs_and_logs(events: Iterable[dict]) -> dict:
+    """The output previews and logs of a result, rebuilt from a run's relayed events
+    (the stored summary of a worker-executed run leaves them out)."""
+    outputs = {
+        e["node_id"]: e["output"]
+        for e in events
+        if e.get("type") == "node_state" and e.get("status") == "success" and "output" in e
+    }
+    logs = deque(
+        (
+            {"level": e.get("level"), "node_id": e.get("node_id"), "message": e.get("message")}
+            for e in events
+            if e.get("type") == "log"
+        ),
+        maxlen=RESULT_LOG_LIMIT,
+    )
+    return {"outputs": outputs, "logs": list(logs)}
+
+
 class RunManager:
     def __init__(self):
         self.runs: dict[str, Run] = {}
+        self._relay_task: asyncio.Task | None = None
 
-    def start(
+    async def start(
         self,
         definition: dict,
         registry: NodeRegistry,
@@ -70,13 +304,13 @@ class RunManager:
         workflow_id: int | None = None,
         workflow_name: str = "",
         run_input: Any = None,
+        use_cache: bool = False,
     ) -> Run:
         run = Run(str(uuid.uuid4()), user_id, workflow_id, workflow_name)
-        self.runs[run.id] = run
-        self._prune()
+        run.remote = config.RUN_MODE == "queue"
+        run.use_cache = use_cache
 
-        db = SessionLocal()
-        try:
+        def insert(db: Session) -> None:
             db.add(
                 Execution(
                     id=run.id,
@@ -87,56 +321,154 @@ class RunManager:
                     started_at=run.started_at,
                 )
             )
-            db.commit()
-        finally:
-            db.close()
+            db.flush()
+            db.add(
+                RunJob(
+                    id=run.id,
+                    user_id=user_id,
+                    definition=json.dumps(definition, default=str),
+                    run_input=json.dumps(run_input, default=str),
+                    status="queued" if run.remote else "local",
+                    use_cache=use_cache,
+                    created_at=run.started_at,
+                )
+            )
 
-        run.task = asyncio.create_task(self._execute(run, definition, registry, run_input))
+        await write_queue.run(insert)
+        self.runs[run.id] = run
+        self._prune()
+        self._launch(run, definition, registry, run_input)
         return run
 
-    async def _execute(self, run: Run, definition: dict, registry: NodeRegistry, run_input: Any):
-        from functools import partial
+    async def resume(self, execution_id: str, registry: NodeRegistry) -> Run | None:
+        """Continue an unfinished execution from its checkpoints, under the same id.
 
-        from app.engine.credentials import resolve_credential
+        Returns None when the execution has no stored job to resume from.
+        """
 
-        try:
-            result = await execute_workflow(
-                definition,
-                registry,
-                run_input=run_input,
-                emit=run.emit,
-                credential_resolver=partial(resolve_credential, run.user_id),
+        def reopen(db: Session) -> tuple[Run, dict, Any] | None:
+            row = db.get(Execution, execution_id)
+            job = db.get(RunJob, execution_id)
+            if row is None or job is None:
+                return None
+            run = Run(row.id, row.user_id, row.workflow_id, row.workflow_name)
+            run.remote = config.RUN_MODE == "queue"
+            run.use_cache = job.use_cache
+            row.status = "running"
+            row.finished_at = None
+            job.status = "queued" if run.remote else "local"
+            job.worker = ""
+            job.lease_expires_at = None
+            job.attempts = 0
+            job.cancel_requested = False
+            # Failed/skipped nodes run again; their rows are rewritten with the outcome.
+            db.execute(
+                delete(ExecutionNode).where(
+                    ExecutionNode.execution_id == execution_id, ExecutionNode.status != "success"
+                )
             )
-            run.status = result["status"]
-            run.result = result
-        except WorkflowError as e:
-            run.status = "error"
-            run.result = {"status": "error", "error": str(e)}
-            run.emit({"type": "run_error", "message": str(e)})
-        except asyncio.CancelledError:
-            run.status = "cancelled"
-            run.result = {"status": "cancelled"}
-        except Exception as e:
-            run.status = "error"
-            run.result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
-            run.emit({"type": "run_error", "message": run.result["error"]})
-        finally:
-            run.finished_at = datetime.now(UTC)
-            run.emit({"type": "run_finished", "status": run.status})
-            self._persist(run)
+            return run, json.loads(job.definition), json.loads(job.run_input)
 
-    def _persist(self, run: Run) -> None:
-        db = SessionLocal()
-        try:
-            row = db.get(Execution, run.id)
-            if row is not None:
-                row.status = run.status
-                row.finished_at = run.finished_at
-                summary = json.dumps(run.result or {}, ensure_ascii=False, default=str)
-                row.summary = summary[:SUMMARY_CHAR_LIMIT]
-                db.commit()
-        finally:
-            db.close()
+        reopened = await write_queue.run(reopen)
+        if reopened is None:
+            return None
+        run, definition, run_input = reopened
+        self.runs[run.id] = run
+        self._prune()
+        self._launch(run, definition, registry, run_input, resume=True)
+        return run
+
+    def _launch(
+        self,
+        run: Run,
+        definition: dict,
+        registry: NodeRegistry,
+        run_input: Any,
+        resume: bool = False,
+    ) -> None:
+        if run.remote:
+            # Workers always resume from checkpoints, so nothing to pass along.
+            self._ensure_relay()
+        else:
+            run.task = asyncio.create_task(
+                self._execute(run, definition, registry, run_input, resume)
+            )
+
+    async def _execute(
+        self, run: Run, definition: dict, registry: NodeRegistry, run_input: Any, resume: bool
+    ):
+        await execute_run(run, definition, registry, run_input, resume=resume)
+        await persist_run(run)
+
+    def _ensure_relay(self) -> None:
+        task = self._relay_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._relay_task = asyncio.create_task(self._relay())
+
+    async def _relay(self) -> None:
+        """Re-emit events written by workers until every remote run has finished."""
+        cursors: dict[str, int] = {}
+        while True:
+            remote = {r.id: r for r in self.runs.values() if r.remote and r.finished_at is None}
+            if not remote:
+                return
+            await asyncio.sleep(RELAY_INTERVAL)
+            for run_id in remote:
+                cursors.setdefault(run_id, 0)
+            rows = await asyncio.to_thread(_load_events, {rid: cursors[rid] for rid in remote})
+            for event_id, run_id, data in rows:
+                cursors[run_id] = event_id
+                run = remote[run_id]
+                if run.finished_at is not None:
+                    continue
+                event = json.loads(data)
+                event.pop("seq", None)
+                if event.get("type") == "run_finished":
+                    await self._finish_remote(run, event)
+                    cursors.pop(run_id, None)
+                else:
+                    run.emit(event)
+
+    async def _finish_remote(self, run: Run, event: dict) -> None:
+        row = await write_queue.run(partial(_take_finished, run_id=run.id))
+        run.status = event.get("status", "error")
+        run.finished_at = datetime.now(UTC)
+        if row is not None:
+            try:
+                run.result = json.loads(row.summary or "{}")
+            except json.JSONDecodeError:
+                run.result = {"status": run.status}
+            run.result.update(_outputs_and_logs(run.events))
+            run.status = row.status
+        run.emit(event)
+
+    async def _cancel_remote(self, run: Run) -> bool:
+        def withdraw(db: Session) -> tuple[bool, bool]:
+            # Still waiting in the queue: take it back so no worker ever starts it.
+            taken = db.execute(
+                update(RunJob)
+                .where(RunJob.id == run.id, RunJob.status == "queued")
+                .values(status="done")
+            ).rowcount
+            if taken:
+                return True, False
+            # Claimed: the worker holding it sees the flag on its next heartbeat.
+            requested = db.execute(
+                update(RunJob)
+                .where(RunJob.id == run.id, RunJob.status == "claimed")
+                .values(cancel_requested=True)
+            ).rowcount
+            return False, bool(requested)
+
+        taken, requested = await write_queue.run(withdraw)
+        if not taken:
+            return requested
+        run.status = "cancelled"
+        run.result = {"status": "cancelled"}
+        run.finished_at = datetime.now(UTC)
+        run.emit({"type": "run_finished", "status": run.status})
+        await persist_run(run)
+        return True
 
     def _prune(self) -> None:
         finished = [r for r in self.runs.values() if r.finished_at is not None]
@@ -144,12 +476,15 @@ class RunManager:
             finished.sort(key=lambda r: r.finished_at)
             for r in finished[: len(finished) - MAX_KEPT_RUNS]:
                 self.runs.pop(r.id, None)
+                r.close()
 
     def get(self, run_id: str) -> Run | None:
         return self.runs.get(run_id)
 
-    def cancel(self, run_id: str) -> bool:
+    async def cancel(self, run_id: str) -> bool:
         run = self.runs.get(run_id)
+        if run and run.remote and run.finished_at is None:
+            return await self._cancel_remote(run)
         if run and run.task and not run.task.done():
             run.task.cancel()
             return True
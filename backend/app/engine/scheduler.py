@@ -0,0 +1,346 @@
+"""Built-in scheduler for saved workflows that start with a schedule_trigger.
+
+Every schedule is one entry in a timer heap keyed by its next due time, so the
+loop (``Scheduler.run``, started by ``main.lifespan``) sleeps until the earliest
+one, or until a workflow is saved, and an idle schedule costs nothing.
+Editing a workflow replaces its entry; the stale heap item is skipped when it
+surfaces.
+
+When an entry comes due the scheduler works out which ticks to fire:
+
+- ``catch_up``: ticks missed while the server was down or the loop was late
+  fire all at once (``all``, at most ``MAX_CATCH_UP``), only the newest one
+  (``latest``), or not at all (``skip``, which still fires a tick that is on time).
+- ``jitter_seconds``: each tick fires up to that much later, at random, so
+  schedules sharing a minute do not all start together.
+- ``overlap``: if the previous run is still going, the tick is dropped
+  (``skip``), waits for it (``queue``, at most ``MAX_QUEUED`` waiting), or
+  cancels it (``cancel_previous``).
+
+The last fired tick is stored in ``schedule_states`` for catch-up after a
+restart. Runs go through ``RunManager.start`` like any other run.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app import config
+from app.db import SessionLocal, write_queue
+from app.engine.cron import Cron, Interval, timezone
+from app.engine.registry import get_registry
+from app.engine.runs import Run, manager
+from app.models import ScheduleState, Workflow
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_TYPE = "schedule_trigger"
+OVERLAP = ("skip", "queue", "cancel_previous")
+CATCH_UP = ("latest", "all", "skip")
+MISFIRE_GRACE = 60.0  # seconds past its (jittered) time before a tick counts as missed
+MAX_CATCH_UP = 50
+MAX_QUEUED = 10
+
+
+class Schedule(NamedTuple):
+    timer: Cron | Interval
+    jitter: float
+    overlap: str
+    catch_up: str
+
+
+def trigger_config(definition: dict) -> dict | None:
+    """Config of the definition's schedule_trigger node, or None if it has none."""
+    for node in definition.get("nodes", []):
+        if node.get("type") == TRIGGER_TYPE:
+            return node.get("config") or {}
+    return None
+
+
+def parse_schedule(cfg: dict) -> Schedule:
+    """Validate a schedule_trigger config (ValueError with a user-facing message)."""
+    if cfg.get("mode", "cron") == "interval":
+        try:
+            timer: Cron | Interval = Interval(float(cfg.get("interval_seconds") or 3600))
+        except (TypeError, ValueError) as e:
+            raise ValueError(str(e) if isinstance(e, ValueError) else "Invalid interval") from e
+    else:
+        if not str(cfg.get("cron") or "").strip():
+            raise ValueError("Cron expression is required")
+        timer = Cron(str(cfg["cron"]), timezone(cfg.get("timezone")))
+    try:
+        jitter = max(float(cfg.get("jitter_seconds") or 0), 0.0)
+    except (TypeError, ValueError):
+        raise ValueError("Jitter must be a number of seconds") from None
+    overlap = cfg.get("overlap") or "skip"
+    catch_up = cfg.get("catch_up") or "latest"
+    if overlap not in OVERLAP:
+        raise ValueError(f"Overlap must be one of {', '.join(OVERLAP)}")
+    if catch_up not in CATCH_UP:
+        raise ValueError(f"Catch-up must be one of {', '.join(CATCH_UP)}")
+    return Schedule(timer, jitter, overlap, catch_up)
+
+
+class _Entry:
+    def __init__(self, workflow_id: int, user_id: int, name: str, definition: dict):
+        self.workflow_id = workflow_id
+        self.user_id = user_id
+        self.name = name
+        self.definition = definition
+        self.schedule: Schedule | None = None
+        self.next_tick: datetime | None = None
+        self.generation = 0
+        self.active: Run | None = None  # the latest run this schedule started
+        self.waiting = 0  # ticks queued behind a running run (overlap="queue")
+        self.lock = asyncio.Lock()
+
+
+def _save_tick(db: Session, workflow_id: int, tick: datetime) -> None:
+    db.merge(ScheduleState(workflow_id=workflow_id, last_tick_at=tick))
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # SQLite hands DateTime(timezone=True) columns back naive.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+StartFn = Callable[..., Awaitable[Run]]
+
+
+class Scheduler:
+    def __init__(self, start: StartFn | None = None, clock: Callable[[], float] = time.time):
+        self._start = start or manager.start
+        self._clock = clock
+        self._entries: dict[int, _Entry] = {}
+        self._heap: list[tuple[float, int, int]] = []  # (due, generation, workflow id)
+        self._generations = itertools.count(1)
+        self._lock = threading.Lock()  # sync() is called from request threads
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.fired = 0
+        self.skipped = 0
+
+    def sync(
+        self,
+        workflow_id: int,
+        user_id: int,
+        name: str,
+        definition: dict,
+        since: datetime | None = None,
+    ) -> None:
+        """(Re)schedule a saved workflow; drops it when it has no enabled schedule_trigger.
+
+        The first tick is the first one after `since` (a stored last tick, which
+        makes the missed ones due at once), or after now.
+        """
+        cfg = trigger_config(definition)
+        if cfg is None or cfg.get("enabled", True) is False:
+            self.remove(workflow_id)
+            return
+        try:
+            schedule = parse_schedule(cfg)
+            next_tick = schedule.timer.next_after(
+                since or datetime.fromtimestamp(self._clock(), UTC)
+            )
+        except ValueError as e:
+            logger.warning("Schedule of workflow %s is not active: %s", workflow_id, e)
+            self.remove(workflow_id)
+            return
+        with self._lock:
+            entry = _Entry(workflow_id, user_id, name, definition)
+            previous = self._entries.get(workflow_id)
+            if previous is not None:  # keep overlap tracking across edits
+                entry.active, entry.waiting, entry.lock = (
+                    previous.active,
+                    previous.waiting,
+                    previous.lock,
+                )
+            entry.schedule = schedule
+            self._entries[workflow_id] = entry
+            self._push(entry, next_tick)
+        self._notify()
+
+    def remove(self, workflow_id: int) -> None:
+        with self._lock:
+            self._entries.pop(workflow_id, None)
+
+    def _push(self, entry: _Entry, tick: datetime) -> None:
+        entry.next_tick = tick
+        entry.generation = next(self._generations)
+        due = tick.timestamp() + random.uniform(0, entry.schedule.jitter)
+        heapq.heappush(self._heap, (due, entry.generation, entry.workflow_id))
+
+    def _notify(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            with contextlib.suppress(RuntimeError):  # loop already closed
+                self._loop.call_soon_threadsafe(self._wake.set)
+
+    def due(self, now: float) -> list[tuple[_Entry, datetime, list[datetime]]]:
+        """Pop every entry due at `now` and reschedule it.
+
+        Returns (entry, latest tick passed, ticks to fire) per entry; catch-up can
+        leave the ticks to fire empty.
+        """
+        fire = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, generation, workflow_id = heapq.heappop(self._heap)
+                entry = self._entries.get(workflow_id)
+                if entry is None or entry.generation != generation:
+                    continue  # removed or rescheduled since
+                fire.append((entry, *self._advance(entry, now)))
+        return fire
+
+    def _advance(self, entry: _Entry, now: float) -> tuple[datetime, list[datetime]]:
+        schedule = entry.schedule
+        current = datetime.fromtimestamp(now, UTC)
+        ticks = [entry.next_tick]
+        tick = schedule.timer.next_after(entry.next_tick)
+        while tick <= current and len(ticks) < MAX_CATCH_UP:
+            ticks.append(tick)
+            tick = schedule.timer.next_after(tick)
+        self._push(entry, tick if tick > current else schedule.timer.next_after(current))
+
+        if schedule.catch_up == "all":
+            fire = ticks
+        elif schedule.catch_up == "latest":
+            fire = ticks[-1:]
+        else:
+            grace = schedule.jitter + MISFIRE_GRACE
+            fire = [t for t in ticks[-1:] if now - t.timestamp() <= grace]
+        self.skipped += len(ticks) - len(fire)
+        return ticks[-1], fire
+
+    async def tick(self, now: float | None = None) -> list[asyncio.Task]:
+        """Fire everything due; returns the started firing tasks."""
+        started = []
+        for entry, last, ticks in self.due(self._clock() if now is None else now):
+            write_queue.submit(partial(_save_tick, workflow_id=entry.workflow_id, tick=last))
+            for tick in ticks:
+                task = asyncio.create_task(self._fire(entry, tick))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                started.append(task)
+        return started
+
+    async def _fire(self, entry: _Entry, tick: datetime) -> None:
+        overlap = entry.schedule.overlap
+        previous = entry.active
+        if previous is not None and previous.finished_at is None:
+            if overlap == "skip":
+                self.skipped += 1
+                logger.info(
+                    "Workflow %s: previous scheduled run still going, skipped %s",
+                    entry.workflow_id,
+                    tick.isoformat(),
+                )
+                return
+            if overlap == "cancel_previous":
+                await manager.cancel(previous.id)
+        if overlap != "queue":
+            await self._launch(entry, tick)
+            return
+        if entry.waiting >= MAX_QUEUED:
+            self.skipped += 1
+            logger.warning(
+                "Workflow %s: %d scheduled runs already queued", entry.workflow_id, MAX_QUEUED
+            )
+            return
+        entry.waiting += 1
+        async with entry.lock:
+            entry.waiting -= 1
+            run = await self._launch(entry, tick)
+            if run is not None:
+                await run.wait()
+
+    async def _launch(self, entry: _Entry, tick: datetime) -> Run | None:
+        run_input = {"scheduled_at": tick.isoformat(), "fired_at": datetime.now(UTC).isoformat()}
+        try:
+            run = await self._start(
+                definition=entry.definition,
+                registry=get_registry(),
+                user_id=entry.user_id,
+                workflow_id=entry.workflow_id,
+                workflow_name=entry.name,
+                run_input=run_input,
+            )
+        except Exception:
+            logger.exception("Could not start scheduled run of workflow %s", entry.workflow_id)
+            return None
+        entry.active = run
+        self.fired += 1
+        return run
+
+    def load(self) -> None:
+        """Schedule every saved workflow with a schedule_trigger (at startup)."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Workflow).filter(Workflow.data.contains(TRIGGER_TYPE)).all()
+            last = {s.workflow_id: s.last_tick_at for s in db.query(ScheduleState).all()}
+        finally:
+            db.close()
+        for w in rows:
+            try:
+                definition = json.loads(w.data)
+            except json.JSONDecodeError:
+                continue
+            self.sync(w.id, w.user_id, w.name, definition, since=_aware(last.get(w.id)))
+
+    async def run(self) -> None:
+        """The scheduler loop (started by main.lifespan)."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(self.load)
+        logger.info("Scheduler started with %d schedule(s)", len(self._entries))
+        while True:
+            self._wake.clear()
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            with self._lock:
+                delay = self._heap[0][0] - self._clock() if self._heap else None
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), delay)
+
+    def entries_for(self, user_id: int) -> list[dict[str, Any]]:
+        with self._lock:
+            entries = [e for e in self._entries.values() if e.user_id == user_id]
+        return [
+            {
+                "workflow_id": e.workflow_id,
+                "workflow_name": e.name,
+                "next_run_at": e.next_tick.isoformat(),
+                "overlap": e.schedule.overlap,
+                "catch_up": e.schedule.catch_up,
+                "running": e.active is not None and e.active.finished_at is None,
+                "queued": e.waiting,
+            }
+            for e in sorted(entries, key=lambda e: e.next_tick)
+        ]
+
+    def stats(self) -> dict[str, int]:
+        return {"schedules": len(self._entries), "fired": self.fired, "skipped": self.skipped}
+
+
+scheduler = Scheduler()
+
+
+async def scheduler_loop() -> None:
+    if config.SCHEDULER_ENABLED:
+        await scheduler.run()
@@ -7,11 +7,23 @@ Supports:
 
 A string that is exactly one template resolves to the raw typed value;
 templates embedded in larger strings are stringified (dicts/lists as JSON).
+
+Templates are compiled once: each string becomes literal chunks plus accessors
+(pre-split path segments or a pre-parsed simpleeval AST), and a config tree
+becomes a tree of those. Compiled strings are memoized by content and execution
+plans keep the compiled config of every node, so a run only evaluates.
+
+Every compiled template knows the root names it references (``refs``), which
+lets the executor track which upstream outputs a node actually depends on.
 """
 
+import ast
 import json
 import os
 import re
+import threading
+from collections.abc import Iterator, Mapping
+from functools import lru_cache
 from typing import Any
 
 from simpleeval import EvalWithCompoundTypes
@@ -23,16 +35,46 @@ TEMPLATE_RE = re.compile(r"\{\{(.*?)\}\}", re.DOTALL)
 SIMPLE_PATH_RE = re.compile(r"^[A-Za-z_]\w*(?:\.\w+|\[\d+\])*$")
 SEGMENT_RE = re.compile(r"([A-Za-z_]\w*)|\[(\d+)\]")
 
+TEMPLATE_CACHE_SIZE = 8192
+
+# Names every node can reference that are not upstream node outputs.
+BUILTIN_NAMES = frozenset({"input", "env"})
+
+
+class Scope(Mapping):
+    """Read-only view of the shared outputs mapping plus a per-node overlay.
+
+    Replaces copying every upstream output into a fresh dict for each node:
+    lookups check the overlay (e.g. ``input``) first, then the shared outputs.
+    """
+
+    __slots__ = ("_base", "_overlay")
+
+    def __init__(self, base: Mapping[str, Any], **overlay: Any):
+        self._base = base
+        self._overlay = overlay
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overlay:
+            return self._overlay[key]
+        return self._base[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._overlay or key in self._base
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._overlay
+        yield from (k for k in self._base if k not in self._overlay)
+
+    def __len__(self) -> int:
+        return len(self._overlay) + sum(1 for k in self._base if k not in self._overlay)
+
 
 def _env_allowed(name: str) -> bool:
     return name.endswith(ENV_ALLOWED_SUFFIXES) or name.startswith(ENV_ALLOWED_PREFIXES)
 
 
-def _resolve_path(expr: str, scope: dict[str, Any]) -> Any:
-    segments: list[str | int] = []
-    for key, index in SEGMENT_RE.findall(expr):
-        segments.append(int(index) if index else key)
-
+def _resolve_path(expr: str, segments: tuple[str | int, ...], scope: Mapping[str, Any]) -> Any:
     root = segments[0]
     if root == "env":
         if len(segments) != 2 or not isinstance(segments[1], str):
@@ -69,20 +111,77 @@ def _resolve_path(expr: str, scope: dict[str, Any]) -> Any:
     return value
 
 
-def resolve_expression(expr: str, scope: dict[str, Any]) -> Any:
+# Building an evaluator sets up operator/function tables; reuse one per thread
+# and only swap its names for each evaluation.
+_evaluators = threading.local()
+
+
+def _evaluator() -> EvalWithCompoundTypes:
+    evaluator = getattr(_evaluators, "instance", None)
+    if evaluator is None:
+        evaluator = _evaluators.instance = EvalWithCompoundTypes()
+    return evaluator
+
+
+class _PathAccessor:
+    __slots__ = ("expr", "refs", "segments")
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.segments = tuple(
+            int(index) if index else key for key, index in SEGMENT_RE.findall(expr)
+        )
+        self.refs = frozenset({self.segments[0]})
+
+    def evaluate(self, scope: Mapping[str, Any]) -> Any:
+        return _resolve_path(self.expr, self.segments, scope)
+
+
+class _ExpressionAccessor:
+    __slots__ = ("error", "expr", "parsed", "refs")
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.parsed = None
+        self.error: str | None = None
+        self.refs: frozenset[str] = frozenset()
+        if not expr:
+            self.error = "Empty template expression"
+            return
+        try:
+            self.parsed = EvalWithCompoundTypes.parse(expr)
+        except Exception as e:
+            self.error = f"Could not evaluate {{{{ {expr} }}}}: {e}"
+            return
+        self.refs = frozenset(n.id for n in ast.walk(self.parsed) if isinstance(n, ast.Name))
+
+    def evaluate(self, scope: Mapping[str, Any]) -> Any:
+        if self.error is not None:
+            raise TemplateError(self.error)
+        # Fall back to a sandboxed expression evaluator for arithmetic/comparisons.
+        # The scope is read-only, so the evaluator can look names up in it directly.
+        evaluator = _evaluator()
+        evaluator.names = scope
+        try:
+            return evaluator.eval(self.expr, previously_parsed=self.parsed)
+        except TemplateError:
+            raise
+        except Exception as e:
+            raise TemplateError(f"Could not evaluate {{{{ {self.expr} }}}}: {e}") from None
+        finally:
+            evaluator.names = {}
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_expression(expr: str) -> _PathAccessor | _ExpressionAccessor:
     expr = expr.strip()
-    if not expr:
-        raise TemplateError("Empty template expression")
-    if SIMPLE_PATH_RE.match(expr):
-        return _resolve_path(expr, scope)
-    # Fall back to a sandboxed expression evaluator for arithmetic/comparisons.
-    try:
-        evaluator = EvalWithCompoundTypes(names=dict(scope))
-        return evaluator.eval(expr)
-    except TemplateError:
-        raise
-    except Exception as e:
-        raise TemplateError(f"Could not evaluate {{{{ {expr} }}}}: {e}") from None
+    if expr and SIMPLE_PATH_RE.match(expr):
+        return _PathAccessor(expr)
+    return _ExpressionAccessor(expr)
+
+
+def resolve_expression(expr: str, scope: Mapping[str, Any]) -> Any:
+    return compile_expression(expr).evaluate(scope)
 
 
 def _stringify(value: Any) -> str:
@@ -93,23 +192,104 @@ def _stringify(value: Any) -> str:
     return str(value)
 
 
-def render_string(text: str, scope: dict[str, Any]) -> Any:
-    matches = list(TEMPLATE_RE.finditer(text))
-    if not matches:
-        return text
-    # Whole string is a single template -> return the raw typed value.
-    if len(matches) == 1 and matches[0].span() == (0, len(text.strip())) and text.strip() == text:
-        return resolve_expression(matches[0].group(1), scope)
-    if len(matches) == 1 and text.strip() == matches[0].group(0):
-        return resolve_expression(matches[0].group(1), scope)
-    return TEMPLATE_RE.sub(lambda m: _stringify(resolve_expression(m.group(1), scope)), text)
+class CompiledString:
+    """A config string split into literal chunks and accessors."""
+
+    __slots__ = ("parts", "refs", "text", "whole")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.whole = None
+        self.parts: tuple = ()
+        self.refs: frozenset[str] = frozenset()
+        matches = list(TEMPLATE_RE.finditer(text))
+        if not matches:
+            return
+        # Whole string is a single template -> render to the raw typed value.
+        if len(matches) == 1 and text.strip() == matches[0].group(0):
+            self.whole = compile_expression(matches[0].group(1))
+            self.refs = self.whole.refs
+            return
+        parts: list = []
+        pos = 0
+        for m in matches:
+            if m.start() > pos:
+                parts.append(text[pos : m.start()])
+            parts.append(compile_expression(m.group(1)))
+            pos = m.end()
+        if pos < len(text):
+            parts.append(text[pos:])
+        self.parts = tuple(parts)
+        self.refs = frozenset().union(*(p.refs for p in parts if not isinstance(p, str)))
+
+    def render(self, scope: Mapping[str, Any]) -> Any:
+        if self.whole is not None:
+            return self.whole.evaluate(scope)
+        if not self.parts:
+            return self.text
+        return "".join(
+            part if isinstance(part, str) else _stringify(part.evaluate(scope))
+            for part in self.parts
+        )
+
+
+def _union_refs(items) -> frozenset[str]:
+    return frozenset().union(*(item.refs for item in items))
+
+
+class _CompiledDict:
+    __slots__ = ("items", "refs")
+
+    def __init__(self, items: tuple):
+        self.items = items
+        self.refs = _union_refs(v for _, v in items)
+
+    def render(self, scope: Mapping[str, Any]) -> dict:
+        return {k: v.render(scope) for k, v in self.items}
+
+
+class _CompiledList:
+    __slots__ = ("items", "refs")
 
+    def __init__(self, items: tuple):
+        self.items = items
+        self.refs = _union_refs(items)
 
-def render_config(value: Any, scope: dict[str, Any]) -> Any:
+    def render(self, scope: Mapping[str, Any]) -> list:
+        return [item.render(scope) for item in self.items]
+
+
+class _Constant:
+    __slots__ = ("value",)
+
+    refs: frozenset[str] = frozenset()
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def render(self, scope: Mapping[str, Any]) -> Any:
+        return self.value
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_string(text: str) -> CompiledString:
+    return CompiledString(text)
+
+
+def compile_config(value: Any):
+    """Compile a config tree; the result's render(scope) returns fresh containers."""
     if isinstance(value, str):
-        return render_string(value, scope)
+        return compile_string(value)
     if isinstance(value, dict):
-        return {k: render_config(v, scope) for k, v in value.items()}
+        return _CompiledDict(tuple((k, compile_config(v)) for k, v in value.items()))
     if isinstance(value, list):
-        return [render_config(item, scope) for item in value]
-    return value
+        return _CompiledList(tuple(compile_config(item) for item in value))
+    return _Constant(value)
+
+
+def render_string(text: str, scope: Mapping[str, Any]) -> Any:
+    return compile_string(text).render(scope)
+
+
+def render_config(value: Any, scope: Mapping[str, Any]) -> Any:
+    return compile_config(value).render(scope)
@@ -0,0 +1,93 @@
+"""Saved workflow definitions for runs started by id (POST /api/workflows/{id}/run).
+
+A saved definition was validated when it was stored, so a run by id only needs
+the parsed JSON. The last ``DEFINITION_CACHE_SIZE`` of them are kept per
+process, and each one is pinned in the plan cache so starting a run neither
+parses nor hashes the definition again. Saving or deleting a workflow
+invalidates its entry. Entries also expire after ``CACHE_MAX_SECONDS``, which
+bounds how long an edit made through another API process can go unseen.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from app.db import SessionLocal
+from app.engine.plan import plan_cache
+from app.models import Workflow
+
+DEFINITION_CACHE_SIZE = 256
+CACHE_MAX_SECONDS = 300
+
+
+class SavedWorkflow(NamedTuple):
+    id: int
+    user_id: int
+    name: str
+    definition: dict
+
+
+def _load(workflow_id: int) -> SavedWorkflow | None:
+    db = SessionLocal()
+    try:
+        w = db.get(Workflow, workflow_id)
+        if w is None:
+            return None
+        return SavedWorkflow(w.id, w.user_id, w.name, json.loads(w.data))
+    finally:
+        db.close()
+
+
+class DefinitionCache:
+    def __init__(self, max_size: int = DEFINITION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[int, tuple[float, SavedWorkflow]] = OrderedDict()
+        # Bumped on invalidation so a load already in flight does not cache stale data.
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()  # invalidate() is called from request threads
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, workflow_id: int) -> SavedWorkflow | None:
+        with self._lock:
+            cached = self._entries.get(workflow_id)
+            if cached is not None and cached[0] > time.monotonic():
+                self._entries.move_to_end(workflow_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self._generations.get(workflow_id, 0)
+        saved = await asyncio.to_thread(_load, workflow_id)
+        if saved is None:
+            return None
+        plan_cache.pin(saved.definition)
+        evicted = []
+        with self._lock:
+            if self._generations.get(workflow_id, 0) != generation:
+                evicted.append(saved)  # edited meanwhile: serve this once, keep nothing
+            else:
+                previous = self._entries.pop(workflow_id, None)
+                if previous is not None:
+                    evicted.append(previous[1])
+                self._entries[workflow_id] = (time.monotonic() + CACHE_MAX_SECONDS, saved)
+                while len(self._entries) > self.max_size:
+                    evicted.append(self._entries.popitem(last=False)[1][1])
+        for old in evicted:
+            plan_cache.unpin(old.definition)
+        return saved
+
+    def invalidate(self, workflow_id: int) -> None:
+        with self._lock:
+            self._generations[workflow_id] = self._generations.get(workflow_id, 0) + 1
+            cached = self._entries.pop(workflow_id, None)
+        if cached is not None:
+            plan_cache.unpin(cached[1].definition)
+
+    def stats(self) -> dict[str, Any]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+definition_cache = DefinitionCache()
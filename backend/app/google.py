@@ -8,7 +8,7 @@ import time
 from typing import Any
 from urllib.parse import urlencode
 
-import httpx
+from app.http import get_client
 
 AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 TOKEN_URL = "https://oauth2.googleapis.com/token"
@@ -55,17 +55,17 @@ def build_auth_url(client_id: str, redirect_uri: str, scopes: list[str], state:
 async def exchange_code(
     client_id: str, client_secret: str, code: str, redirect_uri: str
 ) -> dict[str, Any]:
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.post(
-            TOKEN_URL,
-            data={
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": redirect_uri,
-            },
-        )
+    response = await get_client().post(
+        TOKEN_URL,
+        data={
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": redirect_uri,
+        },
+        timeout=30,
+    )
     if response.status_code != 200:
         raise GoogleOAuthError(
             f"Token exchange failed ({response.status_code}): {response.text[:300]}"
@@ -76,16 +76,16 @@ async def exchange_code(
 async def refresh_access_token(
     client_id: str, client_secret: str, refresh_token: str
 ) -> dict[str, Any]:
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.post(
-            TOKEN_URL,
-            data={
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "refresh_token": refresh_token,
-                "grant_type": "refresh_token",
-            },
-        )
+    response = await get_client().post(
+        TOKEN_URL,
+        data={
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "refresh_token": refresh_token,
+            "grant_type": "refresh_token",
+        },
+        timeout=30,
+    )
     if response.status_code != 200:
         raise GoogleOAuthError(
             f"Token refresh failed ({response.status_code}): {response.text[:300]}. "
@@ -95,10 +95,9 @@ async def refresh_access_token(
 
 
 async def fetch_account_email(access_token: str) -> str:
-    async with httpx.AsyncClient(timeout=30) as client:
-        response = await client.get(
-            USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"}
-        )
+    response = await get_client().get(
+        USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=30
+    )
     if response.status_code != 200:
         return ""
     return response.json().get("email", "")
@@ -0,0 +1,75 @@
+"""Shared outbound HTTP clients.
+
+Creating an ``httpx.AsyncClient`` per call pays a fresh TCP + TLS handshake for
+every request. Instead, every caller (HTTP Request, LLM, Google nodes, OAuth)
+borrows a long-lived client with a keep-alive connection pool.
+
+There is one client per redirect policy (and per injected transport, which the
+Google tests use); timeouts are passed per request so calls with different
+timeouts still share connections. Clients belong to the event loop that created
+them, are sized by ``config.HTTP_*``, optionally speak HTTP/2, and are closed by
+``close_clients()`` (the FastAPI lifespan / worker shutdown). They never store
+cookies: a ``Set-Cookie`` answered to one run must not be sent on behalf of another.
+"""
+
+import asyncio
+import logging
+import weakref
+from functools import cache
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+
+# event loop -> {(follow_redirects, transport): client}
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+@cache
+def _use_http2() -> bool:
+    if not config.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("SWARM_HTTP2=1 but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def get_client(
+    *, follow_redirects: bool = False, transport: httpx.AsyncBaseTransport | None = None
+) -> httpx.AsyncClient:
+    """The shared client for this event loop and redirect policy (do not close it)."""
+    loop = asyncio.get_running_loop()
+    pool = _clients.get(loop)
+    if pool is None:
+        pool = _clients[loop] = {}
+    key = (follow_redirects, transport)
+    client = pool.get(key)
+    if client is None or client.is_closed:
+        client = pool[key] = httpx.AsyncClient(
+            follow_redirects=follow_redirects,
+            timeout=DEFAULT_TIMEOUT,
+            cookies=CookieJar(DefaultCookiePolicy(allowed_domains=[])),  # accepts none
+            transport=transport,
+            http2=_use_http2() if transport is None else False,
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS or None,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return client
+
+
+async def close_clients() -> None:
+    """Close every shared client created on the running event loop."""
+    pool = _clients.pop(asyncio.get_running_loop(), {})
+    for client in pool.values():
+        await client.aclose()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import UTC, datetime
@@ -6,28 +7,52 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import select
 
 from app.config import FRONTEND_DIST
-from app.db import SessionLocal, init_db
+from app.db import SessionLocal, init_db, write_queue
+from app.engine.events import purge_stale_spills
+from app.engine.hooks import hooks
 from app.engine.registry import get_registry
-from app.models import Execution
-from app.routes import auth_routes, credential_routes, node_routes, run_routes, workflow_routes
+from app.engine.retention import compaction_loop
+from app.engine.scheduler import scheduler_loop
+from app.http import close_clients
+from app.models import Execution, RunJob
+from app.nodes._files import close_writers
+from app.routes import (
+    auth_routes,
+    credential_routes,
+    hook_routes,
+    node_routes,
+    run_routes,
+    workflow_routes,
+)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
 def _mark_interrupted_runs() -> None:
-    """Runs left in 'running' state by a previous process crash can never finish."""
+    """Runs left in 'running' state by a previous process crash can never finish.
+
+    Queued runs are the exception: their job is still waiting for (or held by) a
+    worker process, which survives an API restart. Interrupted runs keep their
+    node checkpoints and can be continued with POST /api/executions/{id}/resume.
+    """
     db = SessionLocal()
     try:
+        in_queue = select(RunJob.id).where(RunJob.status.in_(("queued", "claimed")))
         stale = (
             db.query(Execution)
-            .filter(Execution.status == "running")
-            .update({"status": "interrupted", "finished_at": datetime.now(UTC)})
+            .filter(Execution.status == "running", Execution.id.not_in(in_queue))
+            .update(
+                {"status": "interrupted", "finished_at": datetime.now(UTC)},
+                synchronize_session=False,
+            )
         )
+        db.query(RunJob).filter(RunJob.status == "local").update({"status": "done"})
+        db.commit()
         if stale:
-            db.commit()
             logger.info("Marked %d orphaned run(s) as interrupted", stale)
     finally:
         db.close()
@@ -38,7 +63,18 @@ async def lifespan(app: FastAPI):
     init_db()
     get_registry()
     _mark_interrupted_runs()
+    purge_stale_spills()
+    compaction = asyncio.create_task(compaction_loop())
+    schedules = asyncio.create_task(scheduler_loop())
+    webhooks = asyncio.create_task(hooks.run())
     yield
+    compaction.cancel()
+    schedules.cancel()
+    await hooks.shutdown()  # start runs for payloads already answered with 202
+    webhooks.cancel()
+    await write_queue.flush()
+    await close_clients()
+    await asyncio.to_thread(close_writers)
 
 
 app = FastAPI(title="Project Swarm", version="2.0.0", lifespan=lifespan)
@@ -57,6 +93,7 @@ app.include_router(workflow_routes.router)
 app.include_router(run_routes.router)
 app.include_router(node_routes.router)
 app.include_router(credential_routes.router)
+app.include_router(hook_routes.router)
 
 
 if FRONTEND_DIST.exists():
@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -57,12 +57,127 @@ class Credential(Base):
 
 class Execution(Base):
     __tablename__ = "executions"
+    __table_args__ = (
+        Index("ix_executions_user_started", "user_id", "started_at"),
+        Index("ix_executions_user_workflow_started", "user_id", "workflow_id", "started_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)  # run uuid
     workflow_id: Mapped[int | None] = mapped_column(ForeignKey("workflows.id"), nullable=True)
     workflow_name: Mapped[str] = mapped_column(String(128), default="")
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))  # indexed with started_at
     status: Mapped[str] = mapped_column(String(16), default="running")
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    summary: Mapped[str] = mapped_column(Text, default="{}")  # node statuses/outputs/logs JSON
+    summary: Mapped[str] = mapped_column(Text, default="{}")  # run-level result JSON
+
+
+class RetentionPolicy(Base):
+    """How long a user's execution history is kept; workflow_id=None is the user's
+    default, a workflow's row overrides it. None fields inherit, 0 = no limit."""
+
+    __tablename__ = "retention_policies"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    workflow_id: Mapped[int | None] = mapped_column(ForeignKey("workflows.id"), nullable=True)
+    max_age_days: Mapped[int | None] = mapped_column(nullable=True)
+    max_count: Mapped[int | None] = mapped_column(nullable=True)
+    failure_max_age_days: Mapped[int | None] = mapped_column(nullable=True)
+
+
+class ScheduleState(Base):
+    """The last tick the scheduler fired for a workflow's schedule_trigger, so ticks
+    missed while the server was down can be caught up after a restart."""
+
+    __tablename__ = "schedule_states"
+
+    workflow_id: Mapped[int] = mapped_column(ForeignKey("workflows.id"), primary_key=True)
+    last_tick_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class RunJob(Base):
+    """What to execute for a run, plus its queue state.
+
+    status: "local" (executing inside the API process), "queued" (waiting for a
+    worker), "claimed" (a worker holds the lease) or "done".
+    """
+
+    __tablename__ = "run_jobs"
+    __table_args__ = (Index("ix_run_jobs_status_created", "status", "created_at"),)
+
+    id: Mapped[str] = mapped_column(ForeignKey("executions.id"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    definition: Mapped[str] = mapped_column(Text)  # workflow definition JSON
+    run_input: Mapped[str] = mapped_column(Text, default="null")  # JSON
+    status: Mapped[str] = mapped_column(String(16), default="queued")
+    worker: Mapped[str] = mapped_column(String(64), default="")
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    cancel_requested: Mapped[bool] = mapped_column(default=False)
+    use_cache: Mapped[bool] = mapped_column(default=False)  # reuse cached node results
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+
+
+class RunEvent(Base):
+    """Run events written by a worker process, relayed to subscribers by the API process."""
+
+    __tablename__ = "run_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    execution_id: Mapped[str] = mapped_column(String(36), index=True)
+    data: Mapped[str] = mapped_column(Text)  # event JSON
+
+
+class ExecutionNode(Base):
+    """Final state of one node within an execution.
+
+    Successful nodes are written as they finish and double as checkpoints: the
+    full output and the handles it fired determine the edge states, so a resumed
+    run replays them instead of re-executing nodes. Rows for the other states
+    (error, skipped, ...) are written with the run's outcome.
+    """
+
+    __tablename__ = "execution_nodes"
+    __table_args__ = (UniqueConstraint("execution_id", "node_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    execution_id: Mapped[str] = mapped_column(ForeignKey("executions.id"), index=True)
+    node_id: Mapped[str] = mapped_column(String(128))
+    status: Mapped[str] = mapped_column(String(16), default="success")
+    output: Mapped[str] = mapped_column(Text, default="null")  # full output JSON, if inline
+    output_hash: Mapped[str | None] = mapped_column(  # else the OutputBlob holding it
+        String(64), nullable=True
+    )
+    error: Mapped[str] = mapped_column(Text, default="")
+    handles: Mapped[str] = mapped_column(Text, default="null")  # JSON list, null = all
+    elapsed_ms: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+
+
+class ExecutionLog(Base):
+    """A log line written by a node; ids give the order and serve as paging cursors."""
+
+    __tablename__ = "execution_logs"
+    __table_args__ = (Index("ix_execution_logs_execution_node", "execution_id", "node_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    execution_id: Mapped[str] = mapped_column(ForeignKey("executions.id"), index=True)
+    node_id: Mapped[str] = mapped_column(String(128), default="")
+    level: Mapped[str] = mapped_column(String(16), default="info")
+    message: Mapped[str] = mapped_column(Text)
+
+
+class OutputBlob(Base):
+    """A compressed node output under instance/outputs, shared by every node row with
+    identical content; the file is removed once no row references it."""
+
+    __tablename__ = "output_blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of the JSON
+    size: Mapped[int] = mapped_column(default=0)  # JSON bytes
+    stored_size: Mapped[int] = mapped_column(default=0)  # compressed bytes
+    refs: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
@@ -1,10 +1,39 @@
-"""Shared path sandboxing for file nodes (underscore prefix = not a node)."""
+"""Shared helpers for file nodes (underscore prefix = not a node): path sandboxing,
+atomic replacement and the per-path append writer.
 
+Appends go through one ``AppendWriter`` per path. Concurrent runs queue their
+bytes and whichever caller finds the writer idle drains the queue into a single
+``write`` in a worker thread (a group commit, like ``db.write_queue``), so
+records from different runs never interleave and the file is opened once, not
+per append. Written data is fsynced within ``FSYNC_INTERVAL`` seconds (by the
+next drain, or by a timer once appends stop) and by ``close_writers()`` on
+shutdown, which first waits for a drain still in progress.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, InvalidStateError
 from pathlib import Path
+from typing import IO
 
 from app.config import ALLOW_ANY_PATH, FILES_DIR
 from app.engine.types import NodeExecutionError
 
+logger = logging.getLogger(__name__)
+
+FSYNC_INTERVAL = 1.0
+CLOSE_TIMEOUT = 10.0  # how long close() waits for a drain still writing
+MAX_OPEN_WRITERS = 64  # idle append writers beyond this are closed, oldest first
+
+Relayout = Callable[[bytes], bytes]  # re-renders appended data for the file's header line
+
 
 def resolve_sandboxed(path_str: str) -> Path:
     if not path_str or not str(path_str).strip():
@@ -19,3 +48,196 @@ def resolve_sandboxed(path_str: str) -> Path:
             "Use a relative path, or set SWARM_ALLOW_ANY_PATH=1 to disable the sandbox."
         )
     return p
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace `path` with `data`; readers see the old file or the new one, never half."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+        raise
+
+
+class AppendWriter:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending: list[tuple[bytes, bytes, Relayout | None, Future]] = []
+        # Set while a thread owns the file (a drain or a deferred fsync); only that
+        # thread touches _file, so close() waits for it to clear.
+        self._draining = False
+        self._file: IO[bytes] | None = None
+        self._head: bytes | None = None  # the file's header line, read when needed
+        self._synced = time.monotonic()
+        self._dirty = False  # written since the last fsync
+        self._timer: threading.Timer | None = None
+        self.writes = 0  # write() calls, each covering one or more appends
+
+    async def append(
+        self, data: bytes, header: bytes = b"", relayout: Relayout | None = None
+    ) -> None:
+        """Append `data`, preceded by `header` if the file is empty.
+
+        If the file already starts with a different header, `data` is replaced by
+        ``relayout(file_header)``; whatever that raises fails this append only.
+        """
+        done: Future = Future()
+        with self._lock:
+            self._pending.append((data, header, relayout, done))
+            leader = not self._draining
+            self._draining = True
+        if leader:
+            # Shielded: a cancelled leader (node timeout, run cancel) must not drop the
+            # drain job before it starts, or _draining would stay set and every later
+            # append to this path would wait forever.
+            drain = asyncio.get_running_loop().run_in_executor(None, self._drain)
+            await asyncio.shield(drain)
+        await asyncio.shield(asyncio.wrap_future(done))
+
+    def _open(self) -> IO[bytes]:
+        # Reopen if the file was replaced or removed (log rotation, an overwrite).
+        if self._file is not None:
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(self._file.fileno()).st_ino:
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")  # noqa: SIM115  (kept open between drains)
+            self._head = None
+        return self._file
+
+    def _header(self) -> bytes:
+        if self._head is None:
+            with open(self.path, "rb") as r:
+                self._head = r.readline()
+        return self._head
+
+    def _lay_out(self, f: IO[bytes], batch: list) -> tuple[bytes, list[Future]]:
+        """The bytes to write for `batch` and the appends they cover."""
+        chunks, covered = [], []
+        if f.tell() == 0:
+            self._head = next((h for _, h, _, _ in batch if h), b"")
+            chunks.append(self._head)
+        for data, header, relayout, done in batch:
+            if header and relayout is not None and header != self._header():
+                try:
+                    data = relayout(self._header())
+                except Exception as e:
+                    with contextlib.suppress(InvalidStateError):
+                        done.set_exception(e)
+                    continue
+            chunks.append(data)
+            covered.append(done)
+        return b"".join(chunks), covered
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._draining = False
+                    if self._dirty and self._timer is None:
+                        # Nothing follows to fsync these writes: do it when the interval ends.
+                        delay = FSYNC_INTERVAL - (time.monotonic() - self._synced)
+                        self._timer = threading.Timer(max(delay, 0), self._sync_later)
+                        self._timer.daemon = True
+                        self._timer.start()
+                    self._idle.notify_all()
+                    return
+            covered = [done for *_, done in batch]
+            try:
+                f = self._open()
+                data, covered = self._lay_out(f, batch)
+                f.write(data)
+                f.flush()
+                self._dirty = True
+                self.writes += 1
+                if time.monotonic() - self._synced >= FSYNC_INTERVAL:
+                    self._sync(f)
+            except Exception as e:
+                for done in covered:
+                    with contextlib.suppress(InvalidStateError):
+                        done.set_exception(e)
+            else:
+                for done in covered:
+                    with contextlib.suppress(InvalidStateError):  # waiter gave up
+                        done.set_result(None)
+
+    def _sync(self, f: IO[bytes]) -> None:
+        os.fsync(f.fileno())
+        self._synced = time.monotonic()
+        self._dirty = False
+
+    def _sync_later(self) -> None:
+        with self._lock:
+            self._timer = None
+            if self._draining:
+                return  # that drain syncs, or schedules this again
+            self._draining = True
+        try:
+            if self._file is not None and self._dirty:
+                self._sync(self._file)
+        except OSError:
+            logger.warning("Could not fsync %s", self.path, exc_info=True)
+        finally:
+            self._drain()  # appends queued meanwhile; also clears _draining
+
+    @property
+    def idle(self) -> bool:
+        return not self._draining and not self._pending
+
+    def close(self, sync: bool = True) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # A drain still writing (its caller may have been cancelled) finishes first.
+            if not self._idle.wait_for(lambda: not self._draining, timeout=CLOSE_TIMEOUT):
+                logger.warning("Append writer for %s is still busy; not closing it", self.path)
+                return
+            if self._file is not None:
+                self._file.flush()
+                if sync and self._dirty:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._dirty = False
+
+
+_writers: OrderedDict[Path, AppendWriter] = OrderedDict()
+_writers_lock = threading.Lock()
+
+
+def append_writer(path: Path) -> AppendWriter:
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = AppendWriter(path)
+        _writers.move_to_end(path)
+        for stale in list(_writers)[: max(len(_writers) - MAX_OPEN_WRITERS, 0)]:
+            if _writers[stale].idle:
+                _writers.pop(stale).close(sync=False)
+        return writer
+
+
+def close_writers() -> None:
+    """Flush, fsync and close every append writer (the FastAPI lifespan / worker shutdown)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        with contextlib.suppress(OSError):
+            writer.close()
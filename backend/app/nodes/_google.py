@@ -6,6 +6,7 @@ from typing import Any
 import httpx
 
 from app.engine.types import NodeContext, NodeExecutionError
+from app.http import get_client
 
 CREDENTIAL_FIELD = {
     "key": "credential",
@@ -27,6 +28,11 @@ def _error_message(response: httpx.Response) -> str:
         return response.text[:200]
 
 
+async def resolve_credential(ctx: NodeContext) -> dict:
+    """The node's Google credential; resolve once when making several calls."""
+    return await ctx.get_credential(ctx.config.get("credential"))
+
+
 async def google_api(
     ctx: NodeContext,
     method: str,
@@ -36,19 +42,25 @@ async def google_api(
     json_body: Any = None,
     content: bytes | None = None,
     headers: dict | None = None,
+    credential: dict | None = None,
 ) -> dict:
-    cred = await ctx.get_credential(ctx.config.get("credential"))
+    cred = credential or await resolve_credential(ctx)
     request_headers = {"Authorization": f"Bearer {cred['access_token']}"}
     if headers:
         request_headers.update(headers)
 
-    async with httpx.AsyncClient(timeout=60, transport=TRANSPORT) as client:
-        try:
-            response = await client.request(
-                method, url, params=params, json=json_body, content=content, headers=request_headers
-            )
-        except httpx.HTTPError as e:
-            raise NodeExecutionError(f"Google API request failed: {e}") from None
+    try:
+        response = await get_client(transport=TRANSPORT).request(
+            method,
+            url,
+            params=params,
+            json=json_body,
+            content=content,
+            headers=request_headers,
+            timeout=60,
+        )
+    except httpx.HTTPError as e:
+        raise NodeExecutionError(f"Google API request failed: {e}") from None
 
     if response.status_code == 401:
         raise NodeExecutionError(
@@ -1,7 +1,8 @@
+import asyncio
 import base64
 
 from app.engine.types import NodeContext
-from app.nodes._google import CREDENTIAL_FIELD, google_api
+from app.nodes._google import CREDENTIAL_FIELD, google_api, resolve_credential
 
 NODE_TYPE = "gmail_read"
 NODE_NAME = "Gmail: Read"
@@ -14,6 +15,9 @@ NODE_OUTPUTS = ["out"]
 NODE_TIMEOUT = 120
 
 GMAIL = "https://gmail.googleapis.com/gmail/v1"
+MAX_MESSAGES = 500
+PAGE_SIZE = 500  # Gmail's own cap per list page
+FETCH_CONCURRENCY = 10  # message detail requests in flight at once
 
 CONFIG_FIELDS = [
     CREDENTIAL_FIELD,
@@ -30,7 +34,7 @@ CONFIG_FIELDS = [
         "type": "number",
         "default": 10,
         "min": 1,
-        "max": 50,
+        "max": MAX_MESSAGES,
     },
     {"key": "include_body", "label": "Include message body", "type": "boolean", "default": True},
 ]
@@ -64,40 +68,67 @@ def _header(headers: list[dict], name: str) -> str:
     return ""
 
 
+def _message(detail: dict, include_body: bool) -> dict:
+    payload = detail.get("payload", {})
+    headers = payload.get("headers", [])
+    message = {
+        "id": detail.get("id"),
+        "thread_id": detail.get("threadId"),
+        "from": _header(headers, "From"),
+        "to": _header(headers, "To"),
+        "subject": _header(headers, "Subject"),
+        "date": _header(headers, "Date"),
+        "snippet": detail.get("snippet", ""),
+        "labels": detail.get("labelIds", []),
+    }
+    if include_body:
+        message["body"] = _extract_body(payload)
+    return message
+
+
 async def run(ctx: NodeContext):
-    max_results = min(max(int(ctx.config.get("max_results") or 10), 1), 50)
-    params: dict = {"maxResults": max_results}
+    max_results = min(max(int(ctx.config.get("max_results") or 10), 1), MAX_MESSAGES)
     query = str(ctx.config.get("query") or "").strip()
-    if query:
-        params["q"] = query
+    credential = await resolve_credential(ctx)
 
-    listing = await google_api(ctx, "GET", f"{GMAIL}/users/me/messages", params=params)
-    ids = [m["id"] for m in listing.get("messages", [])]
+    ids: list[str] = []
+    page_token = None
+    while len(ids) < max_results:
+        params: dict = {"maxResults": min(max_results - len(ids), PAGE_SIZE)}
+        if query:
+            params["q"] = query
+        if page_token:
+            params["pageToken"] = page_token
+        listing = await google_api(
+            ctx, "GET", f"{GMAIL}/users/me/messages", params=params, credential=credential
+        )
+        ids.extend(m["id"] for m in listing.get("messages", []))
+        page_token = listing.get("nextPageToken")
+        if not page_token:
+            break
+    ids = ids[:max_results]
     ctx.log("info", f"Found {len(ids)} message(s)")
 
     include_body = ctx.config.get("include_body", True)
-    messages = []
-    for message_id in ids:
-        detail = await google_api(
-            ctx,
-            "GET",
-            f"{GMAIL}/users/me/messages/{message_id}",
-            params={"format": "full" if include_body else "metadata"},
-        )
-        payload = detail.get("payload", {})
-        headers = payload.get("headers", [])
-        message = {
-            "id": detail.get("id"),
-            "thread_id": detail.get("threadId"),
-            "from": _header(headers, "From"),
-            "to": _header(headers, "To"),
-            "subject": _header(headers, "Subject"),
-            "date": _header(headers, "Date"),
-            "snippet": detail.get("snippet", ""),
-            "labels": detail.get("labelIds", []),
-        }
-        if include_body:
-            message["body"] = _extract_body(payload)
-        messages.append(message)
+    detail_params = {"format": "full" if include_body else "metadata"}
+    slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch(message_id: str) -> dict:
+        async with slots:
+            detail = await google_api(
+                ctx,
+                "GET",
+                f"{GMAIL}/users/me/messages/{message_id}",
+                params=detail_params,
+                credential=credential,
+            )
+        return _message(detail, include_body)
 
+    tasks = [asyncio.create_task(fetch(message_id)) for message_id in ids]
+    try:
+        messages = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:  # one fetch failed: the rest would only be thrown away
+            task.cancel()
+        raise
     return {"count": len(messages), "messages": messages}
@@ -3,6 +3,7 @@ import json
 import httpx
 
 from app.engine.types import NodeContext, NodeExecutionError
+from app.http import get_client
 
 NODE_TYPE = "http_request"
 NODE_NAME = "HTTP Request"
@@ -13,6 +14,7 @@ NODE_ICON = "globe"
 NODE_INPUTS = ["in"]
 NODE_OUTPUTS = ["out"]
 NODE_TIMEOUT = 150
+NODE_CONCURRENCY = 32
 
 CONFIG_FIELDS = [
     {
@@ -72,6 +74,14 @@ CONFIG_FIELDS = [
 ]
 
 
+def _cache_ttl(config: dict) -> float:
+    # Only reads are safe to replay from the cache.
+    return 300 if (config.get("method") or "GET").upper() in ("GET", "HEAD") else 0
+
+
+NODE_CACHEABLE = _cache_ttl  # only used by runs started with use_cache
+
+
 def _parse_json_field(value, field_name):
     if value in (None, ""):
         return None
@@ -103,10 +113,15 @@ async def run(ctx: NodeContext):
 
     ctx.log("info", f"{method} {url}")
     try:
-        async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as client:
-            response = await client.request(
-                method, url, headers=headers, params=params, json=json_body, content=text_body
-            )
+        response = await get_client(follow_redirects=True).request(
+            method,
+            url,
+            headers=headers,
+            params=params,
+            json=json_body,
+            content=text_body,
+            timeout=timeout,
+        )
     except httpx.TimeoutException:
         raise NodeExecutionError(f"Request to {url} timed out after {timeout:.0f}s") from None
     except httpx.HTTPError as e:
@@ -4,6 +4,7 @@ import os
 import httpx
 
 from app.engine.types import NodeContext, NodeExecutionError
+from app.http import get_client
 
 NODE_TYPE = "llm"
 NODE_NAME = "LLM"
@@ -16,6 +17,8 @@ NODE_ICON = "sparkles"
 NODE_INPUTS = ["in"]
 NODE_OUTPUTS = ["out"]
 NODE_TIMEOUT = 300
+NODE_CONCURRENCY = 4
+NODE_CACHEABLE = 3600  # seconds; only used by runs started with use_cache
 
 PROVIDERS = {
     "openai": {
@@ -140,10 +143,9 @@ async def run(ctx: NodeContext):
 
     ctx.log("info", f"Calling {provider_key} model {model}")
     try:
-        async with httpx.AsyncClient(timeout=280) as client:
-            response = await client.post(
-                f"{base_url}/chat/completions", headers=headers, json=payload
-            )
+        response = await get_client().post(
+            f"{base_url}/chat/completions", headers=headers, json=payload, timeout=280
+        )
     except httpx.TimeoutException:
         raise NodeExecutionError("LLM request timed out") from None
     except httpx.HTTPError as e:
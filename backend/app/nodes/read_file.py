@@ -1,17 +1,39 @@
+"""Read a file from the data/ sandbox.
+
+``text`` and ``json`` load the file as one value, as does ``auto``. The record formats
+(``lines``, ``jsonl``, ``csv``) stream it line by line and return a window of
+records (``offset`` / ``limit`` / ``max_bytes``), so memory follows the window,
+not the file. ``offset`` counts source rows, including blank JSON Lines, and
+``next_offset`` is the row the next page starts at. Records are split on
+``\n`` bytes before decoding, so they need an ASCII-compatible encoding (UTF-8,
+Latin-1, cp1252...); UTF-16 files can still be read whole as ``text``. All
+reading happens in a worker thread.
+"""
+
+import asyncio
+import codecs
+import csv
 import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
 
 from app.engine.types import NodeContext, NodeExecutionError
 from app.nodes._files import resolve_sandboxed
 
 NODE_TYPE = "read_file"
 NODE_NAME = "Read File"
-NODE_DESCRIPTION = "Read a text or JSON file from disk"
+NODE_DESCRIPTION = "Read a text, JSON, JSON Lines or CSV file from disk"
 NODE_CATEGORY = "Files"
 NODE_COLOR = "#8b5cf6"
 NODE_ICON = "file-input"
 NODE_INPUTS = ["in"]
 NODE_OUTPUTS = ["out"]
 
+READ_BUFFER = 1024 * 1024
+RECORD_FORMATS = ("lines", "jsonl", "csv")
+WINDOW_FIELDS = {"format": list(RECORD_FORMATS)}
+
 CONFIG_FIELDS = [
     {
         "key": "path",
@@ -24,13 +46,157 @@ CONFIG_FIELDS = [
         "key": "format",
         "label": "Format",
         "type": "select",
-        "options": ["auto", "text", "json"],
+        "options": ["auto", "text", "json", *RECORD_FORMATS],
         "default": "auto",
     },
     {"key": "encoding", "label": "Encoding", "type": "string", "default": "utf-8"},
+    {
+        "key": "offset",
+        "label": "Skip records",
+        "type": "number",
+        "default": 0,
+        "min": 0,
+        "showIf": WINDOW_FIELDS,
+    },
+    {
+        "key": "limit",
+        "label": "Max records (empty = all)",
+        "type": "number",
+        "min": 1,
+        "showIf": WINDOW_FIELDS,
+    },
+    {
+        "key": "max_bytes",
+        "label": "Max bytes to read (empty = no limit)",
+        "type": "number",
+        "min": 1,
+    },
+    {
+        "key": "csv_header",
+        "label": "First row is a header",
+        "type": "boolean",
+        "default": True,
+        "showIf": {"format": "csv"},
+    },
+    {
+        "key": "delimiter",
+        "label": "Delimiter",
+        "type": "string",
+        "default": ",",
+        "showIf": {"format": "csv"},
+    },
 ]
 
 
+def _int_option(config: dict, key: str, label: str, minimum: int) -> int | None:
+    value = config.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise NodeExecutionError(f"{label} must be a whole number") from None
+    if number < minimum:
+        raise NodeExecutionError(f"{label} must be at least {minimum}")
+    return number
+
+
+def _check_line_encoding(encoding: str) -> None:
+    """Record formats split raw bytes on newlines, which needs an ASCII-compatible codec."""
+    probe = '\r\n,"'
+    try:
+        ascii_compatible = probe.encode(encoding) == probe.encode("ascii")
+    except UnicodeEncodeError:
+        ascii_compatible = False
+    if not ascii_compatible:
+        raise NodeExecutionError(
+            f"{encoding} is not ASCII-compatible, so records cannot be read line by line; "
+            "use format text or json for this file"
+        )
+
+
+def _lines(source, encoding: str, budget: list[int]) -> Iterator[str]:
+    """Decoded lines of the binary file `source`, charging their bytes to budget[0]."""
+    for raw in iter(source.readline, b""):
+        budget[0] -= len(raw)
+        yield raw.decode(encoding)
+
+
+def _read_records(
+    path: Path,
+    fmt: str,
+    encoding: str,
+    offset: int,
+    limit: int | None,
+    max_bytes: int | None,
+    delimiter: str,
+    header: bool,
+) -> dict[str, Any]:
+    budget = [max_bytes if max_bytes is not None else float("inf")]
+    records: list[Any] = []
+    stopped_at = None  # source row to continue from; None once the file is exhausted
+    with open(path, "rb", buffering=READ_BUFFER) as f:
+        lines = _lines(f, encoding, budget)
+        if fmt == "csv":
+            reader = csv.reader(lines, delimiter=delimiter)
+            names = next(reader, None) if header else None
+            rows: Iterator = reader
+            if names is not None:
+                rows = (dict(zip(names, row, strict=False)) for row in reader)
+        else:
+            rows = (line.rstrip("\r\n") for line in lines)
+
+        for index, row in enumerate(rows):
+            if index < offset:
+                if max_bytes is not None:
+                    budget[0] = max_bytes  # skipped records cost nothing
+                continue
+            if fmt == "jsonl" and not row.strip():
+                continue
+            if budget[0] < 0 and records:
+                stopped_at = index  # this record went over max_bytes: stop before it
+                break
+            if limit is not None and len(records) >= limit:
+                stopped_at = index
+                break
+            if fmt == "jsonl":
+                try:
+                    row = json.loads(row)
+                except json.JSONDecodeError as e:
+                    raise NodeExecutionError(
+                        f"{path.name} record {index}: invalid JSON: {e}"
+                    ) from None
+            records.append(row)
+    return {
+        "records": records,
+        "count": len(records),
+        "offset": offset,
+        "next_offset": stopped_at,
+    }
+
+
+def _read_whole(
+    path: Path, fmt: str, encoding: str, max_bytes: int | None, strict: bool
+) -> dict[str, Any]:
+    with open(path, "rb") as f:
+        raw = f.read(max_bytes) if max_bytes is not None else f.read()
+    truncated = max_bytes is not None and path.stat().st_size > max_bytes
+    if fmt == "json" and strict and truncated:
+        raise NodeExecutionError(
+            f"{path.name} is larger than max_bytes; read it as jsonl or raise the limit"
+        )
+    # An incremental decoder drops a multi-byte character cut off by max_bytes.
+    content = codecs.getincrementaldecoder(encoding)().decode(raw, final=not truncated)
+    if fmt == "text" or truncated:
+        return {"content": content, "truncated": truncated}
+    try:
+        return {"data": json.loads(content)}
+    except json.JSONDecodeError as e:
+        if strict:
+            raise NodeExecutionError(f"{path.name} is not valid JSON: {e}") from None
+        return {"content": content, "truncated": truncated}
+
+
 async def run(ctx: NodeContext):
     path = resolve_sandboxed(ctx.config.get("path"))
     if not path.exists():
@@ -39,23 +205,40 @@ async def run(ctx: NodeContext):
         raise NodeExecutionError(f"Not a file: {path}")
 
     encoding = ctx.config.get("encoding") or "utf-8"
+    offset = _int_option(ctx.config, "offset", "Skip records", 0) or 0
+    limit = _int_option(ctx.config, "limit", "Max records", 1)
+    max_bytes = _int_option(ctx.config, "max_bytes", "Max bytes", 1)
+    fmt = ctx.config.get("format") or "auto"
+    # "auto" reads .json files as JSON (falling back to text when they do not
+    # parse) and everything else as text; the record formats are opt-in.
+    strict = fmt != "auto"
+    if not strict:
+        fmt = "json" if path.suffix.lower() == ".json" else "text"
+
     try:
-        content = path.read_text(encoding=encoding)
+        if fmt in RECORD_FORMATS:
+            _check_line_encoding(encoding)
+            body = await asyncio.to_thread(
+                _read_records,
+                path,
+                fmt,
+                encoding,
+                offset,
+                limit,
+                max_bytes,
+                str(ctx.config.get("delimiter") or ","),
+                ctx.config.get("csv_header", True) is not False,
+            )
+        else:
+            body = await asyncio.to_thread(_read_whole, path, fmt, encoding, max_bytes, strict)
     except (UnicodeDecodeError, LookupError) as e:
         raise NodeExecutionError(f"Could not read {path.name} as {encoding}: {e}") from None
+    except csv.Error as e:
+        raise NodeExecutionError(f"{path.name} is not valid CSV: {e}") from None
 
-    fmt = ctx.config.get("format") or "auto"
-    result = {"path": str(path), "size_bytes": path.stat().st_size}
-
-    if fmt == "json" or (fmt == "auto" and path.suffix.lower() == ".json"):
-        try:
-            result["data"] = json.loads(content)
-        except json.JSONDecodeError as e:
-            if fmt == "json":
-                raise NodeExecutionError(f"{path.name} is not valid JSON: {e}") from None
-            result["content"] = content
+    result = {"path": str(path), "size_bytes": path.stat().st_size, **body}
+    if "records" in body:
+        ctx.log("info", f"Read {body['count']} {fmt} records from {path.name}")
     else:
-        result["content"] = content
-
-    ctx.log("info", f"Read {result['size_bytes']} bytes from {path.name}")
+        ctx.log("info", f"Read {result['size_bytes']} bytes from {path.name}")
     return result
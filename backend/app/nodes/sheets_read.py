@@ -10,6 +10,7 @@ NODE_ICON = "sheets"
 NODE_INPUTS = ["in"]
 NODE_OUTPUTS = ["out"]
 NODE_TIMEOUT = 90
+NODE_CACHEABLE = 300  # seconds; only used by runs started with use_cache
 
 SHEETS = "https://sheets.googleapis.com/v4/spreadsheets"
 
@@ -0,0 +1,46 @@
+from app.engine.types import NodeContext
+
+NODE_TYPE = "webhook_trigger"
+NODE_NAME = "Webhook Trigger"
+NODE_DESCRIPTION = "Starts the saved workflow when something POSTs to /hooks/<token>"
+NODE_CATEGORY = "Triggers"
+NODE_COLOR = "#22c55e"
+NODE_ICON = "webhook"
+NODE_INPUTS = []
+NODE_OUTPUTS = ["out"]
+
+CONFIG_FIELDS = [
+    {
+        "key": "token",
+        "label": "Token",
+        "type": "string",
+        "required": True,
+        "placeholder": "a long random string",
+        "help": "The hook URL is /hooks/<token>. Anyone with the URL can start the workflow, "
+        "so use at least 16 random characters.",
+    },
+    {
+        "key": "batch_size",
+        "label": "Payloads per run",
+        "type": "number",
+        "default": 1,
+        "min": 1,
+        "help": "Above 1, payloads arriving close together start one run with "
+        '{ "items": [...], "count": n } instead of one run each.',
+    },
+    {
+        "key": "batch_window_ms",
+        "label": "Wait for a batch up to (ms)",
+        "type": "number",
+        "default": 200,
+        "min": 0,
+    },
+    {"key": "enabled", "label": "Enabled", "type": "boolean", "default": True},
+]
+
+
+async def run(ctx: NodeContext):
+    # The hook passes the request (or a batch of them); a manual run has none.
+    if ctx.input is not None:
+        return ctx.input
+    return {"body": None, "query": {}, "headers": {}, "received_at": None}
@@ -1,11 +1,25 @@
+"""Write to a file in the data/ sandbox.
+
+Overwrites replace the file atomically (temp file + rename) in a worker thread.
+Appends go through the shared per-path writer in ``_files``, which batches the
+appends of concurrent runs into one write. The ``jsonl`` and ``csv`` formats
+take a list of records and write one compact line (or row) per record. Appended
+csv rows follow the columns of the header already in the file; a record with a
+column the header lacks fails the node instead of shifting the row.
+"""
+
+import asyncio
+import csv
+import io
 import json
+from typing import Any
 
 from app.engine.types import NodeContext, NodeExecutionError
-from app.nodes._files import resolve_sandboxed
+from app.nodes._files import Relayout, append_writer, resolve_sandboxed, write_atomic
 
 NODE_TYPE = "write_file"
 NODE_NAME = "Write File"
-NODE_DESCRIPTION = "Write text or JSON to a file on disk"
+NODE_DESCRIPTION = "Write text, JSON, JSON Lines or CSV to a file on disk"
 NODE_CATEGORY = "Files"
 NODE_COLOR = "#8b5cf6"
 NODE_ICON = "file-output"
@@ -34,31 +48,110 @@ CONFIG_FIELDS = [
         "options": ["overwrite", "append"],
         "default": "overwrite",
     },
+    {
+        "key": "format",
+        "label": "Format",
+        "type": "select",
+        "options": ["text", "json", "jsonl", "csv"],
+        "default": "text",
+    },
     {"key": "encoding", "label": "Encoding", "type": "string", "default": "utf-8"},
 ]
 
 
+def _records(content: Any) -> list:
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except json.JSONDecodeError:
+            raise NodeExecutionError("Content must be a list of records (or their JSON)") from None
+    if isinstance(content, dict):
+        return [content]
+    if not isinstance(content, list):
+        raise NodeExecutionError("Content must be a list of records (or their JSON)")
+    return content
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _csv(records: list) -> tuple[str, str]:
+    """(header line, data rows) for dicts keyed by column, or for plain row lists."""
+    header, rows = io.StringIO(), io.StringIO()
+    if records and all(isinstance(r, dict) for r in records):
+        columns = list(dict.fromkeys(key for r in records for key in r))
+        csv.writer(header).writerow(columns)
+        csv.DictWriter(rows, columns).writerows(records)
+    else:
+        writer = csv.writer(rows)
+        for record in records:
+            writer.writerow(record if isinstance(record, list | tuple) else [record])
+    return header.getvalue(), rows.getvalue()
+
+
+def _csv_relayout(content: Any, encoding: str) -> Relayout:
+    """Renders dict records again in the column order of the file's header line."""
+
+    def relayout(head: bytes) -> bytes:
+        columns = next(csv.reader([head.decode(encoding)]), [])
+        records = _records(content)
+        unknown = [k for k in dict.fromkeys(k for r in records for k in r) if k not in columns]
+        if unknown:
+            raise NodeExecutionError(
+                f"Columns {', '.join(map(str, unknown))} are not in the file's header "
+                f"({', '.join(columns)})"
+            )
+        rows = io.StringIO()
+        csv.DictWriter(rows, columns).writerows(records)
+        return rows.getvalue().encode(encoding)
+
+    return relayout
+
+
+def _serialize(content: Any, fmt: str) -> tuple[str, str, int | None]:
+    """(header, body, record count) for content in `fmt`; the header is csv-only."""
+    if fmt == "jsonl":
+        records = _records(content)
+        return "", "".join(_compact(r) + "\n" for r in records), len(records)
+    if fmt == "csv":
+        records = _records(content)
+        return *_csv(records), len(records)
+    if fmt == "json":
+        return "", content if isinstance(content, str) else _compact(content), None
+    if isinstance(content, dict | list):
+        return "", json.dumps(content, ensure_ascii=False, indent=2, default=str), None
+    return "", str(content), None
+
+
 async def run(ctx: NodeContext):
     path = resolve_sandboxed(ctx.config.get("path"))
 
     content = ctx.config.get("content")
     if content is None:
         raise NodeExecutionError("Content is required")
-    if isinstance(content, (dict, list)):
-        content = json.dumps(content, ensure_ascii=False, indent=2, default=str)
-    else:
-        content = str(content)
 
-    mode = "a" if (ctx.config.get("mode") == "append") else "w"
+    mode = ctx.config.get("mode") or "overwrite"
+    fmt = ctx.config.get("format") or "text"
     encoding = ctx.config.get("encoding") or "utf-8"
+    header, body, count = _serialize(content, fmt)
+    try:
+        data = body.encode(encoding)
+        head = header.encode(encoding)
+    except LookupError as e:
+        raise NodeExecutionError(str(e)) from None
+    except UnicodeEncodeError as e:
+        raise NodeExecutionError(f"Could not encode content as {encoding}: {e}") from None
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, mode, encoding=encoding, newline="") as f:
-        written = f.write(content)
+    if mode == "append":
+        # A csv header differing from the file's (other keys or order) re-lays the rows out.
+        relayout = _csv_relayout(content, encoding) if head else None
+        await append_writer(path).append(data, head, relayout)
+    else:
+        await asyncio.to_thread(write_atomic, path, head + data)
 
-    ctx.log("info", f"Wrote {written} chars to {path}")
-    return {
-        "path": str(path),
-        "chars_written": written,
-        "mode": ctx.config.get("mode") or "overwrite",
-    }
+    ctx.log("info", f"Wrote {len(body)} chars to {path}")
+    result = {"path": str(path), "chars_written": len(body), "mode": mode, "format": fmt}
+    if count is not None:
+        result["records"] = count
+    return result
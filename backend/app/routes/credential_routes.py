@@ -8,6 +8,7 @@ from app import google
 from app.auth import get_current_user
 from app.config import PUBLIC_URL, SECRET_KEY
 from app.db import get_db
+from app.engine.credentials import invalidate_credential
 from app.models import Credential, User
 from app.security import decrypt_json, encrypt_json
 
@@ -97,6 +98,7 @@ def delete_credential(
         raise HTTPException(status_code=404, detail="Credential not found")
     db.delete(cred)
     db.commit()
+    invalidate_credential(credential_id)
     return {"ok": True}
 
 
@@ -185,6 +187,7 @@ async def oauth_callback(request: Request, db: Session = Depends(get_db)):
     cred.account_email = account_email
     cred.connected = bool(data.get("refresh_token"))
     db.commit()
+    invalidate_credential(cred.id)
 
     if not cred.connected:
         return _callback_page(
@@ -0,0 +1,51 @@
+import json
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.config import WEBHOOK_MAX_BYTES
+from app.engine.hooks import hooks
+
+router = APIRouter(prefix="/hooks", tags=["hooks"])
+
+# Never handed to the workflow: they belong to the caller's session with us, if any.
+PRIVATE_HEADERS = {"authorization", "cookie", "proxy-authorization"}
+
+
+@router.post("/{token}", status_code=202)
+async def receive_hook(token: str, request: Request):
+    """Queue the request for the workflow whose webhook_trigger has this token.
+
+    The token is the credential, so no session is needed. Answers 202 once the
+    payload is queued, or 429 with Retry-After while the ingestion queue is full.
+    """
+    hook = hooks.get(token)
+    if hook is None:
+        raise HTTPException(status_code=404, detail="Unknown hook")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > WEBHOOK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+    raw = await request.body()
+    if len(raw) > WEBHOOK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Payload too large")
+
+    body: object = raw.decode("utf-8", errors="replace")
+    if "json" in request.headers.get("content-type", "") and raw.strip():
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON") from None
+    payload = {
+        "body": body,
+        "query": dict(request.query_params),
+        "headers": {k: v for k, v in request.headers.items() if k not in PRIVATE_HEADERS},
+        "received_at": datetime.now(UTC).isoformat(),
+    }
+    if not hooks.offer(hook, payload):
+        return JSONResponse(
+            {"detail": "Too many requests queued, retry shortly"},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": True}
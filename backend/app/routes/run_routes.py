@@ -1,21 +1,37 @@
+import asyncio
 import contextlib
 import json
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
+from app import config
 from app.auth import get_current_user, get_user_from_token
 from app.config import SESSION_COOKIE
-from app.db import SessionLocal, get_db
+from app.db import SessionLocal, get_db, write_queue
+from app.engine.blobs import output_store
+from app.engine.cache import result_cache
+from app.engine.events import PAGE
 from app.engine.executor import slice_to_node
+from app.engine.hooks import hooks
+from app.engine.limits import get_governor
+from app.engine.plan import plan_cache
 from app.engine.registry import get_registry
+from app.engine.retention import default_policy
 from app.engine.runs import manager
+from app.engine.scheduler import scheduler
 from app.engine.types import WorkflowError
-from app.models import Execution, User
-from app.schemas import RunRequest
+from app.engine.workflows import definition_cache
+from app.models import Execution, ExecutionLog, ExecutionNode, RetentionPolicy, User, Workflow
+from app.schemas import RetentionPolicyIn, RunRequest
 
 router = APIRouter(tags=["runs"])
 
+SSE_KEEPALIVE_SECONDS = 15  # comment line sent on an idle stream so proxies keep it open
+
 
 @router.post("/api/run")
 async def start_run(body: RunRequest, user: User = Depends(get_current_user)):
@@ -27,45 +43,156 @@ async def start_run(body: RunRequest, user: User = Depends(get_current_user)):
             )
         except WorkflowError as e:
             raise HTTPException(status_code=422, detail=str(e)) from None
-    run = manager.start(
+    run = await manager.start(
         definition=definition,
         registry=get_registry(),
         user_id=user.id,
         workflow_id=body.workflow_id,
         workflow_name=body.workflow_name,
         run_input=body.input,
+        use_cache=body.use_cache,
     )
     return {"run_id": run.id}
 
 
 @router.get("/api/runs/{run_id}")
 def get_run(run_id: str, user: User = Depends(get_current_user)):
+    return {"run": _owned_run(run_id, user).snapshot()}
+
+
+def _owned_run(run_id: str, user: User):
     run = manager.get(run_id)
     if run is None or run.user_id != user.id:
         raise HTTPException(status_code=404, detail="Run not found")
-    return {"run": run.snapshot()}
+    return run
+
+
+def _finished(run) -> bool:
+    return len(run.events) > 0 and run.events[-1].get("type") == "run_finished"
+
+
+@router.get("/api/runs/{run_id}/events")
+async def poll_run_events(
+    run_id: str,
+    since_seq: int = -1,
+    wait: float = Query(default=25, ge=0, le=60),
+    limit: int = Query(default=PAGE, ge=1, le=PAGE),
+    user: User = Depends(get_current_user),
+):
+    """Long poll: events after `since_seq`, waiting up to `wait` seconds for the first one.
+
+    Pass the returned `next` as the following call's `since_seq`; `done` is true once
+    run_finished has been delivered.
+    """
+    run = _owned_run(run_id, user)
+    sub = run.subscribe(since_seq)
+    try:
+        events = sub.take(limit)
+        if not events and wait and not _finished(run):
+            with contextlib.suppress(TimeoutError):
+                events = await asyncio.wait_for(sub.get_batch(limit), wait)
+    finally:
+        run.unsubscribe(sub)
+    cursor = events[-1]["seq"] if events else since_seq
+    return {
+        "events": events,
+        "next": cursor,
+        "status": run.status,
+        "done": _finished(run) and cursor >= len(run.events) - 1,
+    }
+
+
+def _sse(event: dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"id: {event['seq']}\nevent: {event.get('type', 'message')}\ndata: {data}\n\n"
+
+
+@router.get("/api/runs/{run_id}/stream")
+async def stream_run_events(
+    run_id: str,
+    since_seq: int = -1,
+    last_event_id: int | None = Header(default=None),
+    user: User = Depends(get_current_user),
+):
+    """Server-Sent Events: one `event: <type>` message per run event, ending after
+    run_finished. A reconnecting EventSource resumes from its Last-Event-ID.
+    """
+    run = _owned_run(run_id, user)
+    sub = run.subscribe(since_seq if last_event_id is None else last_event_id)
+
+    async def messages():
+        try:
+            while True:
+                try:
+                    events = await asyncio.wait_for(sub.get_batch(), SSE_KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(_sse(event) for event in events)
+                if events[-1].get("type") == "run_finished":
+                    return
+        finally:
+            run.unsubscribe(sub)
+
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/api/runs/{run_id}/cancel")
 async def cancel_run(run_id: str, user: User = Depends(get_current_user)):
-    run = manager.get(run_id)
-    if run is None or run.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Run not found")
-    return {"cancelled": manager.cancel(run_id)}
+    _owned_run(run_id, user)
+    return {"cancelled": await manager.cancel(run_id)}
+
+
+@router.get("/api/engine/stats")
+async def engine_stats(user: User = Depends(get_current_user)):
+    """Concurrency-slot queue waits, plan/result cache hit rates and DB group commits."""
+    return {
+        "concurrency": get_governor().stats(),
+        "plans": plan_cache.stats(),
+        "definitions": definition_cache.stats(),
+        "results": result_cache.stats(),
+        "writes": write_queue.stats(),
+        "schedules": scheduler.stats(),
+        "hooks": hooks.stats(),
+    }
+
+
+@router.get("/api/schedules")
+def list_schedules(user: User = Depends(get_current_user)):
+    """Saved workflows the scheduler will fire, soonest first."""
+    return {"schedules": scheduler.entries_for(user.id)}
 
 
 @router.get("/api/executions")
 def list_executions(
-    limit: int = 25, user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    limit: int = 25,
+    cursor: str | None = None,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ):
-    rows = (
-        db.query(Execution)
-        .filter(Execution.user_id == user.id)
-        .order_by(Execution.started_at.desc())
-        .limit(min(limit, 100))
-        .all()
-    )
+    """Newest first; pass the returned `next` as `cursor` for the following page."""
+    write_queue.barrier()
+    query = db.query(Execution).filter(Execution.user_id == user.id)
+    if cursor:
+        try:
+            started, _, last_id = cursor.partition("|")
+            started_at = datetime.fromisoformat(started)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor") from None
+        query = query.filter(
+            or_(
+                Execution.started_at < started_at,
+                and_(Execution.started_at == started_at, Execution.id < last_id),
+            )
+        )
+    limit = max(1, min(limit, 500))
+    rows = query.order_by(Execution.started_at.desc(), Execution.id.desc()).limit(limit).all()
     return {
+        "next": f"{rows[-1].started_at.isoformat()}|{rows[-1].id}" if len(rows) == limit else None,
         "executions": [
             {
                 "id": r.id,
@@ -76,14 +203,11 @@ def list_executions(
                 "finished_at": r.finished_at.isoformat() if r.finished_at else None,
             }
             for r in rows
-        ]
+        ],
     }
 
 
-@router.get("/api/executions/{execution_id}")
-def get_execution(
-    execution_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)
-):
+def _owned_execution(db: Session, execution_id: str, user: User) -> Execution:
     row = (
         db.query(Execution)
         .filter(Execution.id == execution_id, Execution.user_id == user.id)
@@ -91,6 +215,73 @@ def get_execution(
     )
     if row is None:
         raise HTTPException(status_code=404, detail="Execution not found")
+    return row
+
+
+def _policy_out(row: RetentionPolicy) -> dict:
+    return {
+        "workflow_id": row.workflow_id,
+        "max_age_days": row.max_age_days,
+        "max_count": row.max_count,
+        "failure_max_age_days": row.failure_max_age_days,
+    }
+
+
+@router.get("/api/retention")
+def get_retention(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """The server defaults and this user's own and per-workflow retention policies."""
+    rows = db.query(RetentionPolicy).filter(RetentionPolicy.user_id == user.id).all()
+    return {
+        "defaults": default_policy()._asdict(),
+        "policies": [_policy_out(r) for r in rows],
+    }
+
+
+@router.put("/api/retention")
+def set_retention(
+    body: RetentionPolicyIn, user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """Set the user's default policy, or a workflow's; all fields None removes it."""
+    if body.workflow_id is not None:
+        owned = (
+            db.query(Workflow.id)
+            .filter(Workflow.id == body.workflow_id, Workflow.user_id == user.id)
+            .first()
+        )
+        if owned is None:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+    row = (
+        db.query(RetentionPolicy)
+        .filter(
+            RetentionPolicy.user_id == user.id,
+            RetentionPolicy.workflow_id == body.workflow_id
+            if body.workflow_id is not None
+            else RetentionPolicy.workflow_id.is_(None),
+        )
+        .first()
+    )
+    fields = body.model_dump(exclude={"workflow_id"})
+    if all(v is None for v in fields.values()):
+        if row is not None:
+            db.delete(row)
+            db.commit()
+        return {"policy": None}
+    if row is None:
+        row = RetentionPolicy(user_id=user.id, workflow_id=body.workflow_id)
+        db.add(row)
+    for name, value in fields.items():
+        setattr(row, name, value)
+    db.commit()
+    return {"policy": _policy_out(row)}
+
+
+@router.get("/api/executions/{execution_id}")
+def get_execution(
+    execution_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """Run-level status and per-node statuses; outputs and logs have their own endpoints."""
+    write_queue.barrier()
+    row = _owned_execution(db, execution_id, user)
     try:
         summary = json.loads(row.summary or "{}")
     except json.JSONDecodeError:
@@ -108,8 +299,82 @@ def get_execution(
     }
 
 
+@router.get("/api/executions/{execution_id}/nodes/{node_id}")
+def get_execution_node(
+    execution_id: str,
+    node_id: str,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """One node's full output (or error) within an execution."""
+    write_queue.barrier()
+    _owned_execution(db, execution_id, user)
+    node = (
+        db.query(ExecutionNode)
+        .filter(ExecutionNode.execution_id == execution_id, ExecutionNode.node_id == node_id)
+        .first()
+    )
+    if node is None:
+        raise HTTPException(status_code=404, detail="Node result not found")
+    return {
+        "node": {
+            "node_id": node.node_id,
+            "status": node.status,
+            "output": json.loads(output_store.load(node.output, node.output_hash)),
+            "error": node.error,
+            "elapsed_ms": node.elapsed_ms,
+        }
+    }
+
+
+@router.get("/api/executions/{execution_id}/logs")
+def get_execution_logs(
+    execution_id: str,
+    after: int = 0,
+    limit: int = 200,
+    node_id: str | None = None,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """A page of an execution's logs; pass the returned `next` as `after` for the next page."""
+    write_queue.barrier()
+    _owned_execution(db, execution_id, user)
+    query = db.query(ExecutionLog).filter(
+        ExecutionLog.execution_id == execution_id, ExecutionLog.id > after
+    )
+    if node_id is not None:
+        query = query.filter(ExecutionLog.node_id == node_id)
+    limit = max(1, min(limit, 1000))
+    rows = query.order_by(ExecutionLog.id).limit(limit).all()
+    return {
+        "logs": [
+            {"id": r.id, "level": r.level, "node_id": r.node_id, "message": r.message} for r in rows
+        ],
+        "next": rows[-1].id if len(rows) == limit else None,
+    }
+
+
+@router.post("/api/executions/{execution_id}/resume")
+async def resume_execution(
+    execution_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)
+):
+    """Continue an interrupted/failed execution, skipping nodes that already succeeded."""
+    await write_queue.flush()
+    row = await asyncio.to_thread(_owned_execution, db, execution_id, user)
+    if row.status in ("running", "success"):
+        raise HTTPException(status_code=409, detail=f"Execution is {row.status}")
+    run = await manager.resume(execution_id, get_registry())
+    if run is None:
+        raise HTTPException(status_code=409, detail="Execution has no checkpoint to resume from")
+    return {"run_id": run.id}
+
+
 @router.websocket("/api/runs/{run_id}/ws")
-async def run_events(websocket: WebSocket, run_id: str):
+async def run_events(websocket: WebSocket, run_id: str, since: int = -1, batch: bool = False):
+    """Stream a run's events, starting after seq `since` (a reconnecting client passes
+    the last seq it saw). With batch=1 each frame is a JSON array of the events
+    gathered over WS_BATCH_WINDOW_MS instead of a single event.
+    """
     db = SessionLocal()
     try:
         user = get_user_from_token(websocket.cookies.get(SESSION_COOKIE), db)
@@ -125,24 +390,23 @@ async def run_events(websocket: WebSocket, run_id: str):
         return
 
     await websocket.accept()
-    queue = run.subscribe()
+    sub = run.subscribe(since)  # replays earlier events from the buffer first
+    window = config.WS_BATCH_WINDOW_MS / 1000
     try:
-        replay = list(run.events)
-        last_seq = replay[-1]["seq"] if replay else -1
-        for event in replay:
-            await websocket.send_json(event)
-        if any(e.get("type") == "run_finished" for e in replay):
-            return
         while True:
-            event = await queue.get()
-            if event.get("seq", 0) <= last_seq:
-                continue
-            await websocket.send_json(event)
-            if event.get("type") == "run_finished":
+            if batch:
+                events = await sub.get_batch(window=window)
+                await websocket.send_text(
+                    json.dumps(events, ensure_ascii=False, separators=(",", ":"), default=str)
+                )
+            else:
+                events = [await sub.get()]
+                await websocket.send_json(events[0])
+            if events[-1].get("type") == "run_finished":
                 return
     except WebSocketDisconnect:
         pass
     finally:
-        run.unsubscribe(queue)
+        run.unsubscribe(sub)
         with contextlib.suppress(RuntimeError):
             await websocket.close()
@@ -5,8 +5,13 @@ from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
 from app.db import get_db
-from app.models import User, Workflow
-from app.schemas import WorkflowSave
+from app.engine.hooks import hooks
+from app.engine.registry import get_registry
+from app.engine.runs import manager
+from app.engine.scheduler import scheduler
+from app.engine.workflows import definition_cache
+from app.models import ScheduleState, User, Workflow
+from app.schemas import SavedRunRequest, WorkflowSave
 
 router = APIRouter(prefix="/api/workflows", tags=["workflows"])
 
@@ -20,6 +25,12 @@ def _workflow_meta(w: Workflow) -> dict:
     }
 
 
+def _sync_triggers(w: Workflow) -> None:
+    definition = json.loads(w.data)
+    scheduler.sync(w.id, w.user_id, w.name, definition)
+    hooks.sync(w.id, w.user_id, w.name, definition)
+
+
 @router.get("")
 def list_workflows(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     rows = (
@@ -38,6 +49,7 @@ def create_workflow(
     w = Workflow(name=body.name, data=json.dumps(body.definition.to_engine()), user_id=user.id)
     db.add(w)
     db.commit()
+    _sync_triggers(w)
     return {"workflow": _workflow_meta(w)}
 
 
@@ -64,6 +76,8 @@ def update_workflow(
     w.name = body.name
     w.data = json.dumps(body.definition.to_engine())
     db.commit()
+    definition_cache.invalidate(w.id)
+    _sync_triggers(w)
     return {"workflow": _workflow_meta(w)}
 
 
@@ -74,6 +88,33 @@ def delete_workflow(
     w = db.query(Workflow).filter(Workflow.id == workflow_id, Workflow.user_id == user.id).first()
     if w is None:
         raise HTTPException(status_code=404, detail="Workflow not found")
+    db.query(ScheduleState).filter(ScheduleState.workflow_id == w.id).delete()
     db.delete(w)
     db.commit()
+    definition_cache.invalidate(workflow_id)
+    scheduler.remove(workflow_id)
+    hooks.remove(workflow_id)
     return {"ok": True}
+
+
+@router.post("/{workflow_id}/run")
+async def run_workflow(
+    workflow_id: int,
+    body: SavedRunRequest | None = None,
+    user: User = Depends(get_current_user),
+):
+    """Run the saved definition, so API callers need not send it with every run."""
+    saved = await definition_cache.get(workflow_id)
+    if saved is None or saved.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    body = body or SavedRunRequest()
+    run = await manager.start(
+        definition=saved.definition,
+        registry=get_registry(),
+        user_id=user.id,
+        workflow_id=saved.id,
+        workflow_name=saved.name,
+        run_input=body.input,
+        use_cache=body.use_cache,
+    )
+    return {"run_id": run.id}
@@ -67,6 +67,14 @@ class WorkflowOut(BaseModel):
     updated_at: str
 
 
+class RetentionPolicyIn(BaseModel):
+    workflow_id: int | None = None
+    """The workflow this policy is for; None sets the user's default."""
+    max_age_days: int | None = Field(default=None, ge=0)
+    max_count: int | None = Field(default=None, ge=0)
+    failure_max_age_days: int | None = Field(default=None, ge=0)
+
+
 class RunRequest(BaseModel):
     definition: WorkflowDefinition
     workflow_id: int | None = None
@@ -76,3 +84,11 @@ class RunRequest(BaseModel):
     """When set, only this node and its ancestors execute ('Execute step')."""
     exclude_target: bool = False
     """With target_node_id: run only the ancestors ('Execute previous nodes')."""
+    use_cache: bool = False
+    """Reuse cached results of cacheable nodes (LLM, GET requests, sheet reads)."""
+
+
+class SavedRunRequest(BaseModel):
+    input: Any = None
+    use_cache: bool = False
+    """Reuse cached results of cacheable nodes (LLM, GET requests, sheet reads)."""
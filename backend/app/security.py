@@ -1,4 +1,4 @@
-"""Encryption for stored credentials: Fernet keyed off the app secret."""
+"""Encryption for stored credentials and cached node results: Fernet keyed off the app secret."""
 
 import base64
 import hashlib
@@ -21,3 +21,14 @@ def decrypt_json(token: str) -> dict[str, Any]:
         return json.loads(_fernet.decrypt(token.encode()))
     except (InvalidToken, json.JSONDecodeError) as e:
         raise ValueError("Stored credential cannot be decrypted (secret key changed?)") from e
+
+
+def encrypt_text(text: str) -> str:
+    return _fernet.encrypt(text.encode()).decode()
+
+
+def decrypt_text(token: str) -> str:
+    try:
+        return _fernet.decrypt(token.encode()).decode()
+    except InvalidToken as e:
+        raise ValueError("Stored data cannot be decrypted (secret key changed?)") from e
@@ -0,0 +1,302 @@
+"""Worker processes for the durable run queue (``SWARM_RUN_MODE=queue``).
+
+A worker claims ``run_jobs`` rows with a lease, executes them with the normal
+engine, and streams events back through ``run_events`` in small batches for the
+API process to relay. While a run executes the worker renews its lease; a job
+whose lease runs out (its worker died) is claimed again by another worker, up
+to ``MAX_ATTEMPTS`` times, and continues from the nodes already checkpointed.
+Claims are conditional UPDATEs, so any number of worker processes can share
+one database.
+
+Start with ``python -m app worker --processes N``.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app import config
+from app.db import SessionLocal, init_db
+from app.engine.registry import NodeRegistry, get_registry
+from app.engine.runs import Run, execute_run, store_result
+from app.http import close_clients
+from app.models import Execution, RunEvent, RunJob
+from app.nodes._files import close_writers
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5  # seconds between claim attempts while idle
+FLUSH_INTERVAL = 0.1  # seconds between event batches
+MAX_ATTEMPTS = 3  # a run whose worker keeps dying is given up after this many claims
+
+
+def _claimable(now: datetime):
+    return or_(
+        RunJob.status == "queued",
+        and_(RunJob.status == "claimed", RunJob.lease_expires_at < now),
+    )
+
+
+class Worker:
+    def __init__(
+        self,
+        name: str | None = None,
+        capacity: int | None = None,
+        lease_seconds: float | None = None,
+        registry: NodeRegistry | None = None,
+    ):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.capacity = max(1, config.WORKER_RUNS if capacity is None else capacity)
+        self.lease = timedelta(
+            seconds=config.WORKER_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        )
+        self.registry = registry
+        self.jobs: dict[str, asyncio.Task] = {}
+        self._lost: set[str] = set()
+        self._abandoned: set[str] = set()
+        self._pending: list[tuple[str, str]] = []
+        self._write_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+
+    # ---------- database (runs in a thread) ----------
+
+    def _claim(self, limit: int) -> list[RunJob]:
+        now = datetime.now(UTC)
+        db = SessionLocal()
+        try:
+            ids = db.scalars(
+                select(RunJob.id)
+                .where(_claimable(now), RunJob.cancel_requested.is_(False))
+                .order_by(RunJob.created_at)
+                .limit(limit)
+            ).all()
+            claimed = []
+            for job_id in ids:
+                won = db.execute(
+                    update(RunJob)
+                    .where(RunJob.id == job_id, _claimable(now))
+                    .values(
+                        status="claimed",
+                        worker=self.name,
+                        lease_expires_at=now + self.lease,
+                        attempts=RunJob.attempts + 1,
+                    )
+                ).rowcount
+                db.commit()
+                if won:
+                    claimed.append(db.get(RunJob, job_id))
+            return claimed
+        finally:
+            db.close()
+
+    def _give_up(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(update(RunJob).where(RunJob.id == job_id).values(status="done"))
+            db.execute(
+                update(Execution)
+                .where(Execution.id == job_id)
+                .values(status="interrupted", finished_at=datetime.now(UTC))
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _heartbeat(self, job_ids: list[str]) -> list[tuple[str, str, bool]]:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(RunJob)
+                .where(RunJob.id.in_(job_ids), RunJob.worker == self.name)
+                .values(lease_expires_at=datetime.now(UTC) + self.lease)
+            )
+            db.commit()
+            rows = db.execute(
+                select(RunJob.id, RunJob.worker, RunJob.cancel_requested).where(
+                    RunJob.id.in_(job_ids)
+                )
+            ).all()
+            return [tuple(r) for r in rows]
+        finally:
+            db.close()
+
+    def _write(self, events: list[tuple[str, str]], finished: Run | None = None) -> None:
+        db = SessionLocal()
+        try:
+            db.add_all(RunEvent(execution_id=rid, data=data) for rid, data in events)
+            if finished is not None:
+                store_result(db, finished)
+            db.commit()
+        finally:
+            db.close()
+
+    def _release(self, job_ids: list[str]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(RunJob)
+                .where(RunJob.id.in_(job_ids), RunJob.worker == self.name)
+                .values(status="queued", worker="", lease_expires_at=None)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    # ---------- event shipping ----------
+
+    def _sink(self, run_id: str):
+        def sink(event: dict) -> None:
+            self._pending.append((run_id, json.dumps(event, ensure_ascii=False, default=str)))
+
+        return sink
+
+    async def flush(self, finished: Run | None = None) -> None:
+        """Write buffered events (and a finished run's outcome) in one transaction."""
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if batch or finished is not None:
+                await asyncio.to_thread(self._write, batch, finished)
+
+    # ---------- jobs ----------
+
+    async def poll(self) -> int:
+        """Claim as many jobs as there are free slots and start them; returns how many."""
+        free = self.capacity - len(self.jobs)
+        if free <= 0 or self._stopping.is_set():
+            return 0
+        started = 0
+        for job in await asyncio.to_thread(self._claim, free):
+            if job.attempts > MAX_ATTEMPTS:
+                logger.warning("Giving up on run %s after %d attempts", job.id, MAX_ATTEMPTS)
+                await asyncio.to_thread(self._give_up, job.id)
+                continue
+            self.jobs[job.id] = asyncio.create_task(self._execute(job))
+            started += 1
+        return started
+
+    async def _execute(self, job: RunJob) -> None:
+        run = Run(job.id, job.user_id, None, "")
+        run.remote = True
+        run.use_cache = job.use_cache
+        run.sink = self._sink(job.id)
+        try:
+            await execute_run(
+                run,
+                json.loads(job.definition),
+                self.registry or get_registry(),
+                json.loads(job.run_input),
+                resume=True,  # a takeover or an API resume: replay checkpoints
+            )
+            if job.id in self._lost:
+                # Another worker owns the job now (or we are abandoning it): drop our
+                # unsent events and leave the outcome to whoever runs it next.
+                self._pending = [e for e in self._pending if e[0] != job.id]
+                return
+            await self.flush(finished=run)
+        finally:
+            run.close()
+            self._lost.discard(job.id)
+            self.jobs.pop(job.id, None)
+
+    async def drain(self) -> None:
+        """Wait for every in-flight job to finish."""
+        while self.jobs:
+            await asyncio.gather(*self.jobs.values(), return_exceptions=True)
+
+    async def _heartbeat_loop(self) -> None:
+        interval = self.lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not self.jobs:
+                continue
+            for job_id, owner, cancel in await asyncio.to_thread(self._heartbeat, list(self.jobs)):
+                task = self.jobs.get(job_id)
+                if task is None:
+                    continue
+                if owner != self.name:
+                    self._lost.add(job_id)
+                    task.cancel()
+                elif cancel:
+                    task.cancel()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    def stop(self) -> None:
+        """Stop claiming; in-flight runs finish first. A second call abandons them."""
+        if self._stopping.is_set():
+            for job_id, task in self.jobs.items():
+                self._lost.add(job_id)
+                self._abandoned.add(job_id)
+                task.cancel()
+        self._stopping.set()
+
+    async def serve(self) -> None:
+        logger.info("Worker %s started (capacity %d)", self.name, self.capacity)
+        background = [
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+        try:
+            while not self._stopping.is_set():
+                started = await self.poll()
+                if not started:
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(self._stopping.wait(), POLL_INTERVAL)
+            await self.drain()
+            if self._abandoned:
+                # Hand abandoned jobs straight back instead of waiting out the lease.
+                await asyncio.to_thread(self._release, list(self._abandoned))
+            await self.flush()
+        finally:
+            for task in background:
+                task.cancel()
+            await close_clients()
+            await asyncio.to_thread(close_writers)
+        logger.info("Worker %s stopped", self.name)
+
+
+async def _serve() -> None:
+    worker = Worker(registry=get_registry())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.serve()
+
+
+def run_worker() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+    )
+    asyncio.run(_serve())
+
+
+def main(processes: int = 1) -> None:
+    init_db()  # once, before the children race to create tables
+    if processes <= 1:
+        run_worker()
+        return
+    children = [multiprocessing.Process(target=run_worker) for _ in range(processes)]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signum)
+
+    # Ctrl-C already reaches every child through the process group.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, forward)
+    for child in children:
+        child.join()
@@ -0,0 +1,72 @@
+"""Execution insert/update throughput: stock SQLite settings vs the tuned profile.
+
+Run from backend/: ``python -m benchmarks.sqlite_profile [--runs N] [--threads N]``.
+Each run is persisted the way RunManager does it: one commit inserting the
+execution row, one commit storing its outcome. Writers run on several threads
+against a temporary database file.
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, create_db_engine
+from app.models import Execution, utcnow
+
+
+def _persist_runs(engine: Engine, runs: int) -> None:
+    session = sessionmaker(bind=engine, expire_on_commit=False)
+    for _ in range(runs):
+        run_id = str(uuid.uuid4())
+        with session() as db:
+            db.add(Execution(id=run_id, user_id=1, status="running", started_at=utcnow()))
+            db.commit()
+        with session() as db:
+            row = db.get(Execution, run_id)
+            row.status, row.finished_at, row.summary = "success", utcnow(), '{"ok": true}'
+            db.commit()
+
+
+def measure(engine: Engine, runs: int, threads: int) -> float:
+    """Runs persisted per second."""
+    Base.metadata.create_all(engine)
+    per_thread = runs // threads
+    workers = [
+        threading.Thread(target=_persist_runs, args=(engine, per_thread)) for _ in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return per_thread * threads / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stock = create_engine(
+            f"sqlite:///{Path(tmp) / 'stock.db'}", connect_args={"check_same_thread": False}
+        )
+        tuned = create_db_engine(f"sqlite:///{Path(tmp) / 'tuned.db'}")
+        before = measure(stock, args.runs, args.threads)
+        after = measure(tuned, args.runs, args.threads)
+
+    print(f"stock profile: {before:8.0f} runs/s")
+    print(f"tuned profile: {after:8.0f} runs/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
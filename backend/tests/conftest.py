@@ -1,9 +1,20 @@
 """Test configuration: point the app at a throwaway SQLite DB before any app import."""
 
+import atexit
 import os
+import shutil
+import tempfile
 from pathlib import Path
 
 _TEST_DB = Path(__file__).parent / ".test.db"
-if _TEST_DB.exists():
-    _TEST_DB.unlink()
+# WAL mode leaves -wal / -shm sidecars next to the database; stale ones would be
+# replayed into the fresh file.
+for path in (_TEST_DB, *(_TEST_DB.with_name(_TEST_DB.name + s) for s in ("-wal", "-shm"))):
+    path.unlink(missing_ok=True)
 os.environ["SWARM_DATABASE_URL"] = f"sqlite:///{_TEST_DB}"
+
+# Blobs, cached results, spilled events and the secret key go to a throwaway
+# instance dir, never the real backend/instance.
+_INSTANCE_DIR = tempfile.mkdtemp(prefix="swarm-test-instance-")
+atexit.register(shutil.rmtree, _INSTANCE_DIR, ignore_errors=True)
+os.environ["SWARM_INSTANCE_DIR"] = _INSTANCE_DIR
@@ -1,5 +1,6 @@
 """API tests through the full FastAPI stack (auth, workflows, runs, isolation)."""
 
+import json
 import time
 
 import pytest
@@ -205,6 +206,43 @@ def test_run_executes_and_persists(logged_in):
     assert detail["summary"]["node_statuses"]["set_variable_1"] == "success"
 
 
+def test_resume_interrupted_execution_skips_checkpointed_nodes(logged_in):
+    from app.db import SessionLocal
+    from app.engine.runs import manager
+    from app.models import Execution, ExecutionNode
+
+    run_id = logged_in.post("/api/run", json={"definition": VALID_DEFINITION}).json()["run_id"]
+    for _ in range(50):
+        if logged_in.get(f"/api/runs/{run_id}").json()["run"]["status"] != "running":
+            break
+        time.sleep(0.1)
+    assert logged_in.post(f"/api/executions/{run_id}/resume").status_code == 409
+
+    # Simulate a crash after the trigger finished but before set_variable_1 did.
+    db = SessionLocal()
+    try:
+        db.query(ExecutionNode).filter(
+            ExecutionNode.execution_id == run_id, ExecutionNode.node_id == "set_variable_1"
+        ).delete()
+        db.get(Execution, run_id).status = "interrupted"
+        db.commit()
+    finally:
+        db.close()
+
+    resumed = logged_in.post(f"/api/executions/{run_id}/resume")
+    assert resumed.status_code == 200
+    assert resumed.json()["run_id"] == run_id
+    for _ in range(50):
+        run = logged_in.get(f"/api/runs/{run_id}").json()["run"]
+        if run["status"] != "running":
+            break
+        time.sleep(0.1)
+    assert run["status"] == "success"
+    assert run["result"]["outputs"]["set_variable_1"]["doubled"] == 2
+    resumed_nodes = {e["node_id"] for e in manager.get(run_id).events if e.get("resumed")}
+    assert resumed_nodes == {"manual_trigger_1"}
+
+
 def test_run_with_unknown_node_type_reports_error(logged_in):
     definition = {
         "nodes": [{"id": "a", "type": "does_not_exist", "config": {}}],
@@ -228,3 +266,248 @@ def test_runs_isolated_between_users(logged_in):
     other = TestClient(app)
     other.post("/api/auth/login", json={"username": "intruder", "password": "secret123"})
     assert other.get(f"/api/runs/{run_id}").status_code == 404
+
+
+def test_run_events_websocket_batches_and_resumes_from_seq(logged_in):
+    run_id = logged_in.post("/api/run", json={"definition": VALID_DEFINITION}).json()["run_id"]
+    with logged_in.websocket_connect(f"/api/runs/{run_id}/ws") as ws:
+        events = [ws.receive_json()]
+        while events[-1]["type"] != "run_finished":
+            events.append(ws.receive_json())
+
+    # A reconnecting client asks for what came after the last seq it saw.
+    since = events[1]["seq"]
+    with logged_in.websocket_connect(f"/api/runs/{run_id}/ws?batch=1&since={since}") as ws:
+        batches = [ws.receive_json()]
+        while batches[-1][-1]["type"] != "run_finished":
+            batches.append(ws.receive_json())
+    replayed = [event for batch in batches for event in batch]
+    assert all(isinstance(batch, list) for batch in batches)
+    assert replayed == events[2:]
+
+
+def test_run_events_long_poll_and_sse_resume_from_cursor(logged_in):
+    run_id = logged_in.post("/api/run", json={"definition": VALID_DEFINITION}).json()["run_id"]
+    events, since = [], -1
+    for _ in range(50):
+        page = logged_in.get(
+            f"/api/runs/{run_id}/events", params={"since_seq": since, "wait": 5}
+        ).json()
+        events += page["events"]
+        since = page["next"]
+        if page["done"]:
+            break
+    assert events[-1]["type"] == "run_finished"
+    assert [e["seq"] for e in events] == list(range(len(events)))
+    # Caught up on a finished run: answers at once instead of waiting.
+    tail = logged_in.get(f"/api/runs/{run_id}/events", params={"since_seq": since}).json()
+    assert tail == {"events": [], "next": since, "status": "success", "done": True}
+
+    with logged_in.stream(
+        "GET", f"/api/runs/{run_id}/stream", headers={"Last-Event-ID": "0"}
+    ) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        ids = [int(line[4:]) for line in response.iter_lines() if line.startswith("id: ")]
+    assert ids == [e["seq"] for e in events[1:]]
+
+    assert logged_in.get("/api/runs/nope/events").status_code == 404
+
+
+def test_saved_schedule_trigger_is_scheduled_until_deleted(logged_in):
+    definition = {
+        "nodes": [
+            {
+                "id": "schedule_trigger_1",
+                "type": "schedule_trigger",
+                "position": {"x": 0, "y": 0},
+                "config": {"mode": "cron", "cron": "0 9 * * mon", "timezone": "UTC"},
+            }
+        ],
+        "edges": [],
+    }
+    wf_id = logged_in.post(
+        "/api/workflows", json={"name": "weekly", "definition": definition}
+    ).json()["workflow"]["id"]
+    [entry] = [
+        s for s in logged_in.get("/api/schedules").json()["schedules"] if s["workflow_id"] == wf_id
+    ]
+    assert entry["workflow_name"] == "weekly" and entry["overlap"] == "skip"
+    assert entry["next_run_at"].endswith("09:00:00+00:00")
+
+    definition["nodes"][0]["config"]["enabled"] = False
+    logged_in.put(f"/api/workflows/{wf_id}", json={"name": "weekly", "definition": definition})
+    assert all(
+        s["workflow_id"] != wf_id for s in logged_in.get("/api/schedules").json()["schedules"]
+    )
+    assert logged_in.delete(f"/api/workflows/{wf_id}").status_code == 200
+
+
+def test_webhook_starts_saved_workflow_without_a_session(logged_in):
+    token = "hook-token-0123456789"
+    definition = {
+        "nodes": [
+            {"id": "hook", "type": "webhook_trigger", "config": {"token": token}},
+            {
+                "id": "set_variable_1",
+                "type": "set_variable",
+                "config": {"variables": '{"doubled": {{ input.body.n * 2 }}}'},
+            },
+        ],
+        "edges": [
+            {
+                "source": "hook",
+                "target": "set_variable_1",
+                "sourceHandle": "out",
+                "targetHandle": "in",
+            }
+        ],
+    }
+    wf_id = logged_in.post(
+        "/api/workflows", json={"name": "hooked", "definition": definition}
+    ).json()["workflow"]["id"]
+
+    anonymous = TestClient(app)
+    assert anonymous.post("/hooks/not-a-token", json={}).status_code == 404
+    response = anonymous.post(f"/hooks/{token}?source=test", json={"n": 21})
+    assert response.status_code == 202
+
+    for _ in range(50):
+        runs = [
+            e
+            for e in logged_in.get("/api/executions").json()["executions"]
+            if e["workflow_id"] == wf_id and e["status"] != "running"
+        ]
+        if runs:
+            break
+        time.sleep(0.1)
+    assert runs[0]["status"] == "success"
+    node = logged_in.get(f"/api/executions/{runs[0]['id']}/nodes/hook").json()["node"]
+    assert node["output"]["query"] == {"source": "test"}
+    assert "cookie" not in node["output"]["headers"]
+    node = logged_in.get(f"/api/executions/{runs[0]['id']}/nodes/set_variable_1").json()["node"]
+    assert node["output"]["doubled"] == 42
+
+    logged_in.delete(f"/api/workflows/{wf_id}")
+    assert anonymous.post(f"/hooks/{token}", json={}).status_code == 404
+
+
+def _wait_for_run(client, run_id):
+    for _ in range(50):
+        run = client.get(f"/api/runs/{run_id}").json()["run"]
+        if run["status"] != "running":
+            return run
+        time.sleep(0.1)
+    return run
+
+
+def test_run_saved_workflow_by_id_uses_the_latest_save(logged_in):
+    wf_id = logged_in.post(
+        "/api/workflows", json={"name": "by id", "definition": VALID_DEFINITION}
+    ).json()["workflow"]["id"]
+
+    runs = [logged_in.post(f"/api/workflows/{wf_id}/run", json={"input": {"n": n}}) for n in (2, 3)]
+    results = [_wait_for_run(logged_in, r.json()["run_id"]) for r in runs]
+    assert [r["result"]["outputs"]["set_variable_1"]["doubled"] for r in results] == [4, 6]
+    assert results[0]["workflow_name"] == "by id"
+    assert logged_in.get("/api/engine/stats").json()["definitions"]["hits"] >= 1
+
+    edited = json.loads(json.dumps(VALID_DEFINITION))
+    edited["nodes"][1]["config"]["variables"] = "{\"tripled\": {{ input['n'] * 3 }}}"
+    logged_in.put(f"/api/workflows/{wf_id}", json={"name": "by id", "definition": edited})
+    run_id = logged_in.post(f"/api/workflows/{wf_id}/run").json()["run_id"]
+    assert _wait_for_run(logged_in, run_id)["result"]["outputs"]["set_variable_1"] == {
+        "n": 1,
+        "tripled": 3,
+    }
+
+    assert logged_in.post("/api/workflows/999999/run").status_code == 404
+    logged_in.delete(f"/api/workflows/{wf_id}")
+    assert logged_in.post(f"/api/workflows/{wf_id}/run").status_code == 404
+
+
+def test_engine_stats(logged_in):
+    stats = logged_in.get("/api/engine/stats").json()
+    assert "max_wait_ms" in stats["concurrency"]["nodes"]
+    assert stats["plans"]["misses"] >= 1
+
+
+def test_execution_node_output_and_logs_are_fetched_separately(logged_in):
+    definition = {
+        "nodes": [
+            *VALID_DEFINITION["nodes"],
+            {
+                "id": "if_1",
+                "type": "if_condition",
+                "config": {"mode": "expression", "expression": "{{ input['doubled'] > 1 }}"},
+            },
+            {"id": "no_branch", "type": "set_variable", "config": {"variables": "{}"}},
+        ],
+        "edges": [
+            *VALID_DEFINITION["edges"],
+            {"source": "set_variable_1", "target": "if_1"},
+            {"source": "if_1", "target": "no_branch", "sourceHandle": "false"},
+        ],
+    }
+    run_id = logged_in.post("/api/run", json={"definition": definition}).json()["run_id"]
+    for _ in range(50):
+        if logged_in.get(f"/api/runs/{run_id}").json()["run"]["status"] != "running":
+            break
+        time.sleep(0.1)
+
+    detail = logged_in.get(f"/api/executions/{run_id}").json()["execution"]
+    assert "outputs" not in detail["summary"] and "logs" not in detail["summary"]
+
+    node = logged_in.get(f"/api/executions/{run_id}/nodes/set_variable_1").json()["node"]
+    assert node["status"] == "success" and node["output"]["doubled"] == 2
+    skipped = logged_in.get(f"/api/executions/{run_id}/nodes/no_branch").json()["node"]
+    assert skipped["status"] == detail["summary"]["node_statuses"]["no_branch"] != "success"
+    missing = logged_in.get(f"/api/executions/{run_id}/nodes/nope")
+    assert missing.status_code == 404
+
+    page = logged_in.get(f"/api/executions/{run_id}/logs", params={"limit": 1}).json()
+    assert [log["node_id"] for log in page["logs"]] == ["if_1"]
+    assert "true" in page["logs"][0]["message"]
+    rest = logged_in.get(
+        f"/api/executions/{run_id}/logs", params={"after": page["next"], "limit": 1}
+    ).json()
+    assert rest == {"logs": [], "next": None}
+
+
+def test_executions_keyset_pagination(logged_in):
+    for _ in range(3):
+        logged_in.post("/api/run", json={"definition": VALID_DEFINITION})
+    everything = logged_in.get("/api/executions", params={"limit": 500}).json()
+    assert everything["next"] is None
+    expected = [e["id"] for e in everything["executions"]]
+    assert len(expected) >= 3
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = logged_in.get("/api/executions", params=params).json()
+        seen += [e["id"] for e in page["executions"]]
+        cursor = page["next"]
+        if cursor is None:
+            break
+    assert seen == expected
+    assert logged_in.get("/api/executions", params={"cursor": "junk"}).status_code == 422
+
+
+def test_retention_policies(logged_in):
+    wf_id = logged_in.post(
+        "/api/workflows", json={"name": "kept", "definition": VALID_DEFINITION}
+    ).json()["workflow"]["id"]
+    assert logged_in.put("/api/retention", json={"max_age_days": 30}).status_code == 200
+    response = logged_in.put(
+        "/api/retention", json={"workflow_id": wf_id, "max_count": 5, "failure_max_age_days": 90}
+    )
+    assert response.json()["policy"]["max_count"] == 5
+    assert logged_in.put("/api/retention", json={"max_count": -1}).status_code == 422
+    assert logged_in.put("/api/retention", json={"workflow_id": 999999}).status_code == 404
+
+    policies = logged_in.get("/api/retention").json()["policies"]
+    assert {p["workflow_id"]: p["max_age_days"] for p in policies} == {None: 30, wf_id: None}
+
+    logged_in.put("/api/retention", json={"workflow_id": wf_id})  # no limits: removed
+    assert [p["workflow_id"] for p in logged_in.get("/api/retention").json()["policies"]] == [None]
+    logged_in.put("/api/retention", json={})
@@ -7,6 +7,7 @@ from fastapi.testclient import TestClient
 
 from app import google
 from app.db import SessionLocal
+from app.engine import credentials
 from app.engine.credentials import resolve_credential
 from app.engine.types import NodeExecutionError
 from app.main import app
@@ -192,3 +193,64 @@ async def test_resolver_requires_connection(client):
     me = client.get("/api/auth/me").json()["user"]
     with pytest.raises(NodeExecutionError, match="not connected"):
         await resolve_credential(me["id"], created["id"])
+
+
+async def test_resolver_caches_and_refreshes_once(client, monkeypatch):
+    import asyncio
+
+    me = client.get("/api/auth/me").json()["user"]
+    db = SessionLocal()
+    cred = Credential(
+        user_id=me["id"],
+        name="single flight",
+        type="google_oauth2",
+        connected=True,
+        data=encrypt_json(
+            {
+                "client_id": "sf",
+                "client_secret": "sf-secret",
+                "services": ["sheets"],
+                "refresh_token": "rt",
+                "access_token": "at-expired",
+                "expires_at": time.time() - 10,
+            }
+        ),
+    )
+    db.add(cred)
+    db.commit()
+    cred_id = cred.id
+    db.close()
+
+    refreshes = []
+
+    async def slow_refresh(client_id, client_secret, refresh_token):
+        refreshes.append(refresh_token)
+        await asyncio.sleep(0.05)
+        return {"access_token": f"at-{len(refreshes)}", "expires_in": 3600}
+
+    monkeypatch.setattr(google, "refresh_access_token", slow_refresh)
+
+    resolved = await asyncio.gather(*(resolve_credential(me["id"], cred_id) for _ in range(10)))
+    assert {r["access_token"] for r in resolved} == {"at-1"}
+    assert len(refreshes) == 1
+
+    assert (await resolve_credential(me["id"], cred_id))["access_token"] == "at-1"
+    assert len(refreshes) == 1  # served from the cache
+
+    # Edits and deletes made without invalidate_credential (another process, such
+    # as a worker) are noticed through updated_at once REVALIDATE_SECONDS pass.
+    db = SessionLocal()
+    row = db.get(Credential, cred_id)
+    row.data = encrypt_json({**decrypt_json(row.data), "access_token": "at-edited"})
+    db.commit()
+    db.close()
+    assert (await resolve_credential(me["id"], cred_id))["access_token"] == "at-1"
+    monkeypatch.setattr(credentials, "REVALIDATE_SECONDS", 0)
+    assert (await resolve_credential(me["id"], cred_id))["access_token"] == "at-edited"
+
+    db = SessionLocal()
+    db.query(Credential).filter(Credential.id == cred_id).delete()
+    db.commit()
+    db.close()
+    with pytest.raises(NodeExecutionError, match="not found"):
+        await resolve_credential(me["id"], cred_id)
@@ -0,0 +1,117 @@
+"""Database layer: SQLite storage profile, group-committing write queue, run persistence."""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import config
+from app.db import SessionLocal, WriteQueue, create_db_engine, engine, init_db
+from app.engine import runs
+from app.engine.registry import get_registry
+from app.models import Execution, User
+
+DEFINITION = {
+    "nodes": [{"id": "t", "type": "manual_trigger", "config": {"payload": "{}"}}],
+    "edges": [],
+}
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    init_db()
+
+
+def _add_user(name):
+    def op(db):
+        db.add(User(username=name, email=f"{name}@example.com", password_hash="x"))
+        return name
+
+    return op
+
+
+def _count_users(prefix):
+    db = SessionLocal()
+    try:
+        return db.query(User).filter(User.username.startswith(prefix)).count()
+    finally:
+        db.close()
+
+
+def _blocker(writes):
+    """Occupy the writer thread until the returned event is set."""
+    running, gate = threading.Event(), threading.Event()
+
+    def op(db):
+        running.set()
+        return gate.wait(5)
+
+    future = writes.submit(op)
+    assert running.wait(5)
+    return future, gate
+
+
+def test_sqlite_profile_applied_on_connect():
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        busy = conn.execute(text("PRAGMA busy_timeout")).scalar()
+        assert busy == config.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -config.SQLITE_CACHE_MB * 1024
+
+
+def test_sqlite_profile_follows_config(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "SQLITE_JOURNAL_MODE", "DELETE")
+    monkeypatch.setattr(config, "SQLITE_SYNCHRONOUS", "FULL")
+    tuned = create_db_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    try:
+        with tuned.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 2  # FULL
+    finally:
+        tuned.dispose()
+
+
+def test_queued_writes_share_commits():
+    writes = WriteQueue()
+    first, gate = _blocker(writes)
+    # Everything submitted while the first group is in progress goes into the next one.
+    futures = [writes.submit(_add_user(f"group{i}")) for i in range(50)]
+    gate.set()
+    assert first.result(5) is True
+    assert [f.result(5) for f in futures] == [f"group{i}" for i in range(50)]
+    assert writes.stats() == {"commits": 2, "operations": 51}
+    assert _count_users("group") == 50
+
+
+def test_failing_write_does_not_sink_its_group():
+    writes = WriteQueue()
+    _, gate = _blocker(writes)
+    ok = writes.submit(_add_user("isolated_ok"))
+    duplicate = writes.submit(_add_user("isolated_ok"))
+    gate.set()
+    assert ok.result(5) == "isolated_ok"
+    with pytest.raises(Exception, match="UNIQUE"):
+        duplicate.result(5)
+    assert _count_users("isolated_ok") == 1
+
+
+async def test_burst_of_run_starts_is_group_committed(monkeypatch):
+    monkeypatch.setattr(runs.config, "RUN_MODE", "inline")
+    manager = runs.RunManager()
+    started = await asyncio.gather(
+        *(manager.start(DEFINITION, get_registry(), user_id=1) for _ in range(100))
+    )
+    await asyncio.gather(*(r.task for r in started))
+
+    await runs.write_queue.flush()
+    db = SessionLocal()
+    try:
+        ids = [r.id for r in started]
+        rows = db.query(Execution).filter(Execution.id.in_(ids)).all()
+    finally:
+        db.close()
+    assert len(rows) == 100 and {r.status for r in rows} == {"success"}
+    # The inserts were coalesced: far fewer commits than runs.
+    assert runs.write_queue.commits < runs.write_queue.operations
@@ -1,5 +1,7 @@
 """Engine tests: everything the old engine could not do."""
 
+import asyncio
+
 import pytest
 
 from app.engine.executor import execute_workflow
@@ -52,6 +54,32 @@ def test_template_renders_nested_config():
     assert render_config(config, scope) == {"a": ["swarm"], "b": {"c": "hi swarm"}}
 
 
+def test_compiled_template_reused_across_scopes():
+    from app.engine.templating import compile_config, compile_string
+
+    assert compile_string("{{ input['n'] * 2 }}") is compile_string("{{ input['n'] * 2 }}")
+    compiled = compile_config({"v": "{{ input['n'] * 2 }}", "s": "n={{ input.n }}", "k": 7})
+    assert compiled.render({"input": {"n": 2}}) == {"v": 4, "s": "n=2", "k": 7}
+    assert compiled.render({"input": {"n": 5}}) == {"v": 10, "s": "n=5", "k": 7}
+    assert render_string("  {{ input.n }} ", {"input": {"n": 3}}) == 3
+
+
+def test_scope_overlays_input_without_copying():
+    from app.engine.templating import Scope
+
+    outputs = {"n1": {"count": 2}}
+    scope = Scope(outputs, input={"count": 5})
+    assert render_string("{{ input['count'] + n1['count'] }}", scope) == 7
+    outputs["n2"] = {"late": True}  # a view, not a snapshot
+    assert render_string("{{ n2.late }}", scope) is True
+    assert sorted(scope) == ["input", "n1", "n2"]
+
+
+def test_template_syntax_error_raises_at_render():
+    with pytest.raises(TemplateError, match="Could not evaluate"):
+        render_string("{{ input[ }}", {"input": {}})
+
+
 # ---------- engine: data flow ----------
 
 
@@ -293,3 +321,423 @@ async def test_parallel_branches_run_concurrently(registry):
     elapsed = time.time() - started
     assert result["status"] == "success"
     assert elapsed < 1.0, f"Delays did not run in parallel (took {elapsed:.2f}s)"
+
+
+async def test_per_run_cap_serializes_and_reports_queue_wait(registry):
+    from app.engine.limits import ConcurrencyGovernor
+
+    events = []
+    governor = ConcurrencyGovernor()
+    result = await execute_workflow(
+        wf(
+            [
+                trigger(),
+                {"id": "d1", "type": "delay", "config": {"seconds": 0.2}},
+                {"id": "d2", "type": "delay", "config": {"seconds": 0.2}},
+            ],
+            [{"source": "start", "target": "d1"}, {"source": "start", "target": "d2"}],
+        ),
+        registry,
+        emit=events.append,
+        governor=governor,
+        max_parallel=1,
+    )
+    assert result["status"] == "success"
+    running = [e for e in events if e["type"] == "node_state" and e["status"] == "running"]
+    assert any(e.get("queued_ms", 0) >= 150 for e in running)
+    assert governor.stats()["nodes"]["max_wait_ms"] >= 150
+
+
+async def test_for_each_runs_node_per_item_in_a_bounded_pool(registry):
+    import time
+
+    events = []
+    started = time.time()
+    result = await execute_workflow(
+        wf(
+            [
+                trigger(payload='{"rows": [1, 2, 3, 4, 5, 6, 7, 8]}'),
+                {
+                    "id": "wait",
+                    "type": "delay",
+                    "config": {"seconds": 0.1},
+                    "for_each": {"items": "{{ input['rows'] }}", "concurrency": 4},
+                },
+                {
+                    "id": "double",
+                    "type": "set_variable",
+                    "config": {"variables": '{"doubled": {{ input * 2 }}}'},
+                    "for_each": True,
+                },
+            ],
+            [{"source": "start", "target": "wait"}, {"source": "wait", "target": "double"}],
+        ),
+        registry,
+        emit=events.append,
+    )
+    elapsed = time.time() - started
+    assert result["status"] == "success"
+    assert result["outputs"]["wait"] == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert [row["doubled"] for row in result["outputs"]["double"]] == [2, 4, 6, 8, 10, 12, 14, 16]
+    assert 0.2 <= elapsed < 0.6, f"8 items, 4 at a time, took {elapsed:.2f}s"
+    progress = [e["items"] for e in events if e.get("node_id") == "wait" and "items" in e]
+    assert progress[0] == {"done": 0, "total": 8} and progress[-1] == {"done": 8, "total": 8}
+
+
+async def test_for_each_failing_item_fails_the_node(registry):
+    result = await execute_workflow(
+        wf(
+            [
+                trigger(payload='{"rows": [1, -1, 2]}'),
+                {
+                    "id": "wait",
+                    "type": "delay",
+                    "config": {"seconds": "{{ input }}"},
+                    "for_each": {"items": "{{ input['rows'] }}"},
+                },
+                {
+                    "id": "scalar",
+                    "type": "delay",
+                    "config": {"seconds": 0},
+                    "for_each": True,
+                },
+            ],
+            [{"source": "start", "target": "wait"}, {"source": "start", "target": "scalar"}],
+        ),
+        registry,
+    )
+    assert result["node_statuses"]["wait"] == "error"
+    assert result["errors"]["wait"] == "Item 1: Seconds cannot be negative"
+    assert result["errors"]["scalar"] == "For each item: expected a list, got dict"
+
+
+# ---------- engine: checkpoints ----------
+
+
+async def test_checkpoints_replay_instead_of_rerunning(registry):
+    definition = wf(
+        [
+            trigger(payload='{"n": 2}'),
+            {
+                "id": "check",
+                "type": "if_condition",
+                "config": {"value1": "{{ input.n }}", "operator": ">", "value2": "5"},
+            },
+            {"id": "big", "type": "set_variable", "config": {"variables": '{"v": "big"}'}},
+            {"id": "small", "type": "set_variable", "config": {"variables": '{"v": "small"}'}},
+        ],
+        [
+            {"source": "start", "target": "check"},
+            {"source": "check", "target": "big", "sourceHandle": "true"},
+            {"source": "check", "target": "small", "sourceHandle": "false"},
+        ],
+    )
+    saved = {}
+
+    async def checkpoint(nid, data, handles, elapsed_ms):
+        saved[nid] = (data, handles)
+
+    first = await execute_workflow(definition, registry, checkpoint=checkpoint)
+    assert first["node_statuses"]["small"] == "success"
+    assert saved["check"][1] == {"false"}
+
+    # Resume as if the process died after 'check' claimed the true branch:
+    # the replayed handles decide the route, and replayed nodes do not re-run.
+    events = []
+    restored = {"start": ({"n": 9}, None), "check": ({"n": 9}, {"true"})}
+    result = await execute_workflow(definition, registry, emit=events.append, restored=restored)
+    assert result["node_statuses"] == {
+        "start": "success",
+        "check": "success",
+        "big": "success",
+        "small": "skipped",
+    }
+    resumed = {e["node_id"] for e in events if e.get("resumed")}
+    assert resumed == {"start", "check"}
+    assert not any(e.get("status") == "running" and e.get("node_id") in resumed for e in events)
+
+
+async def test_result_cache_evicts_lru_and_expires(tmp_path):
+    import time
+
+    from app.engine.cache import ResultCache
+
+    cache = ResultCache(tmp_path, memory_bytes=120, disk_bytes=400)  # ~185 bytes per file
+    for key in ("a", "b", "c"):
+        await cache.put(key * 64, {"v": key * 20}, None, ttl=60)
+    assert await cache.get("a" * 64, "t") is None  # evicted from memory and disk
+    assert (await cache.get("c" * 64, "t")).data == {"v": "c" * 20}
+    files = list(tmp_path.glob("*/*.json"))
+    assert len(files) == 2
+    assert all("c" * 20 not in f.read_text() for f in files)  # encrypted at rest
+
+    await cache.put("d" * 64, {"v": 1}, {"true"}, ttl=0.01)
+    time.sleep(0.02)
+    assert await cache.get("d" * 64, "t") is None
+    assert cache.stats()["node_types"]["t"] == {"hits": 1, "misses": 2}
+
+
+# ---------- engine: compiled plans ----------
+
+
+def test_plan_cached_per_definition_content(registry):
+    from app.engine.plan import get_plan
+
+    definition = wf([trigger(), {"id": "a", "type": "delay", "config": {}}], [])
+    plan = get_plan(definition, registry)
+    reordered = {"edges": [], "nodes": [dict(n) for n in definition["nodes"]]}
+    assert get_plan(reordered, registry) is plan
+
+    definition["nodes"][1]["config"] = {"seconds": 2}
+    assert get_plan(definition, registry) is not plan
+    assert plan.nodes["a"]["config"] == {}  # the plan kept its own copy
+
+
+def test_plan_invalidated_by_registry_reload():
+    from app.engine.plan import get_plan
+    from app.engine.registry import NodeRegistry
+
+    registry = NodeRegistry()
+    registry.load()
+    definition = wf([trigger()], [])
+    plan = get_plan(definition, registry)
+    registry.load()
+    assert get_plan(definition, registry) is not plan
+
+
+def test_pinned_definition_skips_hashing(registry, monkeypatch):
+    from app.engine import plan as plan_module
+
+    definition = wf([trigger(), {"id": "a", "type": "delay", "config": {}}], [])
+    plan_module.plan_cache.pin(definition)
+    plan = plan_module.get_plan(definition, registry)
+    monkeypatch.setattr(plan_module, "definition_key", None)  # any hashing now fails
+    try:
+        assert plan_module.get_plan(definition, registry) is plan
+    finally:
+        plan_module.plan_cache.unpin(definition)
+    with pytest.raises(TypeError):
+        plan_module.get_plan(definition, registry)
+
+
+def test_plan_resolves_handles_and_topology(registry):
+    from app.engine.plan import get_plan
+
+    plan = get_plan(
+        wf(
+            [
+                trigger(),
+                {"id": "check", "type": "if_condition", "config": {}},
+                {"id": "yes", "type": "delay", "config": {}},
+                {"id": "orphan", "type": "delay", "config": {}},
+            ],
+            [
+                {"source": "check", "target": "yes", "sourceHandle": "true"},
+                {"source": "start", "target": "check"},
+            ],
+        ),
+        registry,
+    )
+    assert plan.trigger == "start"
+    assert plan.reachable == {"start", "check", "yes"}
+    assert plan.order == ("start", "check", "yes")
+    assert plan.refs["yes"] == frozenset()
+    assert [(e.source, e.source_handle) for e in plan.edges] == [
+        ("check", "true"),
+        ("start", "out"),
+    ]
+
+
+async def test_expression_reads_non_adjacent_upstream_output(registry):
+    result = await execute_workflow(
+        wf(
+            [
+                trigger(payload='{"n": 4}'),
+                {"id": "a", "type": "set_variable", "config": {"variables": '{"x": 1}'}},
+                {
+                    "id": "b",
+                    "type": "transform",
+                    "config": {"mode": "expression", "expression": "{{ start['n'] * 10 }}"},
+                },
+            ],
+            [{"source": "start", "target": "a"}, {"source": "a", "target": "b"}],
+        ),
+        registry,
+    )
+    assert result["outputs"]["b"] == {"value": 40}
+    assert set(result["outputs"]) == {"start", "a", "b"}
+
+
+# ---------- engine: output previews ----------
+
+
+def test_bounded_json_stops_at_limit():
+    from app.engine.executor import bounded_json, preview
+
+    big = {"rows": [{"i": i, "text": "x" * 100} for i in range(100_000)]}
+    text, truncated = bounded_json(big, 1000)
+    assert truncated and len(text) == 1000
+    assert preview(big)["__truncated__"] is True
+    small = {"a": [1, 2, 3]}
+    assert bounded_json(small, 1000) == ('{"a": [1, 2, 3]}', False)
+    assert preview(small) is small
+
+
+def test_summary_leaves_outputs_and_logs_to_their_tables():
+    import json
+
+    from app.engine import runs
+
+    result = {
+        "status": "success",
+        "node_statuses": {"a": "success"},
+        "outputs": {"a": "x" * 500_000},
+        "logs": [{"level": "info", "node_id": "a", "message": "hi"}],
+    }
+    summary = json.loads(runs._summary_json(result))
+    assert summary == {"status": "success", "node_statuses": {"a": "success"}}
+
+
+# ---------- engine: output blob store ----------
+
+
+def test_output_blobs_are_compressed_shared_and_collected(tmp_path):
+    import json
+
+    from app.db import SessionLocal, init_db
+    from app.engine.blobs import OutputStore
+    from app.models import OutputBlob
+
+    init_db()
+    store = OutputStore(tmp_path, inline_bytes=64)
+    small = store.encode({"ok": True})
+    assert (small.digest, json.loads(small.text)) == (None, {"ok": True})
+
+    rows = [{"row": i, "name": "same value"} for i in range(2000)]
+    big = store.encode(rows)
+    assert big.text == "null" and len(big.blob) * 10 < big.size
+
+    db = SessionLocal()
+    try:
+        store.add(db, big)
+        store.add(db, store.encode(rows))  # a second execution with identical output
+        db.commit()
+        assert db.get(OutputBlob, big.digest).refs == 2
+        assert len(list(tmp_path.glob("*/*.z"))) == 1
+        assert json.loads(store.load(big.text, big.digest)) == rows
+
+        store.release(db, [big.digest])
+        assert store.collect(db) == []  # still referenced once
+        store.release(db, [big.digest])
+        assert store.collect(db) == [big.digest]
+        assert len(list(tmp_path.glob("*/*.z"))) == 1  # the file outlives the uncommitted delete
+        db.commit()
+        assert db.get(OutputBlob, big.digest) is None
+
+        # Another run stores the same output between the commit and the unlink.
+        store.add(db, big)
+        db.commit()
+        assert store.remove_files(db, [big.digest]) == 0
+        assert json.loads(store.load(big.text, big.digest)) == rows
+
+        store.release(db, [big.digest])
+        unused = store.collect(db)
+        db.commit()
+        assert store.remove_files(db, unused) == 1
+        assert not list(tmp_path.glob("*/*.z"))
+    finally:
+        db.close()
+
+
+# ---------- engine: run event buffers ----------
+
+
+def test_event_log_spills_to_disk_and_reads_back_by_seq(tmp_path):
+    from app.engine.events import EventLog
+
+    log = EventLog("run", capacity=10, directory=tmp_path)
+    for i in range(1000):
+        log.append({"type": "log", "message": str(i)})
+    assert len(log) == 1000 and len(log._memory) == 10
+    assert [e["seq"] for e in log.read(since=500, limit=5)] == [501, 502, 503, 504, 505]
+    assert [e["seq"] for e in log.read(since=985)] == list(range(986, 1000))
+    assert [e["message"] for e in log] == [str(i) for i in range(1000)]
+    assert log[-1]["seq"] == 999 and log[3]["message"] == "3"
+
+    log.close()
+    assert not list(tmp_path.iterdir())
+    # A reader still attached after the run was pruned sees what was in memory.
+    assert [e["seq"] for e in log.read(since=500, limit=5)] == [990, 991, 992, 993, 994]
+    assert [e["seq"] for e in log] == list(range(990, 1000))
+    assert log[-1]["seq"] == 999
+    with pytest.raises(IndexError, match="expired"):
+        log[3]
+
+
+async def test_slow_subscriber_coalesces_node_states_then_pages_from_log(tmp_path):
+    from app.engine.events import EventLog, Subscription
+
+    log = EventLog("run", capacity=8, directory=tmp_path)
+    sub = Subscription(log, limit=4)
+
+    def emit(event):
+        log.append(event)
+        sub.push(event)
+
+    assert sub.take() == []  # caught up with an empty log: live from here on
+    for status in ("pending", "running", "success"):
+        emit({"type": "node_state", "node_id": "a", "status": status})
+    emit({"type": "node_state", "node_id": "b", "status": "running"})
+    batch = await sub.get_batch()
+    assert [(e["node_id"], e["status"]) for e in batch] == [("a", "success"), ("b", "running")]
+    assert sub.coalesced == 2
+
+    # Overflowing the queue switches to paging the log, so nothing but the
+    # superseded states is ever lost.
+    for i in range(20):
+        emit({"type": "log", "message": str(i)})
+    received = []
+    while len(received) < 20:
+        received += await sub.get_batch(limit=3)
+    assert [e["message"] for e in received] == [str(i) for i in range(20)]
+    assert sub.take() == []
+    log.close()
+
+
+async def test_new_subscriber_replays_from_the_buffer(tmp_path):
+    from app.engine.events import EventLog
+    from app.engine.runs import Run
+
+    run = Run("replay", 1, None, "")
+    run.events = EventLog("replay", capacity=2, directory=tmp_path)
+    for i in range(5):
+        run.emit({"type": "log", "message": str(i)})
+    sub = run.subscribe(since=1)
+    run.emit({"type": "run_finished", "status": "success"})
+    seen = [(await sub.get())["seq"] for _ in range(4)]
+    assert seen == [2, 3, 4, 5]
+    run.close()
+
+
+async def test_batch_window_gathers_events_arriving_after_the_first(tmp_path):
+    from app.engine.events import EventLog, Subscription
+
+    log = EventLog("run", directory=tmp_path)
+    sub = Subscription(log)
+    sub.take()
+
+    def emit(event):
+        log.append(event)
+        sub.push(event)
+
+    async def trickle():
+        for i in range(5):
+            emit({"type": "log", "message": str(i)})
+            await asyncio.sleep(0.005)
+        emit({"type": "run_finished", "status": "success"})
+
+    producer = asyncio.create_task(trickle())
+    batch = await sub.get_batch(window=0.2)
+    await producer
+    assert [e["type"] for e in batch] == ["log"] * 5 + ["run_finished"]
+    log.close()
@@ -0,0 +1,201 @@
+"""File nodes: windowed streaming reads and buffered / atomic writes."""
+
+import asyncio
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.engine.types import NodeContext, NodeExecutionError
+from app.nodes import _files, read_file, write_file
+
+
+@pytest.fixture(autouse=True)
+def sandbox(tmp_path, monkeypatch):
+    monkeypatch.setattr(_files, "FILES_DIR", tmp_path)
+    return tmp_path
+
+
+def _ctx(**config):
+    return NodeContext(node_id="n", config=config)
+
+
+async def test_read_jsonl_window(sandbox):
+    (sandbox / "events.jsonl").write_text("".join(json.dumps({"i": i}) + "\n" for i in range(100)))
+    page = await read_file.run(_ctx(path="events.jsonl", format="jsonl", offset=10, limit=5))
+    assert page["records"] == [{"i": i} for i in range(10, 15)]
+    assert page["next_offset"] == 15
+
+    last = await read_file.run(_ctx(path="events.jsonl", format="jsonl", offset=98))
+    assert last["count"] == 2 and last["next_offset"] is None
+
+
+async def test_record_formats_need_an_ascii_compatible_encoding(sandbox):
+    (sandbox / "wide.csv").write_text("a,b\n1,2\n", encoding="utf-16")
+    with pytest.raises(NodeExecutionError, match="utf-16 is not ASCII-compatible"):
+        await read_file.run(_ctx(path="wide.csv", format="csv", encoding="utf-16"))
+    whole = await read_file.run(_ctx(path="wide.csv", format="text", encoding="utf-16"))
+    assert whole["content"] == "a,b\n1,2\n"
+
+
+async def test_read_jsonl_pages_over_blank_lines(sandbox):
+    (sandbox / "gaps.jsonl").write_text('{"a": 1}\n\n{"a": 2}\n\n\n{"a": 3}\n{"a": 4}\n')
+    seen, offset = [], 0
+    while offset is not None:
+        page = await read_file.run(_ctx(path="gaps.jsonl", format="jsonl", offset=offset, limit=2))
+        seen += page["records"]
+        offset = page["next_offset"]
+    assert seen == [{"a": i} for i in range(1, 5)]
+
+
+async def test_read_csv_rows_as_objects_within_max_bytes(sandbox):
+    rows = "".join(f"{i},name {i}\n" for i in range(50))
+    (sandbox / "people.csv").write_text("id,name\n" + rows)
+    page = await read_file.run(_ctx(path="people.csv", format="csv", max_bytes=40))
+    assert page["records"][0] == {"id": "0", "name": "name 0"}
+    assert 1 <= page["count"] < 50 and page["next_offset"] == page["count"]
+
+    plain = await read_file.run(_ctx(path="people.csv", format="csv", csv_header=False, limit=1))
+    assert plain["records"] == [["id", "name"]]
+
+
+async def test_read_lines_and_text_limits(sandbox):
+    (sandbox / "app.log").write_text("first\r\nsecond\nthird\n")
+    lines = await read_file.run(_ctx(path="app.log", format="lines", offset=1))
+    assert lines["records"] == ["second", "third"]
+
+    (sandbox / "notes.txt").write_text("héllo wörld", encoding="utf-8")
+    text = await read_file.run(_ctx(path="notes.txt", max_bytes=2))
+    assert text == {
+        "path": str(sandbox / "notes.txt"),
+        "size_bytes": 13,
+        "content": "h",  # the cut "é" is dropped, not mangled
+        "truncated": True,
+    }
+
+
+async def test_read_json_keeps_auto_fallback(sandbox):
+    (sandbox / "ok.json").write_text('{"a": 1}')
+    (sandbox / "broken.json").write_text("{not json")
+    assert (await read_file.run(_ctx(path="ok.json")))["data"] == {"a": 1}
+    assert (await read_file.run(_ctx(path="broken.json")))["content"] == "{not json"
+    with pytest.raises(NodeExecutionError, match="not valid JSON"):
+        await read_file.run(_ctx(path="broken.json", format="json"))
+    with pytest.raises(NodeExecutionError, match="record 1: invalid JSON"):
+        (sandbox / "bad.jsonl").write_text('{"a": 1}\nnope\n')
+        await read_file.run(_ctx(path="bad.jsonl", format="jsonl"))
+
+
+async def test_auto_reads_record_files_as_text(sandbox):
+    (sandbox / "rows.csv").write_text("id,name\n1,a\n")
+    (sandbox / "rows.jsonl").write_text('{"i": 1}\n')
+    assert (await read_file.run(_ctx(path="rows.csv")))["content"] == "id,name\n1,a\n"
+    assert (await read_file.run(_ctx(path="rows.jsonl")))["content"] == '{"i": 1}\n'
+
+
+async def test_overwrite_is_atomic_and_records_are_compact(sandbox):
+    await write_file.run(_ctx(path="out/data.json", content={"a": [1, 2]}, format="json"))
+    assert (sandbox / "out" / "data.json").read_text() == '{"a":[1,2]}'
+    result = await write_file.run(_ctx(path="out/data.json", content="replaced"))
+    assert result["chars_written"] == 8
+    assert (sandbox / "out" / "data.json").read_text() == "replaced"
+    assert [p.name for p in (sandbox / "out").iterdir()] == ["data.json"]  # no temp left
+
+    await write_file.run(_ctx(path="rows.jsonl", content='[{"i": 1}, {"i": 2}]', format="jsonl"))
+    assert (sandbox / "rows.jsonl").read_text() == '{"i":1}\n{"i":2}\n'
+    with pytest.raises(NodeExecutionError, match="list of records"):
+        await write_file.run(_ctx(path="rows.jsonl", content="nope", format="jsonl"))
+
+
+async def test_concurrent_appends_are_batched_without_interleaving(sandbox, monkeypatch):
+    async def append(i):
+        rows = [{"run": i, "n": n, "pad": "x" * 500} for n in range(3)]
+        return await write_file.run(_ctx(path="log.csv", content=rows, mode="append", format="csv"))
+
+    # Hold the first write until every append is queued behind it.
+    writer = _files.append_writer(sandbox / "log.csv")
+    queued = threading.Event()
+    open_file = writer._open
+
+    def held_open():
+        queued.wait(timeout=2)
+        return open_file()
+
+    monkeypatch.setattr(writer, "_open", held_open)
+    tasks = [asyncio.create_task(append(i)) for i in range(50)]
+    await asyncio.sleep(0.01)
+    queued.set()
+    results = await asyncio.gather(*tasks)
+    assert {r["records"] for r in results} == {3}
+    with open(sandbox / "log.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 150  # one header, written once
+    for i in range(50):
+        mine = [r for r in rows if r["run"] == str(i)]
+        assert [r["n"] for r in mine] == ["0", "1", "2"]
+    # Appends queued while a write was in progress went out together.
+    assert writer.writes == 2
+    _files.close_writers()
+
+
+async def test_cancelled_append_does_not_wedge_the_writer(sandbox):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+    busy = threading.Event()
+    blocker = loop.run_in_executor(None, busy.wait)  # the only thread is taken
+    writer = _files.append_writer(sandbox / "slow.log")
+
+    leader = asyncio.create_task(writer.append(b"first\n"))
+    await asyncio.sleep(0.01)  # its drain is queued behind the blocker
+    leader.cancel()
+    busy.set()
+    await blocker
+
+    await asyncio.wait_for(writer.append(b"second\n"), timeout=2)
+    assert (sandbox / "slow.log").read_bytes() == b"first\nsecond\n"
+    _files.close_writers()
+
+
+async def test_csv_appends_follow_the_files_header(sandbox):
+    async def append(rows):
+        return await write_file.run(_ctx(path="t.csv", content=rows, mode="append", format="csv"))
+
+    await append([{"a": 1, "b": 2}])
+    await append([{"b": 4, "a": 3}, {"a": 5}])
+    with pytest.raises(NodeExecutionError, match="Columns c are not in the file's header"):
+        await append([{"a": 6, "c": 7}])
+    assert (sandbox / "t.csv").read_text() == "a,b\n1,2\n3,4\n5,\n"
+    _files.close_writers()
+
+
+async def test_last_append_is_fsynced_once_appends_stop(sandbox, monkeypatch):
+    synced = threading.Event()
+    monkeypatch.setattr(_files, "FSYNC_INTERVAL", 0.05)
+    monkeypatch.setattr(_files.os, "fsync", lambda fd: synced.set())
+    writer = _files.append_writer(sandbox / "quiet.log")
+    await writer.append(b"only\n")
+    assert not synced.is_set()
+    assert await asyncio.to_thread(synced.wait, 2)
+    _files.close_writers()
+
+
+async def test_close_waits_for_a_drain_in_progress(sandbox, monkeypatch):
+    writer = _files.append_writer(sandbox / "busy.log")
+    writing = threading.Event()
+    open_file = writer._open
+
+    def slow_open():
+        writing.set()
+        time.sleep(0.05)
+        return open_file()
+
+    monkeypatch.setattr(writer, "_open", slow_open)
+    append = asyncio.create_task(writer.append(b"late\n"))
+    await asyncio.to_thread(writing.wait)
+    await asyncio.to_thread(_files.close_writers)
+    await append
+    assert writer._file is None  # closed after the write, not under it
+    assert (sandbox / "busy.log").read_bytes() == b"late\n"
@@ -4,6 +4,7 @@ Every test asserts what we SEND (URL, auth, payload encoding) and how we
 parse what comes back - the parts that must be exactly right for the real API.
 """
 
+import asyncio
 import base64
 import json
 
@@ -305,3 +306,80 @@ async def test_google_403_mentions_service_setup(transport):
     )
     with pytest.raises(NodeExecutionError, match="insufficient scopes"):
         await gmail_send.run(make_ctx({"to": "a@b.c", "subject": "s", "body": "b"}))
+
+
+async def test_google_calls_share_one_pooled_client(transport):
+    from app.http import close_clients, get_client
+
+    transport.handler = lambda r: httpx.Response(200, json={"ok": True})
+    client = get_client(transport=_google.TRANSPORT)
+    await _google.google_api(make_ctx({}), "GET", "https://www.googleapis.com/a")
+    await _google.google_api(make_ctx({}), "GET", "https://www.googleapis.com/b")
+    assert len(transport.requests) == 2
+    assert get_client(transport=_google.TRANSPORT) is client
+    assert get_client(follow_redirects=True) is not get_client()
+
+    await close_clients()
+    assert client.is_closed
+    assert get_client(transport=_google.TRANSPORT) is not client
+
+
+async def test_shared_client_does_not_keep_cookies(transport):
+    from app.http import get_client
+
+    transport.handler = lambda r: httpx.Response(200, headers={"Set-Cookie": "sid=abc; Path=/"})
+    client = get_client(transport=_google.TRANSPORT)
+    await client.get("https://example.com/login")
+    await client.get("https://example.com/me")
+    assert "cookie" not in transport.requests[1].headers
+    assert not client.cookies
+
+
+async def test_gmail_read_paginates_and_resolves_credential_once(transport):
+    resolved = []
+
+    async def counting_credential(credential_id):
+        resolved.append(credential_id)
+        return await fake_credential(credential_id)
+
+    pages = {None: (["a", "b"], "p2"), "p2": (["c", "d"], "p3"), "p3": (["e"], None)}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/messages"):
+            ids, next_token = pages[request.url.params.get("pageToken")]
+            body = {"messages": [{"id": i} for i in ids]}
+            if next_token:
+                body["nextPageToken"] = next_token
+            return httpx.Response(200, json=body)
+        message_id = request.url.path.rsplit("/", 1)[1]
+        return httpx.Response(200, json={"id": message_id, "payload": {"headers": []}})
+
+    transport.handler = handler
+    ctx = make_ctx({"max_results": 4, "include_body": False})
+    ctx.get_credential = counting_credential
+    result = await gmail_read.run(ctx)
+
+    assert [m["id"] for m in result["messages"]] == ["a", "b", "c", "d"]
+    listing = [r for r in transport.requests if r.url.path.endswith("/messages")]
+    assert [r.url.params["maxResults"] for r in listing] == ["4", "2"]
+    assert resolved == [1]  # one credential lookup for 6 requests
+
+
+async def test_gmail_read_cancels_remaining_fetches_on_failure(transport):
+    finished = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/messages"):
+            return httpx.Response(200, json={"messages": [{"id": f"m{i}"} for i in range(5)]})
+        message_id = request.url.path.rsplit("/", 1)[1]
+        if message_id == "m0":
+            return httpx.Response(500, json={"error": {"message": "backend error"}})
+        await asyncio.sleep(0.05)
+        finished.append(message_id)
+        return httpx.Response(200, json={"id": message_id, "payload": {"headers": []}})
+
+    transport.handler = handler
+    with pytest.raises(NodeExecutionError, match="backend error"):
+        await gmail_read.run(make_ctx({"max_results": 5}))
+    await asyncio.sleep(0.1)
+    assert finished == []
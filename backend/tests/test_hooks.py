@@ -0,0 +1,133 @@
+"""Webhook ingestion: bounded queue, back-pressure and micro-batching."""
+
+import asyncio
+import contextlib
+
+import pytest
+
+from app.engine.hooks import Hooks
+from app.engine.plan import plan_cache
+
+TOKEN = "x" * 16
+
+
+class FakeRun:
+    def __init__(self):
+        self._done = asyncio.Event()
+
+    async def wait(self):
+        await self._done.wait()
+
+
+class Harness:
+    def __init__(self, **kwargs):
+        self.inputs: list = []
+        self.runs: list[FakeRun] = []
+        self.hooks = Hooks(start=self.start, **kwargs)
+
+    async def start(self, **kwargs):
+        run = FakeRun()
+        self.inputs.append(kwargs["run_input"])
+        self.runs.append(run)
+        return run
+
+    @contextlib.asynccontextmanager
+    async def serving(self):
+        task = asyncio.create_task(self.hooks.serve())
+        await asyncio.sleep(0)
+        try:
+            yield self.hooks
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+
+def _definition(**config) -> dict:
+    config.setdefault("token", TOKEN)
+    return {
+        "nodes": [{"id": "hook", "type": "webhook_trigger", "config": config}],
+        "edges": [],
+    }
+
+
+async def test_full_queue_pushes_back_until_runs_finish():
+    h = Harness(queue_size=2, max_runs=1)
+    h.hooks.sync(1, 1, "w", _definition())
+    hook = h.hooks.get(TOKEN)
+    async with h.serving() as hooks:
+        # One run in flight, one payload held by the dispatcher, two queued.
+        results = []
+        for i in range(5):
+            results.append(hooks.offer(hook, i))
+            await asyncio.sleep(0.01)
+        assert results == [True, True, True, True, False]
+        assert h.inputs == [0] and hooks.stats()["rejected"] == 1
+
+        for expected in range(1, 4):
+            h.runs[-1]._done.set()
+            await asyncio.sleep(0.01)
+            assert h.inputs[-1] == expected
+        assert hooks.offer(hook, 5)
+
+
+async def test_payloads_are_micro_batched():
+    h = Harness(max_runs=0)
+    h.hooks.sync(1, 1, "w", _definition(batch_size=3, batch_window_ms=20))
+    hook = h.hooks.get(TOKEN)
+    async with h.serving() as hooks:
+        for i in range(4):
+            assert hooks.offer(hook, i)
+        await asyncio.sleep(0.01)
+        assert h.inputs == [{"items": [0, 1, 2], "count": 3}]  # full batch, no wait
+        await asyncio.sleep(0.05)
+        assert h.inputs[-1] == {"items": [3], "count": 1}  # the window closed
+
+
+@pytest.mark.parametrize("config", [{"token": "short"}, {"enabled": False}, {"batch_size": "lots"}])
+def test_unusable_hooks_are_not_registered(config):
+    hooks = Hooks(start=None)
+    hooks.sync(1, 1, "w", _definition(**config))
+    assert hooks.stats()["hooks"] == 0
+
+
+def test_tokens_belong_to_one_workflow():
+    hooks = Hooks(start=None)
+    hooks.sync(1, 1, "w", _definition())
+    hooks.sync(2, 1, "w", _definition())
+    assert hooks.get(TOKEN).workflow_id == 1
+    hooks.remove(1)
+    assert hooks.get(TOKEN) is None
+
+
+def test_registered_definitions_stay_pinned_until_removed():
+    hooks = Hooks(start=None)
+    pinned = plan_cache.stats()["pinned"]
+    hooks.sync(1, 1, "w", _definition())
+    hooks.sync(1, 1, "w", _definition())  # re-sync swaps the pin
+    assert plan_cache.stats()["pinned"] == pinned + 1
+    hooks.remove(1)
+    assert plan_cache.stats()["pinned"] == pinned
+
+
+async def test_shutdown_starts_runs_for_accepted_payloads():
+    h = Harness(max_runs=0)
+    h.hooks.sync(1, 1, "w", _definition(batch_size=5, batch_window_ms=60_000))
+    hook = h.hooks.get(TOKEN)
+    async with h.serving() as hooks:
+        assert hooks.offer(hook, 0) and hooks.offer(hook, 1)
+        await hooks.shutdown(timeout=1)
+        assert h.inputs == [{"items": [0, 1], "count": 2}]  # not left for the window
+        assert not hooks.offer(hook, 2)
+
+
+async def test_shutdown_logs_payloads_it_could_not_start(caplog):
+    h = Harness(max_runs=1)  # the first run never finishes, so nothing else starts
+    h.hooks.sync(1, 1, "w", _definition())
+    hook = h.hooks.get(TOKEN)
+    async with h.serving() as hooks:
+        for i in range(3):
+            assert hooks.offer(hook, i)
+        await hooks.shutdown(timeout=0.05)
+    assert h.inputs == [0]
+    assert "Dropped 2 accepted webhook payload(s)" in caplog.text
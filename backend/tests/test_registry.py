@@ -1,5 +1,6 @@
 """Drop-in node registry tests: user files in nodes/ become palette nodes."""
 
+import sys
 import textwrap
 
 import pytest
@@ -149,3 +150,89 @@ def test_reload_picks_up_new_and_edited_files(nodes_dir):
     (nodes_dir / "shout.py").write_text(VALID_ASYNC_NODE.replace('"Shout"', '"Shout v2"'))
     registry.load()
     assert registry.get("shout").name == "Shout v2"
+
+
+async def test_node_concurrency_caps_a_node_type(nodes_dir):
+    import time
+
+    (nodes_dir / "slow.py").write_text(
+        textwrap.dedent(
+            """
+            import asyncio
+
+            NODE_TYPE = "slow"
+            NODE_CONCURRENCY = 1
+
+            async def run(ctx):
+                await asyncio.sleep(0.2)
+                return {}
+            """
+        )
+    )
+    registry = NodeRegistry()
+    registry.load()
+    assert registry.get("slow").concurrency == 1
+    assert registry.get("llm").concurrency == 4
+
+    started = time.time()
+    result = await execute_workflow(
+        {
+            "nodes": [
+                {"id": "t", "type": "manual_trigger", "config": {}},
+                {"id": "s1", "type": "slow", "config": {}},
+                {"id": "s2", "type": "slow", "config": {}},
+            ],
+            "edges": [{"source": "t", "target": "s1"}, {"source": "t", "target": "s2"}],
+        },
+        registry,
+    )
+    assert result["status"] == "success"
+    assert time.time() - started >= 0.4
+
+
+async def test_cacheable_node_reuses_results(nodes_dir, tmp_path):
+    from app.engine.cache import ResultCache
+
+    (nodes_dir / "counted.py").write_text(
+        textwrap.dedent(
+            """
+            NODE_TYPE = "counted"
+            NODE_CACHEABLE = 60
+            CALLS = []
+
+            async def run(ctx):
+                CALLS.append(ctx.config["n"])
+                return {"n": ctx.config["n"]}
+            """
+        )
+    )
+    registry = NodeRegistry()
+    registry.load()
+    assert registry.get("counted").cache_ttl({}) == 60
+    assert registry.get("set_variable").cache_ttl is None
+    assert registry.get("http_request").cache_ttl({"method": "POST"}) == 0
+
+    def definition(n):
+        return {
+            "nodes": [
+                {"id": "t", "type": "manual_trigger", "config": {}},
+                {"id": "c", "type": "counted", "config": {"n": n}},
+            ],
+            "edges": [{"source": "t", "target": "c"}],
+        }
+
+    cache = ResultCache(tmp_path)
+    calls = sys.modules["swarm_user_node_counted"].CALLS
+    events = []
+    await execute_workflow(definition(1), registry, cache=cache)
+    second = await execute_workflow(definition(1), registry, emit=events.append, cache=cache)
+    assert calls == [1]
+    assert second["outputs"]["c"] == {"n": 1}
+    assert second["cache"] == {"hits": 1, "misses": 0}
+    done = next(e for e in events if e.get("node_id") == "c" and e["status"] == "success")
+    assert done["cache"] == {"status": "hit", "hits": 1, "misses": 0}
+
+    await execute_workflow(definition(2), registry, cache=cache)  # different config
+    await execute_workflow(definition(1), registry, cache=ResultCache(tmp_path))  # from disk
+    await execute_workflow(definition(1), registry)  # run did not opt in
+    assert calls == [1, 2, 1]
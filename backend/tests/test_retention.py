@@ -0,0 +1,130 @@
+"""Execution history retention: policy resolution and batched compaction."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app import config
+from app.db import SessionLocal, init_db
+from app.engine import retention
+from app.engine.blobs import OutputStore
+from app.models import Execution, ExecutionLog, ExecutionNode, OutputBlob, RetentionPolicy
+
+USER = 9001  # not used by any other test module
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    init_db()
+    store = OutputStore(tmp_path, inline_bytes=0)
+    monkeypatch.setattr(retention, "output_store", store)
+    yield store
+    db = SessionLocal()
+    try:
+        db.query(RetentionPolicy).filter(RetentionPolicy.user_id == USER).delete()
+        db.query(Execution).filter(Execution.user_id == USER).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _add(store, days_ago, status="success", workflow_id=None, output=None):
+    run_id = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.add(
+            Execution(
+                id=run_id,
+                user_id=USER,
+                workflow_id=workflow_id,
+                status=status,
+                started_at=datetime.now(UTC) - timedelta(days=days_ago),
+            )
+        )
+        stored = store.encode(output if output is not None else {"days": days_ago})
+        store.add(db, stored)
+        db.add(
+            ExecutionNode(
+                execution_id=run_id, node_id="n", output=stored.text, output_hash=stored.digest
+            )
+        )
+        db.add(ExecutionLog(execution_id=run_id, node_id="n", message="hi"))
+        db.commit()
+    finally:
+        db.close()
+    return run_id
+
+
+def _remaining():
+    db = SessionLocal()
+    try:
+        return {r.id for r in db.query(Execution.id).filter(Execution.user_id == USER).all()}
+    finally:
+        db.close()
+
+
+def _policy(workflow_id=None, **fields):
+    db = SessionLocal()
+    try:
+        db.add(RetentionPolicy(user_id=USER, workflow_id=workflow_id, **fields))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def test_age_limit_keeps_failures_longer(store):
+    fresh = _add(store, 1)
+    old = _add(store, 10)
+    old_failure = _add(store, 10, status="error")
+    _add(store, 40, status="error")  # past even the failure limit
+    running = _add(store, 50, status="running")
+    _policy(max_age_days=7, failure_max_age_days=30)
+
+    assert await retention.compact() == 2
+    assert _remaining() == {fresh, old_failure, running}
+
+    db = SessionLocal()
+    try:
+        assert db.query(ExecutionNode).filter(ExecutionNode.execution_id == old).count() == 0
+        assert db.query(ExecutionLog).filter(ExecutionLog.execution_id == old).count() == 0
+    finally:
+        db.close()
+
+
+async def test_workflow_policy_overrides_user_count_in_batches(store, monkeypatch):
+    monkeypatch.setattr(config, "RETENTION_MAX_COUNT", 0)
+    adhoc = [_add(store, days) for days in range(6)]
+    scoped = [_add(store, days, workflow_id=77) for days in range(6)]
+    _policy(max_count=4)
+    _policy(workflow_id=77, max_count=1)
+
+    assert await retention.compact(batch=2) == 2 + 5
+    assert _remaining() == set(adhoc[:4]) | {scoped[0]}
+
+
+async def test_shared_blob_survives_until_last_reference(store):
+    rows = [{"i": i} for i in range(50)]
+    keep = _add(store, 1, output=rows)
+    _add(store, 10, output=rows)
+    _policy(max_age_days=7)
+
+    assert await retention.compact() == 1
+    digest = store.encode(rows).digest
+    db = SessionLocal()
+    try:
+        assert db.get(OutputBlob, digest).refs == 1
+    finally:
+        db.close()
+    assert list(store.directory.glob("*/*.z"))
+
+    db = SessionLocal()
+    try:
+        db.query(Execution).filter(Execution.id == keep).update(
+            {"started_at": datetime.now(UTC) - timedelta(days=8)}
+        )
+        db.commit()
+    finally:
+        db.close()
+    assert await retention.compact() == 1
+    assert not list(store.directory.glob("*/*.z"))
@@ -0,0 +1,165 @@
+"""Schedules: cron parsing, catch-up after downtime and the overlap policies."""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+
+from app.db import SessionLocal, init_db, write_queue
+from app.engine import scheduler as scheduler_module
+from app.engine.cron import Cron, Interval, timezone
+from app.engine.scheduler import Scheduler, parse_schedule
+from app.models import ScheduleState
+
+WORKFLOW = 9101  # not used by any other test module
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_cron_fields_names_and_steps():
+    cron = Cron("*/15 9-17 * * mon-fri")
+    assert cron.next_after(_utc(2026, 10, 16, 9, 7)) == _utc(2026, 10, 16, 9, 15)
+    assert cron.next_after(_utc(2026, 10, 16, 17, 45)) == _utc(2026, 10, 19, 9, 0)  # Fri -> Mon
+    assert Cron("@monthly").next_after(_utc(2026, 1, 31, 12)) == _utc(2026, 2, 1)
+    # Both day fields restricted: either one matches (the 13th, or any Friday).
+    assert Cron("0 0 13 * fri").next_after(_utc(2026, 10, 10)) == _utc(2026, 10, 13)
+
+    with pytest.raises(ValueError, match="outside 0-23"):
+        Cron("0 24 * * *")
+    with pytest.raises(ValueError, match="5 fields"):
+        Cron("* * *")
+    with pytest.raises(ValueError, match="never fires"):
+        Cron("0 0 30 feb *").next_after(_utc(2026, 1, 1))
+
+
+def test_cron_timezone_and_interval_grid():
+    cron = Cron("30 2 * * *", timezone("Europe/Berlin"))
+    assert cron.next_after(_utc(2026, 7, 1)) == _utc(2026, 7, 1, 0, 30)  # CEST = UTC+2
+    # 02:30 does not exist on the spring-forward night; it fires an hour later.
+    assert cron.next_after(_utc(2026, 3, 28, 12)) == _utc(2026, 3, 29, 1, 30)
+    with pytest.raises(ValueError, match="Unknown timezone"):
+        timezone("Mars/Olympus")
+
+    every = Interval(3600)
+    assert every.next_after(_utc(2026, 10, 16, 9, 59, 59)) == _utc(2026, 10, 16, 10)
+    assert every.next_after(_utc(2026, 10, 16, 10)) == _utc(2026, 10, 16, 11)
+
+
+class FakeRun:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.finished_at = None
+        self._done = asyncio.Event()
+
+    async def wait(self):
+        await self._done.wait()
+
+    def finish(self):
+        self.finished_at = datetime.now(UTC)
+        self._done.set()
+
+
+class Harness:
+    def __init__(self, now: datetime, instant: bool = False):
+        self.now = now.timestamp()
+        self.instant = instant  # runs finish as soon as they start
+        self.runs: list[tuple[FakeRun, dict]] = []
+        self.scheduler = Scheduler(start=self.start, clock=lambda: self.now)
+
+    async def start(self, **kwargs):
+        run = FakeRun()
+        if self.instant:
+            run.finish()
+        self.runs.append((run, kwargs["run_input"]))
+        return run
+
+    async def tick(self, at: datetime):
+        self.now = at.timestamp()
+        await asyncio.gather(*await self.scheduler.tick())
+
+
+def _definition(**config) -> dict:
+    return {"nodes": [{"id": "t", "type": "schedule_trigger", "config": config}], "edges": []}
+
+
+@pytest.fixture(autouse=True)
+def state():
+    init_db()
+    yield
+    write_queue.barrier()
+    db = SessionLocal()
+    try:
+        db.query(ScheduleState).filter(ScheduleState.workflow_id == WORKFLOW).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize(("catch_up", "fired"), [("all", 3), ("latest", 1), ("skip", 0)])
+async def test_catch_up_after_downtime(catch_up, fired):
+    h = Harness(_utc(2026, 10, 16, 12), instant=True)
+    definition = _definition(mode="interval", interval_seconds=3600, catch_up=catch_up)
+    # The last tick before the restart was at 09:00, so 10:00-12:00 were missed.
+    h.scheduler.sync(WORKFLOW, 1, "hourly", definition, since=_utc(2026, 10, 16, 9))
+    await h.tick(_utc(2026, 10, 16, 12, 5))
+    assert [i["scheduled_at"] for _, i in h.runs] == [
+        _utc(2026, 10, 16, hour).isoformat() for hour in (10, 11, 12)[3 - fired :]
+    ]
+    [entry] = h.scheduler.entries_for(1)
+    assert entry["next_run_at"] == _utc(2026, 10, 16, 13).isoformat()
+
+    write_queue.barrier()
+    db = SessionLocal()
+    try:
+        saved = db.get(ScheduleState, WORKFLOW).last_tick_at
+    finally:
+        db.close()
+    assert saved.replace(tzinfo=UTC) == _utc(2026, 10, 16, 12)
+
+
+async def test_overlap_policies(monkeypatch):
+    cancelled = []
+
+    async def cancel(run_id):
+        cancelled.append(run_id)
+        return True
+
+    monkeypatch.setattr(scheduler_module.manager, "cancel", cancel)
+    minute = [_utc(2026, 10, 16, 12, m) for m in range(4)]
+
+    h = Harness(minute[0])
+    h.scheduler.sync(WORKFLOW, 1, "w", _definition(cron="* * * * *"))
+    await h.tick(minute[1])
+    await h.tick(minute[2])  # the first run is still going
+    assert len(h.runs) == 1 and h.scheduler.stats()["skipped"] == 1
+
+    h.scheduler.sync(WORKFLOW, 1, "w", _definition(cron="* * * * *", overlap="cancel_previous"))
+    await h.tick(minute[3])
+    assert cancelled == [h.runs[0][0].id] and len(h.runs) == 2
+
+    h = Harness(minute[0])
+    h.scheduler.sync(WORKFLOW, 1, "w", _definition(cron="* * * * *", overlap="queue"))
+    first = asyncio.gather(*await h.scheduler.tick(minute[1].timestamp()))
+    await asyncio.sleep(0)
+    second = asyncio.gather(*await h.scheduler.tick(minute[2].timestamp()))
+    await asyncio.sleep(0.01)
+    assert len(h.runs) == 1 and h.scheduler.entries_for(1)[0]["queued"] == 1
+    h.runs[0][0].finish()
+    await first
+    await asyncio.sleep(0.01)
+    assert len(h.runs) == 2  # started once the first one finished
+    h.runs[1][0].finish()
+    await second
+
+
+def test_invalid_or_disabled_schedules_are_not_active():
+    s = Scheduler(start=None)
+    s.sync(WORKFLOW, 1, "w", _definition(cron="61 * * * *"))
+    s.sync(WORKFLOW + 1, 1, "w", _definition(cron="@daily", enabled=False))
+    s.sync(WORKFLOW + 2, 1, "w", {"nodes": [{"id": "m", "type": "manual_trigger"}], "edges": []})
+    assert s.stats()["schedules"] == 0
+    with pytest.raises(ValueError, match="Overlap"):
+        parse_schedule({"cron": "@daily", "overlap": "sometimes"})
@@ -0,0 +1,120 @@
+"""Durable run queue: API-side enqueue/relay and worker claim/lease behavior."""
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app import config
+from app.db import SessionLocal, init_db
+from app.engine import runs
+from app.engine.registry import get_registry
+from app.models import Execution, RunEvent, RunJob
+from app.worker import Worker
+
+DEFINITION = {
+    "nodes": [
+        {"id": "t", "type": "manual_trigger", "config": {"payload": '{"n": 2}'}},
+        {"id": "s", "type": "set_variable", "config": {"variables": '{"v": {{ input.n }}}'}},
+    ],
+    "edges": [{"source": "t", "target": "s"}],
+}
+
+
+@pytest.fixture
+def queue_mode(monkeypatch):
+    init_db()
+    monkeypatch.setattr(config, "RUN_MODE", "queue")
+    return runs.RunManager()
+
+
+async def _wait_finished(run, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while run.finished_at is None:
+        assert asyncio.get_running_loop().time() < deadline, "run never finished"
+        await asyncio.sleep(0.02)
+
+
+def _job(run_id):
+    db = SessionLocal()
+    try:
+        return db.get(RunJob, run_id)
+    finally:
+        db.close()
+
+
+async def test_queued_run_executes_in_worker_and_relays_events(queue_mode):
+    run = await queue_mode.start(DEFINITION, get_registry(), user_id=1)
+    assert run.remote and run.task is None
+    assert _job(run.id).status == "queued"
+
+    worker = Worker(name="w1", registry=get_registry())
+    assert await worker.poll() == 1
+    await worker.drain()
+    await _wait_finished(run)
+
+    assert run.status == "success"
+    assert run.result["node_statuses"] == {"t": "success", "s": "success"}
+    types = [e["type"] for e in run.events]
+    assert types[0] == "run_state" and types[-1] == "run_finished"
+    assert {"node_id": "s", "status": "success"}.items() <= next(
+        e for e in run.events if e.get("node_id") == "s" and e["status"] == "success"
+    ).items()
+    assert [e["seq"] for e in run.events] == list(range(len(run.events)))
+
+    job = _job(run.id)
+    assert (job.status, job.worker, job.attempts) == ("done", "w1", 1)
+    db = SessionLocal()
+    try:
+        assert db.get(Execution, run.id).status == "success"
+        assert db.query(RunEvent).filter(RunEvent.execution_id == run.id).count() == 0
+    finally:
+        db.close()
+
+
+async def test_cancel_queued_run_never_reaches_worker(queue_mode):
+    run = await queue_mode.start(DEFINITION, get_registry(), user_id=1)
+    assert await queue_mode.cancel(run.id) is True
+    assert run.status == "cancelled" and run.events[-1]["type"] == "run_finished"
+    assert _job(run.id).status == "done"
+    assert await Worker(name="w1", registry=get_registry()).poll() == 0
+
+
+async def test_expired_lease_is_taken_over(queue_mode):
+    run = await queue_mode.start(DEFINITION, get_registry(), user_id=1)
+    db = SessionLocal()
+    try:
+        job = db.get(RunJob, run.id)
+        job.status, job.worker, job.attempts = "claimed", "dead-worker", 1
+        job.lease_expires_at = datetime.now(UTC) + timedelta(minutes=5)
+        db.commit()
+        worker = Worker(name="w2", registry=get_registry())
+        assert await worker.poll() == 0  # lease still valid
+
+        job.lease_expires_at = datetime.now(UTC) - timedelta(seconds=1)
+        db.commit()
+    finally:
+        db.close()
+
+    assert await worker.poll() == 1
+    await worker.drain()
+    await _wait_finished(run)
+    job = _job(run.id)
+    assert (job.status, job.worker, job.attempts) == ("done", "w2", 2)
+    assert run.status == "success"
+
+
+async def test_worker_stores_event_batches(queue_mode):
+    run = await queue_mode.start(DEFINITION, get_registry(), user_id=1)
+    queue_mode.runs.pop(run.id)  # nobody relays: events stay in run_events
+    worker = Worker(name="w1", registry=get_registry())
+    await worker.poll()
+    await worker.drain()
+    db = SessionLocal()
+    try:
+        rows = db.query(RunEvent).filter(RunEvent.execution_id == run.id).all()
+    finally:
+        db.close()
+    events = [json.loads(r.data) for r in rows]
+    assert events[-1] == {**events[-1], "type": "run_finished", "status": "success"}
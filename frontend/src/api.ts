@@ -34,7 +34,8 @@ export const api = {
   delete: <T>(path: string) => request<T>(path, { method: 'DELETE' }),
 }
 
-export function runEventsUrl(runId: string): string {
+/** Batched event stream: each frame is an array of events after seq `since`. */
+export function runEventsUrl(runId: string, since = -1): string {
   const proto = location.protocol === 'https:' ? 'wss' : 'ws'
-  return `${proto}://${location.host}/api/runs/${runId}/ws`
+  return `${proto}://${location.host}/api/runs/${runId}/ws?batch=1&since=${since}`
 }
@@ -324,6 +324,12 @@ export default function ConfigPanel({
             {runState && runState.status !== 'pending' ? (
               <>
                 Output: {runState.status}
+                {runState.items && (
+                  <span>
+                    {' '}
+                    · {runState.items.done}/{runState.items.total} items
+                  </span>
+                )}
                 {runState.elapsed_ms !== undefined && <span> · {runState.elapsed_ms}ms</span>}
               </>
             ) : (
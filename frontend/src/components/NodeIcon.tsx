@@ -80,6 +80,21 @@ const ICONS: Record<string, ReactElement> = {
       <path d="M12 3.4 V6.4" />
     </>
   ),
+  // schedule trigger: a clock face on the hour
+  clock: (
+    <>
+      <circle cx="12" cy="12" r="8" />
+      <path d="M12 7.2 V12 L15.2 14" />
+    </>
+  ),
+  // webhook trigger: an arrow landing in a cell
+  webhook: (
+    <>
+      <path d={HEX_SMALL} />
+      <path d="M12 2.5 V12.5" />
+      <path d="M9.6 10.2 L12 12.6 L14.4 10.2" />
+    </>
+  ),
   // fallback / custom nodes: an empty cell
   box: (
     <>
@@ -19,6 +19,8 @@ export default function Toolbar({ saveStatus, onRun, onExport, onImport }: Props
   const workflowId = useStore((s) => s.workflowId)
   const setWorkflow = useStore((s) => s.setWorkflow)
   const runStatus = useStore((s) => s.run.status)
+  const reuseResults = useStore((s) => s.reuseResults)
+  const setReuseResults = useStore((s) => s.setReuseResults)
   const fileInputRef = useRef<HTMLInputElement>(null)
   const navigate = useNavigate()
 
@@ -70,6 +72,18 @@ export default function Toolbar({ saveStatus, onRun, onExport, onImport }: Props
 
       <RunPanel />
 
+      <label
+        className="toggle-row"
+        title="When executing one step, reuse cached results of LLM, GET request and sheet nodes upstream of it"
+      >
+        <input
+          type="checkbox"
+          checked={reuseResults}
+          onChange={(e) => setReuseResults(e.target.checked)}
+        />
+        Reuse step results
+      </label>
+
       <button
         className="btn btn-primary"
         onClick={() => void onRun()}
@@ -63,6 +63,17 @@ describe('serialize/deserialize round trip', () => {
     expect(roundTripped.edges[1].sourceHandle).toBe('true')
   })
 
+  it('keeps a node\'s for_each setting', () => {
+    const withForEach: WorkflowDefinition = {
+      ...definition,
+      nodes: [definition.nodes[0], { ...definition.nodes[1], for_each: { items: '{{ input.rows }}' } }],
+    }
+    const { nodes, edges } = deserializeFlow(withForEach)
+    const roundTripped = serializeFlow(nodes, edges)
+    expect(roundTripped.nodes[1].for_each).toEqual({ items: '{{ input.rows }}' })
+    expect(roundTripped.nodes[0]).not.toHaveProperty('for_each')
+  })
+
   it('drops nothing when serializing', () => {
     const { nodes, edges } = deserializeFlow(definition)
     expect(serializeFlow(nodes, edges).nodes).toHaveLength(definition.nodes.length)
@@ -46,6 +46,7 @@ export function serializeFlow(nodes: FlowNode[], edges: Edge[]): WorkflowDefinit
       label: n.data.label,
       position: n.position,
       config: n.data.config ?? {},
+      ...(n.data.forEach ? { for_each: n.data.forEach } : {}),
     })),
     edges: edges.map((e) => ({
       id: e.id,
@@ -65,7 +66,12 @@ export function deserializeFlow(definition: WorkflowDefinition): {
     id: n.id,
     type: 'swarm',
     position: n.position ?? { x: 100, y: 100 },
-    data: { kind: n.type, label: n.label, config: n.config ?? {} },
+    data: {
+      kind: n.type,
+      label: n.label,
+      config: n.config ?? {},
+      ...(n.for_each ? { forEach: n.for_each } : {}),
+    },
   }))
   const edges: Edge[] = (definition.edges ?? []).map((e, i) => ({
     id: e.id ?? `e_${i}_${e.source}_${e.target}`,
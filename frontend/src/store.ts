@@ -23,6 +23,8 @@ interface SwarmStore {
   pollTimer: number | null
   notice: string | null
   credentials: Credential[]
+  // Opt-in: cached results can hold user data (LLM answers, sheet rows).
+  reuseResults: boolean
 
   loadCredentials: () => Promise<void>
   setNotice: (message: string) => void
@@ -31,6 +33,7 @@ interface SwarmStore {
   loadSpecs: () => Promise<void>
   reloadSpecs: () => Promise<void>
   setWorkflow: (id: number | null, name: string) => void
+  setReuseResults: (reuse: boolean) => void
   startRun: (
     definition: WorkflowDefinition,
     workflowId: number | null,
@@ -44,6 +47,38 @@ interface SwarmStore {
 
 const idleRun: RunState = { runId: null, status: 'idle', nodeStates: {}, logs: [] }
 
+const MAX_RECONNECTS = 3
+
+type RunEvent = { type: string; seq: number } & Record<string, any>
+
+function applyEvent(run: RunState, event: RunEvent) {
+  switch (event.type) {
+    case 'node_state':
+      run.nodeStates[event.node_id] = {
+        status: event.status,
+        output: event.output,
+        error: event.error,
+        reason: event.reason,
+        elapsed_ms: event.elapsed_ms,
+        items: event.items ?? run.nodeStates[event.node_id]?.items,
+      }
+      if (event.error) {
+        run.logs.push({ level: 'error', node_id: event.node_id, message: event.error, ts: event.ts })
+      }
+      break
+    case 'log':
+      run.logs.push({ level: event.level, node_id: event.node_id, message: event.message, ts: event.ts })
+      break
+    case 'run_error':
+      run.error = event.message
+      run.logs.push({ level: 'error', message: event.message, ts: event.ts })
+      break
+    case 'run_finished':
+      run.status = event.status
+      break
+  }
+}
+
 export const useStore = create<SwarmStore>((set, get) => ({
   user: null,
   authChecked: false,
@@ -57,6 +92,7 @@ export const useStore = create<SwarmStore>((set, get) => ({
   pollTimer: null,
   notice: null,
   credentials: [],
+  reuseResults: false,
 
   loadCredentials: async () => {
     const { credentials } = await api.get<{ credentials: Credential[] }>('/api/credentials')
@@ -99,6 +135,8 @@ export const useStore = create<SwarmStore>((set, get) => ({
 
   setWorkflow: (id, name) => set({ workflowId: id, workflowName: name }),
 
+  setReuseResults: (reuse) => set({ reuseResults: reuse }),
+
   startRun: async (definition, workflowId, workflowName, targetNodeId, excludeTarget) => {
     get().ws?.close()
     if (get().pollTimer) window.clearInterval(get().pollTimer!)
@@ -112,6 +150,10 @@ export const useStore = create<SwarmStore>((set, get) => ({
         workflow_name: workflowName,
         target_node_id: targetNodeId ?? null,
         exclude_target: excludeTarget ?? false,
+        // Stepping through one node re-runs everything upstream of it: when the
+        // user opted in, reuse the cached results of expensive upstream nodes
+        // (LLM calls, GET requests).
+        use_cache: targetNodeId != null && get().reuseResults,
       }))
     } catch (e) {
       set({
@@ -124,8 +166,6 @@ export const useStore = create<SwarmStore>((set, get) => ({
       return
     }
 
-    const ws = new WebSocket(runEventsUrl(run_id))
-
     // Safety net: the WebSocket is the live feed, but never the only source of
     // truth - poll the snapshot and reconcile if the socket goes quiet.
     const pollTimer = window.setInterval(async () => {
@@ -169,62 +209,57 @@ export const useStore = create<SwarmStore>((set, get) => ({
       }
     }, 1500)
 
-    set({ ws, pollTimer, run: { ...idleRun, status: 'running', runId: run_id } })
-
-    ws.onmessage = (msg) => {
-      const event = JSON.parse(msg.data)
-      set((state) => {
-        const run = { ...state.run, nodeStates: { ...state.run.nodeStates }, logs: [...state.run.logs] }
-        switch (event.type) {
-          case 'node_state':
-            run.nodeStates[event.node_id] = {
-              status: event.status,
-              output: event.output,
-              error: event.error,
-              reason: event.reason,
-              elapsed_ms: event.elapsed_ms,
-            }
-            if (event.error) {
-              run.logs.push({ level: 'error', node_id: event.node_id, message: event.error, ts: event.ts })
-            }
-            break
-          case 'log':
-            run.logs.push({ level: event.level, node_id: event.node_id, message: event.message, ts: event.ts })
-            break
-          case 'run_error':
-            run.error = event.message
-            run.logs.push({ level: 'error', message: event.message, ts: event.ts })
-            break
-          case 'run_finished':
-            run.status = event.status
-            break
-        }
-        return { run }
-      })
-    }
-    ws.onerror = () => {
-      set((state) => ({
-        run: { ...state.run, error: state.run.error ?? 'Lost connection to the run event stream' },
-      }))
-    }
-    ws.onclose = () => {
-      set((state) => {
-        if (state.run.status === 'running' && state.run.runId === run_id) {
-          // Socket closed without a run_finished: fall back to polling the snapshot.
-          api
-            .get<{ run: { status: string } }>(`/api/runs/${run_id}`)
-            .then(({ run }) =>
-              set((s) =>
-                s.run.runId === run_id
-                  ? { run: { ...s.run, status: run.status as RunState['status'] } }
-                  : s,
-              ),
-            )
-            .catch(() => undefined)
+    set({ pollTimer, run: { ...idleRun, status: 'running', runId: run_id } })
+
+    // A dropped socket reconnects from the last seq it applied, so no event is
+    // shown twice or missed; after a few failed attempts polling takes over.
+    let lastSeq = -1
+    let reconnects = 0
+    const connect = () => {
+      const ws = new WebSocket(runEventsUrl(run_id, lastSeq))
+      set({ ws })
+      ws.onmessage = (msg) => {
+        const data = JSON.parse(msg.data)
+        const events: RunEvent[] = Array.isArray(data) ? data : [data]
+        reconnects = 0
+        set((state) => {
+          if (state.run.runId !== run_id) return state
+          const run = { ...state.run, nodeStates: { ...state.run.nodeStates }, logs: [...state.run.logs] }
+          for (const event of events) {
+            if (event.seq <= lastSeq) continue
+            lastSeq = event.seq
+            applyEvent(run, event)
+          }
+          return { run }
+        })
+      }
+      ws.onclose = () => {
+        const state = get()
+        if (state.ws === ws) set({ ws: null })
+        if (state.run.status !== 'running' || state.run.runId !== run_id) return
+        if (reconnects < MAX_RECONNECTS) {
+          reconnects += 1
+          window.setTimeout(() => {
+            const s = get()
+            if (s.run.status === 'running' && s.run.runId === run_id && !s.ws) connect()
+          }, 500 * reconnects)
+          return
         }
-        return { ws: null }
-      })
+        // Socket keeps closing without a run_finished: fall back to polling the snapshot.
+        set((s) => ({
+          run: { ...s.run, error: s.run.error ?? 'Lost connection to the run event stream' },
+        }))
+        api
+          .get<{ run: { status: string } }>(`/api/runs/${run_id}`)
+          .then(({ run }) =>
+            set((s) =>
+              s.run.runId === run_id ? { run: { ...s.run, status: run.status as RunState['status'] } } : s,
+            ),
+          )
+          .catch(() => undefined)
+      }
     }
+    connect()
   },
 
   cancelRun: async () => {
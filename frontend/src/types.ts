@@ -46,6 +46,7 @@ export interface SwarmNodeData {
   kind: string
   label?: string
   config: Record<string, unknown>
+  forEach?: WorkflowDefinition['nodes'][number]['for_each']
   [key: string]: unknown
 }
 
@@ -70,6 +71,7 @@ export interface NodeRunState {
   error?: string
   reason?: string
   elapsed_ms?: number
+  items?: { done: number; total: number } // for_each progress
 }
 
 export interface LogEntry {
@@ -95,6 +97,7 @@ export interface WorkflowDefinition {
     label?: string
     position: { x: number; y: number }
     config: Record<string, unknown>
+    for_each?: boolean | { items?: string; concurrency?: number }
   }>
   edges: Array<{
     id?: string